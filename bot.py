@@ -11,10 +11,18 @@ from pyrogram import idle
 
 from config import config
 from core.client import bot_client
+from core.client_pool import client_pool
 from core.dispatcher import Dispatcher
 from core.scheduler import scheduler
+from core.timers import timer_engine
+from core.upload_queue import upload_queue
+from storage.mirror_manager import mirror_manager
 from database.connection import get_database
 from cache.redis_client import redis_client
+from services.access_log_service import access_log_service
+from services.counter_service import counter_service
+from services.link_filter_service import link_filter_service
+from services.link_token_service import link_token_service
 
 class FileShareBot:
     """Main bot application"""
@@ -49,9 +57,22 @@ class FileShareBot:
             print("🐝 Connecting to Redis...")
             await redis_client.connect()
             
+            # Build link ID filter
+            print("🔎 Building link filter...")
+            await link_filter_service.rebuild(db)
+            await link_token_service.refresh(db)
+            
+            # Start buffered access log writer
+            await access_log_service.start()
+            
+            # Start upload workers
+            await upload_queue.start()
+            
             # Create and start Pyrogram client
             print("🤖 Initializing bot client...")
             self.app = await bot_client.start()
+            await client_pool.start()
+            await mirror_manager.start(self.app)
             
             # Setup dispatcher and load handlers
             print("🔄 Loading handlers...")
@@ -62,6 +83,7 @@ class FileShareBot:
             # Start scheduler
             print("⏰ Starting scheduler...")
             scheduler.start()
+            await timer_engine.start()
             
             # Verify storage channel access
             from storage.channel_manager import ChannelManager
@@ -94,11 +116,23 @@ class FileShareBot:
         
         # Stop scheduler
         scheduler.stop()
+        await timer_engine.stop()
+        
+        # Let running uploads finish
+        await upload_queue.stop()
+        await mirror_manager.stop()
+        
+        # Flush pending access logs
+        await access_log_service.stop()
+        
+        # Flush pending counter deltas
+        await counter_service.flush()
         
         # Disconnect from Redis
         await redis_client.disconnect()
         
-        # Stop Pyrogram client
+        # Stop Pyrogram clients
+        await client_pool.stop()
         await bot_client.stop()
         
         print("✅ Bot stopped successfully")
@@ -26,4 +26,32 @@ def stats_key(user_id: int) -> str:
 
 def global_stats_key() -> str:
     """Global stats cache key"""
-    return "stats:global"
\ No newline at end of file
+    return "stats:global"
+
+def counter_key(collection: str, field: str) -> str:
+    """Pending write-behind counter deltas"""
+    return f"counter:{collection}:{field}"
+
+def link_filter_key() -> str:
+    """Shared Bloom filter of issued link IDs"""
+    return "bloom:links"
+
+def list_version_key(user_id: int) -> str:
+    """Version of a user's file and link lists, bumped on every change"""
+    return f"listver:{user_id}"
+
+def page_key(user_id: int, version: int, view: str, token: str) -> str:
+    """Rendered list page at one list version"""
+    return f"page:{user_id}:{version}:{view}:{token}"
+
+def search_results_key(user_id: int, version: int, query_hash: str) -> str:
+    """Ranked file IDs of a /search query at one list version"""
+    return f"searchres:{user_id}:{version}:{query_hash}"
+
+def helper_contact_key(helper: str, user_id: int) -> str:
+    """Whether a helper bot can message a user ('seen' or 'failed')"""
+    return f"helper:{helper}:{user_id}"
+
+def timers_key() -> str:
+    """Durable timers sorted by due time"""
+    return "timers:due"
\ No newline at end of file
@@ -94,6 +94,106 @@ class RedisClient:
             print(f"Redis increment error: {e}")
             return 0
     
+    async def hincrby(self, key: str, field: str, amount: int = 1) -> Optional[int]:
+        """Increment a hash field (None if the increment was not applied)"""
+        if not self.connected:
+            return None
+        try:
+            return await self.client.hincrby(key, field, amount)
+        except Exception as e:
+            print(f"Redis hincrby error: {e}")
+            return None
+    
+    async def hgetall(self, key: str) -> dict:
+        """Get all fields of a hash"""
+        if not self.connected:
+            return {}
+        try:
+            return await self.client.hgetall(key)
+        except Exception as e:
+            print(f"Redis hgetall error: {e}")
+            return {}
+    
+    async def hmget(self, key: str, fields: list) -> list:
+        """Get several hash fields"""
+        if not self.connected or not fields:
+            return [None] * len(fields)
+        try:
+            return await self.client.hmget(key, fields)
+        except Exception as e:
+            print(f"Redis hmget error: {e}")
+            return [None] * len(fields)
+    
+    async def rename(self, key: str, new_key: str) -> bool:
+        """Atomically rename a key (False if key is missing)"""
+        if not self.connected:
+            return False
+        try:
+            await self.client.rename(key, new_key)
+            return True
+        except Exception as e:
+            return False
+    
+    async def setbits(self, key: str, offsets: list) -> bool:
+        """Set several bits in one pipeline"""
+        if not self.connected:
+            return False
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for offset in offsets:
+                pipe.setbit(key, offset, 1)
+            await pipe.execute()
+            return True
+        except Exception as e:
+            print(f"Redis setbits error: {e}")
+            return False
+    
+    async def getbits(self, key: str, offsets: list) -> Optional[list]:
+        """Get several bits in one pipeline (None if unavailable)"""
+        if not self.connected:
+            return None
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for offset in offsets:
+                pipe.getbit(key, offset)
+            return await pipe.execute()
+        except Exception as e:
+            print(f"Redis getbits error: {e}")
+            return None
+    
+    async def zadd(self, key: str, mapping: dict) -> bool:
+        """Add members to a sorted set"""
+        if not self.connected:
+            return False
+        try:
+            await self.client.zadd(key, mapping)
+            return True
+        except Exception as e:
+            print(f"Redis zadd error: {e}")
+            return False
+    
+    async def zrangebyscore(self, key: str, min_score, max_score, limit: int = 1000) -> list:
+        """Get (member, score) pairs with scores in range"""
+        if not self.connected:
+            return []
+        try:
+            return await self.client.zrangebyscore(
+                key, min_score, max_score, start=0, num=limit, withscores=True
+            )
+        except Exception as e:
+            print(f"Redis zrangebyscore error: {e}")
+            return []
+    
+    async def zrem(self, key: str, member: str) -> int:
+        """Remove a sorted set member (returns number removed)"""
+        if not self.connected:
+            return 0
+        try:
+            return await self.client.zrem(key, member)
+        except Exception as e:
+            print(f"Redis zrem error: {e}")
+            return 0
+    
     async def expire(self, key: str, ttl: int) -> bool:
         """Set expiry on existing key"""
         if not self.connected:
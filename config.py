@@ -14,6 +14,12 @@ class Config:
     
     # Storage
     STORAGE_CHANNEL_ID: int = int(os.getenv('STORAGE_CHANNEL_ID', '0'))
+    STORAGE_CHANNEL_IDS: List[int] = [
+        int(id_.strip())
+        for id_ in os.getenv('STORAGE_CHANNEL_IDS', '').split(',')
+        if id_.strip()
+    ] or [STORAGE_CHANNEL_ID]
+    STORAGE_PLACEMENT: str = os.getenv('STORAGE_PLACEMENT', 'user_id')  # user_id, content
 
     # Force Channel Join
 FORCE_JOIN = os.getenv("FORCE_JOIN", "true").lower() == "true"
@@ -56,6 +62,89 @@ FORCE_JOIN_CHANNELS = [
     ENABLE_WATERMARK: bool = os.getenv('ENABLE_WATERMARK', 'false').lower() == 'true'
     ENABLE_PAYMENTS: bool = os.getenv('ENABLE_PAYMENTS', 'false').lower() == 'true'
     
+    # Delivery
+    DELIVERY_MODE: str = os.getenv('DELIVERY_MODE', 'cached')  # cached, copy
+    HEDGE_ENABLED: bool = os.getenv('HEDGE_ENABLED', 'true').lower() == 'true'
+    HEDGE_PERCENTILE: float = float(os.getenv('HEDGE_PERCENTILE', '95'))  # delivery latency that triggers a hedge
+    HEDGE_MIN_DELAY_MS: int = int(os.getenv('HEDGE_MIN_DELAY_MS', '250'))
+    HEDGE_MAX_DELAY_MS: int = int(os.getenv('HEDGE_MAX_DELAY_MS', '3000'))
+    HEDGE_DEMOTE_AFTER: int = int(os.getenv('HEDGE_DEMOTE_AFTER', '3'))  # consecutive lost races
+    HEDGE_DEMOTE_SECONDS: int = int(os.getenv('HEDGE_DEMOTE_SECONDS', '300'))
+    
+    # Access Log Writer
+    ACCESS_LOG_QUEUE_SIZE: int = int(os.getenv('ACCESS_LOG_QUEUE_SIZE', '10000'))
+    ACCESS_LOG_BATCH_SIZE: int = int(os.getenv('ACCESS_LOG_BATCH_SIZE', '500'))
+    ACCESS_LOG_FLUSH_INTERVAL: float = float(os.getenv('ACCESS_LOG_FLUSH_INTERVAL', '2'))  # seconds
+    ACCESS_LOG_OVERFLOW: str = os.getenv('ACCESS_LOG_OVERFLOW', 'block')  # block, drop, spill
+    ACCESS_LOG_SPILL_PATH: str = os.getenv('ACCESS_LOG_SPILL_PATH', '/tmp/access_logs.spill')
+    
+    # Write-behind Counters
+    COUNTER_FLUSH_INTERVAL: int = int(os.getenv('COUNTER_FLUSH_INTERVAL', '30'))  # seconds
+    
+    # Link ID Bloom Filter
+    LINK_FILTER_CAPACITY: int = int(os.getenv('LINK_FILTER_CAPACITY', '1000000'))
+    LINK_FILTER_FP_RATE: float = float(os.getenv('LINK_FILTER_FP_RATE', '0.001'))
+    LINK_FILTER_SHARED: bool = os.getenv('LINK_FILTER_SHARED', 'true').lower() == 'true'  # false only for a single instance
+    
+    # Signed Links
+    ENABLE_SIGNED_LINKS: bool = os.getenv('ENABLE_SIGNED_LINKS', 'true').lower() == 'true'
+    LINK_TOKEN_EPOCH: int = int(os.getenv('LINK_TOKEN_EPOCH', '0'))  # bump to revoke all signed links
+    
+    # Timers
+    TIMER_TICK: float = float(os.getenv('TIMER_TICK', '1'))  # seconds
+    TIMER_HORIZON: int = int(os.getenv('TIMER_HORIZON', '120'))  # seconds of timers held in memory
+    TIMER_RETRY_DELAY: float = float(os.getenv('TIMER_RETRY_DELAY', '5'))  # first backoff after a failed transition
+    
+    # Telegram API pacing (defaults follow Telegram's documented bot limits)
+    TG_GLOBAL_RATE: float = float(os.getenv('TG_GLOBAL_RATE', '30'))  # calls per second
+    TG_PRIVATE_CHAT_RATE: float = float(os.getenv('TG_PRIVATE_CHAT_RATE', '1'))  # messages per second
+    TG_GROUP_CHAT_PER_MINUTE: float = float(os.getenv('TG_GROUP_CHAT_PER_MINUTE', '20'))
+    TG_STORAGE_CHANNEL_RATE: float = float(os.getenv('TG_STORAGE_CHANNEL_RATE', '10'))  # writes per second per storage/mirror channel
+    TG_MAX_CONCURRENCY: int = int(os.getenv('TG_MAX_CONCURRENCY', '16'))
+    TG_MAX_FLOOD_WAIT: int = int(os.getenv('TG_MAX_FLOOD_WAIT', '60'))  # longer waits fail the call
+    
+    # Helper bots for deliveries (must be admins of the storage channel)
+    HELPER_BOT_TOKENS: List[str] = [
+        token.strip()
+        for token in os.getenv('HELPER_BOT_TOKENS', '').split(',')
+        if token.strip()
+    ]
+    HELPER_WORKERS: int = int(os.getenv('HELPER_WORKERS', '4'))
+    HELPER_MAX_CONCURRENT_TRANSMISSIONS: int = int(os.getenv('HELPER_MAX_CONCURRENT_TRANSMISSIONS', '1'))
+    HELPER_SEEN_TTL: int = int(os.getenv('HELPER_SEEN_TTL', str(30 * 86400)))  # seconds a user counts as reachable
+    HELPER_FAILURE_TTL: int = int(os.getenv('HELPER_FAILURE_TTL', '86400'))  # seconds a failed helper is skipped
+    
+    # Mirror replication
+    MIRROR_CHANNEL_IDS: List[int] = [
+        int(id_.strip())
+        for id_ in os.getenv('MIRROR_CHANNEL_IDS', '').split(',')
+        if id_.strip()
+    ]
+    MIRROR_CONCURRENCY: int = int(os.getenv('MIRROR_CONCURRENCY', '4'))
+    MIRROR_BATCH_SIZE: int = int(os.getenv('MIRROR_BATCH_SIZE', '100'))  # messages per forward (max 100)
+    MIRROR_FLUSH_INTERVAL: float = float(os.getenv('MIRROR_FLUSH_INTERVAL', '5'))  # seconds between queue scans
+    MIRROR_MAX_ATTEMPTS: int = int(os.getenv('MIRROR_MAX_ATTEMPTS', '8'))
+    
+    # Uploads
+    MEDIA_GROUP_WINDOW: float = float(os.getenv('MEDIA_GROUP_WINDOW', '1.5'))  # seconds to wait for album items
+    GROUP_COMMIT_WINDOW: float = float(os.getenv('GROUP_COMMIT_WINDOW', '5'))  # ms to collect concurrent inserts
+    GROUP_COMMIT_MAX_BATCH: int = int(os.getenv('GROUP_COMMIT_MAX_BATCH', '500'))
+    UPLOAD_WORKERS: int = int(os.getenv('UPLOAD_WORKERS', '4'))
+    UPLOAD_PER_USER_CONCURRENCY: int = int(os.getenv('UPLOAD_PER_USER_CONCURRENCY', '1'))
+    UPLOAD_QUEUE_SIZE: int = int(os.getenv('UPLOAD_QUEUE_SIZE', '1000'))
+    UPLOAD_QUEUE_PER_USER: int = int(os.getenv('UPLOAD_QUEUE_PER_USER', '100'))
+    UPLOAD_DRAIN_TIMEOUT: float = float(os.getenv('UPLOAD_DRAIN_TIMEOUT', '20'))  # seconds to finish queued jobs on shutdown
+    
+    # Search
+    SEARCH_CANDIDATES: int = int(os.getenv('SEARCH_CANDIDATES', '2000'))  # postings read per query trigram
+    SEARCH_MIN_OVERLAP: float = float(os.getenv('SEARCH_MIN_OVERLAP', '0.6'))  # share of query trigrams a fuzzy match needs
+    SEARCH_MAX_QUERY_LENGTH: int = int(os.getenv('SEARCH_MAX_QUERY_LENGTH', '64'))
+    SEARCH_RESULT_LIMIT: int = int(os.getenv('SEARCH_RESULT_LIMIT', '50'))  # results paged through per /search
+    SEARCH_MAX_SCAN: int = int(os.getenv('SEARCH_MAX_SCAN', '5000'))  # refuse filtered searches reading more files
+    
+    # List pages (/myfiles, /links, /search)
+    LIST_PAGE_SIZE: int = int(os.getenv('LIST_PAGE_SIZE', '10'))
+    
     @classmethod
     def validate(cls) -> bool:
         """Validate critical configuration"""
@@ -1,6 +1,7 @@
 from pyrogram import Client
 from config import config
 from typing import Optional
+from core.rate_scheduler import rate_scheduler
 
 class BotClient:
     """Pyrogram bot client wrapper"""
@@ -18,6 +19,8 @@ class BotClient:
             bot_token=config.BOT_TOKEN,
             workdir="/tmp"
         )
+        # Pace every outbound API call
+        rate_scheduler.install(self.app)
         return self.app
     
     async def start(self):
@@ -0,0 +1,190 @@
+"""Helper bot clients for outbound file delivery"""
+import time
+from typing import Dict, List, Optional, Tuple
+from pyrogram import Client, filters
+from pyrogram.errors import InputUserDeactivated, PeerIdInvalid, UserDeactivated, UserIsBlocked
+from pyrogram.handlers import MessageHandler
+from pyrogram.types import Message
+from cache.redis_client import redis_client
+from cache.keys import helper_contact_key
+from core.rate_scheduler import RateScheduler, rate_scheduler
+from config import config
+
+CONTACT_SEEN = 'seen'
+CONTACT_FAILED = 'failed'
+
+# Errors meaning the helper cannot message this user (as opposed to
+# trouble with the channel or Telegram)
+RECIPIENT_ERRORS = (InputUserDeactivated, PeerIdInvalid, UserDeactivated, UserIsBlocked)
+
+class HelperClient:
+    """One helper bot with its own pacing"""
+    
+    def __init__(self, index: int, token: str):
+        self.name = f"helper_{index}"
+        self.client = Client(
+            name=f"file_sharing_bot_{self.name}",
+            api_id=config.API_ID,
+            api_hash=config.API_HASH,
+            bot_token=token,
+            workdir="/tmp",
+            workers=config.HELPER_WORKERS,
+            max_concurrent_transmissions=config.HELPER_MAX_CONCURRENT_TRANSMISSIONS
+        )
+        self.scheduler = RateScheduler(name=self.name)
+        self.scheduler.install(self.client)
+        # Private messages are the only updates a helper handles: they
+        # show the user started it, so it may message them
+        self.client.add_handler(MessageHandler(self._on_private_message, filters.private))
+        self.active = 0
+        self.channels = set()  # storage and mirror channels the helper can read
+        self.stats = {
+            'delivered': 0,
+            'failed': 0,
+        }
+    
+    @property
+    def load(self) -> int:
+        """Deliveries in progress plus calls queued on the scheduler"""
+        return self.active + self.scheduler.load
+    
+    async def _on_private_message(self, client: Client, message: Message):
+        if message.from_user:
+            await client_pool.set_contact(self, message.from_user.id, CONTACT_SEEN)
+
+class ClientPool:
+    """Spread deliveries over helper bots that are admins of the storage channel.
+    
+    Helpers only copy stored messages to users; the primary bot keeps
+    handling updates and commands and serves anything a helper cannot.
+    A bot can only message users who started it, so a helper is used for
+    a user only after it has seen them (a private message or an earlier
+    delivery), and not again for a while after a delivery to them failed.
+    """
+    
+    def __init__(self, tokens: List[str] = config.HELPER_BOT_TOKENS):
+        self.tokens = tokens
+        self.helpers: List[HelperClient] = []
+        # (helper name, user_id) -> (state, monotonic expiry); Redis shares it across instances
+        self.contacts: Dict[Tuple[str, int], Tuple[str, float]] = {}
+    
+    async def start(self):
+        """Start helper clients that can read every storage channel.
+        
+        Mirror channels are optional: a helper only serves the ones it can read.
+        """
+        for index, token in enumerate(self.tokens, 1):
+            helper = HelperClient(index, token)
+            try:
+                await helper.client.start()
+                for channel_id in config.STORAGE_CHANNEL_IDS:
+                    await helper.client.get_chat(channel_id)
+                    helper.channels.add(channel_id)
+                for channel_id in config.MIRROR_CHANNEL_IDS:
+                    try:
+                        await helper.client.get_chat(channel_id)
+                        helper.channels.add(channel_id)
+                    except Exception as e:
+                        print(f"⚠️  {helper.name} cannot read mirror {channel_id}: {e}")
+                self.helpers.append(helper)
+            except Exception as e:
+                print(f"⚠️  Helper bot {index} unavailable: {e}")
+                try:
+                    await helper.client.stop()
+                except Exception:
+                    pass
+        
+        if self.helpers:
+            print(f"✅ Client pool started ({len(self.helpers)} helper bots)")
+    
+    async def stop(self):
+        """Stop all helper clients"""
+        for helper in self.helpers:
+            try:
+                await helper.client.stop()
+            except Exception as e:
+                print(f"Error stopping {helper.name}: {e}")
+        self.helpers = []
+    
+    async def get_contact(self, helper: HelperClient, user_id: int) -> Optional[str]:
+        """Whether the helper has seen the user or failed to reach them (None if unknown)"""
+        contact = self.contacts.get((helper.name, user_id))
+        if contact and contact[1] > time.monotonic():
+            return contact[0]
+        state = await redis_client.get(helper_contact_key(helper.name, user_id))
+        if state:
+            self.contacts[(helper.name, user_id)] = (state, time.monotonic() + config.HELPER_FAILURE_TTL)
+        return state
+    
+    async def set_contact(self, helper: HelperClient, user_id: int, state: str):
+        """Record that the helper reached the user or failed to"""
+        ttl = config.HELPER_SEEN_TTL if state == CONTACT_SEEN else config.HELPER_FAILURE_TTL
+        self.contacts[(helper.name, user_id)] = (state, time.monotonic() + ttl)
+        await redis_client.set(helper_contact_key(helper.name, user_id), state, ttl)
+    
+    async def pick(self, user_id: int, channel_id: int) -> Optional[HelperClient]:
+        """Least-loaded helper that reads the channel, has seen the user and is not waiting out a FloodWait.
+        
+        None means the primary bot is at least as free as every such helper.
+        """
+        available = [
+            helper for helper in self.helpers
+            if channel_id in helper.channels and not helper.scheduler.is_flooded()
+            and await self.get_contact(helper, user_id) == CONTACT_SEEN
+        ]
+        if not available:
+            return None
+        helper = min(available, key=lambda helper: helper.load)
+        if not rate_scheduler.is_flooded() and rate_scheduler.load <= helper.load:
+            return None
+        return helper
+    
+    async def copy_from_storage(self,
+                                message_id: int,
+                                to_chat_id: int,
+                                caption: Optional[str] = None,
+                                channel_id: Optional[int] = None) -> Optional[Message]:
+        """Copy a stored message to a chat through a helper bot.
+        
+        Returns None when the primary bot should deliver instead: no helper
+        that has seen the user is less loaded, or the helper failed to reach
+        the chat.
+        """
+        channel_id = channel_id or config.STORAGE_CHANNEL_ID
+        helper = await self.pick(to_chat_id, channel_id)
+        if not helper:
+            return None
+        
+        helper.active += 1
+        try:
+            message = await helper.client.copy_message(
+                chat_id=to_chat_id,
+                from_chat_id=channel_id,
+                message_id=message_id,
+                caption=caption
+            )
+            helper.stats['delivered'] += 1
+            return message
+        except Exception as e:
+            helper.stats['failed'] += 1
+            print(f"Helper delivery failed on {helper.name}: {e}")
+            if isinstance(e, RECIPIENT_ERRORS):
+                await self.set_contact(helper, to_chat_id, CONTACT_FAILED)
+            return None
+        finally:
+            helper.active -= 1
+    
+    def get_stats(self) -> dict:
+        """Get per-helper load and delivery counters"""
+        return {
+            helper.name: {
+                **helper.stats,
+                'active': helper.active,
+                'load': helper.load,
+                'flooded': helper.scheduler.is_flooded(),
+            }
+            for helper in self.helpers
+        }
+
+# Global helper client pool
+client_pool = ClientPool()
\ No newline at end of file
@@ -0,0 +1,56 @@
+"""Album (media group) aggregation"""
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Set, Tuple
+from pyrogram import Client
+from pyrogram.types import Message
+from config import config
+
+GroupCallback = Callable[[Client, List[Message]], Awaitable[None]]
+
+class MediaGroupCollector:
+    """Buffer messages sharing a media_group_id and hand them over as one batch.
+    
+    Telegram delivers each album item as its own update; the group is
+    flushed once no new item has arrived for `window` seconds.
+    """
+    
+    def __init__(self, window: float = config.MEDIA_GROUP_WINDOW):
+        self.window = window
+        self.groups: Dict[Tuple[int, str], List[Message]] = {}
+        self.timers: Dict[Tuple[int, str], asyncio.TimerHandle] = {}
+        self.tasks: Set[asyncio.Task] = set()
+    
+    def add(self, client: Client, message: Message, callback: GroupCallback):
+        """Buffer an album item, (re)starting its group's flush window"""
+        key = (message.chat.id, message.media_group_id)
+        self.groups.setdefault(key, []).append(message)
+        
+        timer = self.timers.pop(key, None)
+        if timer:
+            timer.cancel()
+        self.timers[key] = asyncio.get_running_loop().call_later(
+            self.window,
+            self._spawn, key, client, callback
+        )
+    
+    def _spawn(self, key: Tuple[int, str], client: Client, callback: GroupCallback):
+        """Start the flush task, keeping a reference until it finishes"""
+        task = asyncio.create_task(self._flush(key, client, callback))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+    
+    async def _flush(self, key: Tuple[int, str], client: Client, callback: GroupCallback):
+        """Run the callback on a complete group"""
+        self.timers.pop(key, None)
+        messages = self.groups.pop(key, [])
+        if not messages:
+            return
+        
+        messages.sort(key=lambda m: m.id)
+        try:
+            await callback(client, messages)
+        except Exception as e:
+            print(f"Media group error: {e}")
+
+# Global media group collector
+media_group_collector = MediaGroupCollector()
\ No newline at end of file
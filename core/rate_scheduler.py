@@ -0,0 +1,306 @@
+"""Outbound Telegram API pacing"""
+import asyncio
+import heapq
+import itertools
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+from pyrogram import Client
+from pyrogram.errors import FloodWait
+from config import config
+
+PRIORITY_USER = 0
+PRIORITY_BACKGROUND = 1
+
+# Calls that post to a chat and count against its per-chat limit
+SEND_CALLS = {'SendMessage', 'SendMedia', 'SendMultiMedia', 'ForwardMessages', 'EditMessage'}
+
+_priority: ContextVar[int] = ContextVar('telegram_priority', default=PRIORITY_USER)
+_on_dispatch: ContextVar[Optional[Callable[[], None]]] = ContextVar('telegram_on_dispatch', default=None)
+
+@contextmanager
+def background():
+    """Run the enclosed Telegram calls behind user-facing ones"""
+    token = _priority.set(PRIORITY_BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+@contextmanager
+def on_dispatch(callback: Callable[[], None]):
+    """Call back when an enclosed call is about to be sent (it can no longer be withdrawn)"""
+    token = _on_dispatch.set(callback)
+    try:
+        yield
+    finally:
+        _on_dispatch.reset(token)
+
+def storage_peer_ids() -> set:
+    """Raw channel ids (without the -100 prefix) of the storage and mirror channels"""
+    return {
+        -channel_id - 1000000000000
+        for channel_id in (*config.STORAGE_CHANNEL_IDS, *config.MIRROR_CHANNEL_IDS)
+        if channel_id < -1000000000000
+    }
+
+def get_peer_key(query) -> Optional[Tuple[str, int]]:
+    """Identify the chat a raw API call posts to"""
+    peer = getattr(query, 'peer', None) or getattr(query, 'to_peer', None)
+    for kind in ('user_id', 'channel_id', 'chat_id'):
+        value = getattr(peer, kind, None)
+        if value is not None:
+            return kind, value
+    return None
+
+class TokenBucket:
+    """Token bucket that can also be frozen until a deadline (FloodWait)"""
+    
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+    
+    def take(self) -> float:
+        """Take a token, or return how long to wait before one is available"""
+        now = time.monotonic()
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+    
+    def block(self, seconds: float):
+        """Refuse tokens for the given time"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+class RateScheduler:
+    """Pace every API call of one bot through global and per-chat token buckets.
+    
+    Calls wait for their chat's bucket, then queue by priority for a global
+    token and a concurrency slot. The bot's own storage and mirror channels
+    get a budget of their own instead of the group limit meant for chats
+    with members. A FloodWait on a send freezes that chat's bucket, halves
+    the global rate and concurrency limit, and both grow back additively as
+    calls succeed (AIMD). A FloodWait on any other call only holds back
+    further calls of the same method.
+    """
+    
+    def __init__(self,
+                 name: str = 'primary',
+                 global_rate: float = config.TG_GLOBAL_RATE,
+                 private_rate: float = config.TG_PRIVATE_CHAT_RATE,
+                 group_rate: float = config.TG_GROUP_CHAT_PER_MINUTE / 60,
+                 storage_rate: float = config.TG_STORAGE_CHANNEL_RATE,
+                 max_concurrency: int = config.TG_MAX_CONCURRENCY,
+                 max_flood_wait: int = config.TG_MAX_FLOOD_WAIT):
+        self.name = name
+        self.base_rate = global_rate
+        self.private_rate = private_rate
+        self.group_rate = group_rate
+        self.storage_rate = storage_rate
+        self.storage_peers = storage_peer_ids()
+        self.max_concurrency = max_concurrency
+        self.max_flood_wait = max_flood_wait
+        self.bucket = TokenBucket(global_rate, global_rate)
+        self.chat_buckets: Dict[Tuple[str, int], TokenBucket] = {}
+        self.method_blocked_until: Dict[str, float] = {}  # call type -> monotonic time its FloodWait ends
+        self.limit = float(max_concurrency)
+        self.inflight = 0
+        self.waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self.sequence = itertools.count()
+        self.pump_handle: Optional[asyncio.TimerHandle] = None
+        self.flood_until = 0.0  # monotonic time the last FloodWait ends
+        self.calls: Dict[str, Dict[str, float]] = defaultdict(lambda: {
+            'calls': 0,
+            'errors': 0,
+            'flood_waits': 0,
+            'flood_wait_seconds': 0,
+            'total_queue_ms': 0.0,
+            'max_queue_ms': 0.0,
+            'total_latency_ms': 0.0,
+        })
+    
+    def install(self, client: Client):
+        """Route all of a client's raw API calls through the scheduler"""
+        # FloodWaits must reach the scheduler instead of being slept on
+        client.sleep_threshold = 0
+        invoke = client.invoke
+        
+        async def paced_invoke(query, *args, **kwargs):
+            return await self.call(query, invoke, *args, **kwargs)
+        
+        client.invoke = paced_invoke
+    
+    async def call(self, query, invoke, *args, **kwargs):
+        """Run one raw API call once pacing allows it"""
+        call_type = type(query).__name__
+        metrics = self.calls[call_type]
+        peer = get_peer_key(query) if call_type in SEND_CALLS else None
+        
+        while True:
+            queued_at = time.monotonic()
+            await self._wait_method(call_type)
+            await self._acquire(peer)
+            queue_ms = (time.monotonic() - queued_at) * 1000
+            metrics['calls'] += 1
+            metrics['total_queue_ms'] += queue_ms
+            metrics['max_queue_ms'] = max(metrics['max_queue_ms'], queue_ms)
+            
+            callback = _on_dispatch.get()
+            if callback:
+                callback()
+            
+            started = time.monotonic()
+            try:
+                result = await invoke(query, *args, **kwargs)
+                self._on_success()
+                return result
+            except FloodWait as e:
+                metrics['flood_waits'] += 1
+                metrics['flood_wait_seconds'] += e.value
+                self._on_flood_wait(call_type, peer, e.value)
+                if e.value > self.max_flood_wait:
+                    metrics['errors'] += 1
+                    raise
+            except Exception:
+                metrics['errors'] += 1
+                raise
+            finally:
+                metrics['total_latency_ms'] += (time.monotonic() - started) * 1000
+                self._release()
+    
+    @property
+    def load(self) -> int:
+        """Calls running or waiting for a slot"""
+        return self.inflight + len(self.waiters)
+    
+    def is_flooded(self) -> bool:
+        """Whether a FloodWait on this bot is still running"""
+        return time.monotonic() < self.flood_until
+    
+    def get_stats(self) -> dict:
+        """Get pacing state and per-call-type metrics"""
+        calls = {}
+        for call_type, metrics in self.calls.items():
+            entry = dict(metrics)
+            entry['avg_queue_ms'] = entry['total_queue_ms'] / entry['calls'] if entry['calls'] else 0.0
+            entry['avg_latency_ms'] = entry['total_latency_ms'] / entry['calls'] if entry['calls'] else 0.0
+            calls[call_type] = entry
+        return {
+            'name': self.name,
+            'rate': self.bucket.rate,
+            'concurrency_limit': int(self.limit),
+            'inflight': self.inflight,
+            'waiting': len(self.waiters),
+            'calls': calls,
+        }
+    
+    async def _wait_method(self, call_type: str):
+        """Sleep out a FloodWait raised by an earlier call of this method"""
+        until = self.method_blocked_until.get(call_type)
+        if until is None:
+            return
+        wait = until - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        else:
+            del self.method_blocked_until[call_type]
+    
+    async def _acquire(self, peer: Optional[Tuple[str, int]]):
+        """Wait for the chat's bucket, then for a global token and slot"""
+        if peer:
+            bucket = self._chat_bucket(peer)
+            while True:
+                wait = bucket.take()
+                if not wait:
+                    break
+                await asyncio.sleep(wait)
+        
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiters, (_priority.get(), next(self.sequence), future))
+        self._pump()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just as we were cancelled: hand the slot back
+                self._release()
+            raise
+    
+    def _release(self):
+        """Free a concurrency slot"""
+        self.inflight -= 1
+        self._pump()
+    
+    def _pump(self):
+        """Grant slots to waiters in priority order while tokens allow"""
+        if self.pump_handle:
+            self.pump_handle.cancel()
+            self.pump_handle = None
+        
+        while self.waiters and self.inflight < int(self.limit):
+            if self.waiters[0][2].cancelled():
+                heapq.heappop(self.waiters)
+                continue
+            wait = self.bucket.take()
+            if wait:
+                self.pump_handle = asyncio.get_running_loop().call_later(wait, self._pump)
+                return
+            _, _, future = heapq.heappop(self.waiters)
+            self.inflight += 1
+            future.set_result(None)
+    
+    def _chat_bucket(self, peer: Tuple[str, int]) -> TokenBucket:
+        """Per-chat bucket: ~1 msg/s with short bursts in private chats, ~20 msg/min in groups and channels"""
+        bucket = self.chat_buckets.get(peer)
+        if bucket is None:
+            if peer[0] == 'user_id':
+                bucket = TokenBucket(self.private_rate, max(3.0, self.private_rate * 3))
+            elif peer[0] == 'channel_id' and peer[1] in self.storage_peers:
+                bucket = TokenBucket(self.storage_rate, max(1.0, self.storage_rate))
+            else:
+                bucket = TokenBucket(self.group_rate, max(1.0, self.group_rate * 60))
+            self.chat_buckets[peer] = bucket
+            if len(self.chat_buckets) > 100000:
+                self._prune_chat_buckets()
+        return bucket
+    
+    def _prune_chat_buckets(self):
+        """Drop buckets that have refilled and are not frozen"""
+        now = time.monotonic()
+        for peer, bucket in list(self.chat_buckets.items()):
+            if bucket.blocked_until < now and now - bucket.updated > bucket.capacity / bucket.rate:
+                del self.chat_buckets[peer]
+    
+    def _on_success(self):
+        """Additive increase of rate and concurrency"""
+        self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+        self.bucket.rate = min(self.base_rate, self.bucket.rate + 1 / self.bucket.rate)
+    
+    def _on_flood_wait(self, call_type: str, peer: Optional[Tuple[str, int]], seconds: int):
+        """Freeze whatever hit the limit; a send also decreases rate and concurrency"""
+        if not peer:
+            until = time.monotonic() + seconds
+            self.method_blocked_until[call_type] = max(self.method_blocked_until.get(call_type, 0.0), until)
+            print(f"⚠️  FloodWait {seconds}s on {self.name} bot for {call_type}")
+            return
+        
+        self.limit = max(1.0, self.limit / 2)
+        self.bucket.rate = max(1.0, self.bucket.rate / 2)
+        self.flood_until = max(self.flood_until, time.monotonic() + seconds)
+        self._chat_bucket(peer).block(seconds)
+        print(f"⚠️  FloodWait {seconds}s on {self.name} bot "
+              f"(rate {self.bucket.rate:.1f}/s, concurrency {int(self.limit)})")
+
+# Pacing for the primary bot client
+rate_scheduler = RateScheduler()
\ No newline at end of file
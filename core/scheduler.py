@@ -1,5 +1,6 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from datetime import datetime
+from config import config
 
 class BotScheduler:
     """Background task scheduler"""
@@ -17,6 +18,27 @@ class BotScheduler:
             id='cleanup_links'
         )
         
+        self.scheduler.add_job(
+            self.flush_counters,
+            'interval',
+            seconds=config.COUNTER_FLUSH_INTERVAL,
+            id='flush_counters'
+        )
+        
+        self.scheduler.add_job(
+            self.rebuild_link_filter,
+            'interval',
+            hours=24,
+            id='rebuild_link_filter'
+        )
+        
+        self.scheduler.add_job(
+            self.refresh_link_revocations,
+            'interval',
+            minutes=1,
+            id='refresh_link_revocations'
+        )
+        
         self.scheduler.add_job(
             self.update_analytics,
             'interval',
@@ -47,6 +69,36 @@ class BotScheduler:
         except Exception as e:
             print(f"❌ Cleanup error: {e}")
     
+    async def flush_counters(self):
+        """Flush write-behind counter deltas to the database"""
+        try:
+            from services.counter_service import counter_service
+            await counter_service.flush()
+        except Exception as e:
+            print(f"❌ Counter flush error: {e}")
+    
+    async def rebuild_link_filter(self):
+        """Rebuild link ID filter to reset its false positive rate"""
+        try:
+            from database.connection import get_database
+            from services.link_filter_service import link_filter_service
+            
+            db = await get_database()
+            await link_filter_service.rebuild(db)
+        except Exception as e:
+            print(f"❌ Link filter rebuild error: {e}")
+    
+    async def refresh_link_revocations(self):
+        """Sync signed link revocations made by other instances"""
+        try:
+            from database.connection import get_database
+            from services.link_token_service import link_token_service
+            
+            db = await get_database()
+            await link_token_service.refresh(db)
+        except Exception as e:
+            print(f"❌ Revocation refresh error: {e}")
+    
     async def update_analytics(self):
         """Update analytics cache"""
         try:
@@ -0,0 +1,206 @@
+"""Durable expiry and self-destruct timers"""
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Optional
+from cache.redis_client import redis_client
+from cache.keys import timers_key
+from utils.timing_wheel import TimingWheel
+from config import config
+
+TIMER_EXPIRE = 'expire'
+TIMER_SELF_DESTRUCT = 'self_destruct'
+
+def _timestamp(dt: datetime) -> float:
+    """UTC timestamp of a naive UTC datetime"""
+    return dt.replace(tzinfo=timezone.utc).timestamp()
+
+class TimerEngine:
+    """Fire link expiry and self-destruct transitions close to their deadline.
+    
+    Pending timers live in a Redis sorted set scored by due time; when Redis
+    is unavailable the links collection itself (expires_at, first_accessed_at
+    + self_destruct_after) is the source. Only timers due within
+    TIMER_HORIZON are held in memory, in a hierarchical timing wheel. A
+    transition that fails is put back with an exponential backoff.
+    """
+    
+    def __init__(self, tick: float = config.TIMER_TICK, horizon: int = config.TIMER_HORIZON,
+                 retry_delay: float = config.TIMER_RETRY_DELAY):
+        self.redis = redis_client
+        self.tick = tick
+        self.horizon = horizon
+        self.retry_delay = retry_delay
+        self.wheel: Optional[TimingWheel] = None
+        self.tasks = []
+        self.running = False
+        self.stats = {
+            'scheduled': 0,
+            'loaded': 0,
+            'fired': 0,
+            'retries': 0,
+            'lag_max_ms': 0.0,
+        }
+        self.due = {}  # member -> due timestamp, for lag tracking
+        self.attempts = {}  # member -> failed transitions so far
+    
+    async def start(self):
+        """Start the tick and loader loops"""
+        if self.running:
+            return
+        self.wheel = TimingWheel(tick=self.tick, now=time.time())
+        self.running = True
+        self.tasks = [
+            asyncio.create_task(self._load_loop()),
+            asyncio.create_task(self._tick_loop()),
+        ]
+        print("✅ Timer engine started")
+    
+    async def stop(self):
+        """Stop the loops (pending timers, including ones being fired, stay in the durable store)"""
+        self.running = False
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+    
+    async def schedule(self, kind: str, link_id: str, due_at: datetime):
+        """Schedule a link transition at due_at (UTC)"""
+        member = f"{kind}:{link_id}"
+        due = _timestamp(due_at)
+        self.stats['scheduled'] += 1
+        await self.redis.zadd(timers_key(), {member: due})
+        if self.wheel and due - time.time() <= self.horizon:
+            self._add(member, due)
+    
+    async def cancel(self, kind: str, link_id: str) -> bool:
+        """Cancel a scheduled transition"""
+        member = f"{kind}:{link_id}"
+        self.due.pop(member, None)
+        cancelled = self.wheel.cancel(member) if self.wheel else False
+        return await self.redis.zrem(timers_key(), member) > 0 or cancelled
+    
+    def get_stats(self) -> dict:
+        """Get timer counters"""
+        stats = dict(self.stats)
+        stats['in_memory'] = len(self.wheel) if self.wheel else 0
+        return stats
+    
+    def _add(self, member: str, due: float):
+        """Put a timer on the in-memory wheel"""
+        if self.wheel.add(member, due):
+            self.due[member] = due
+    
+    async def _load_loop(self):
+        """Pull timers due within the horizon into the wheel"""
+        while self.running:
+            full = False
+            try:
+                full = await self._load()
+            except Exception as e:
+                print(f"Timer load error: {e}")
+            # Catch up quickly on a backlog of overdue timers
+            await asyncio.sleep(self.tick if full else self.horizon / 2)
+    
+    async def _load(self, limit: int = 10000) -> bool:
+        """Load near-due timers from Redis, or from links when Redis is down.
+        
+        Returns True if the batch was full and more may be waiting.
+        """
+        until = time.time() + self.horizon
+        if self.redis.connected:
+            timers = await self.redis.zrangebyscore(timers_key(), '-inf', until, limit=limit)
+            for member, due in timers:
+                if member not in self.wheel:
+                    self._add(member, due)
+                    self.stats['loaded'] += 1
+            return len(timers) >= limit
+        
+        from database.connection import get_database
+        from database.queries.link_queries import LinkQueries
+        
+        link_queries = LinkQueries(await get_database())
+        docs = await link_queries.get_due_links(datetime.utcfromtimestamp(until), limit=limit)
+        for doc in docs:
+            if doc.get('expires_at'):
+                self._add(f"{TIMER_EXPIRE}:{doc['link_id']}", _timestamp(doc['expires_at']))
+            if doc.get('self_destruct') and doc.get('first_accessed_at') and doc.get('self_destruct_after'):
+                due = _timestamp(doc['first_accessed_at']) + doc['self_destruct_after']
+                self._add(f"{TIMER_SELF_DESTRUCT}:{doc['link_id']}", due)
+            self.stats['loaded'] += 1
+        return len(docs) >= limit
+    
+    async def _tick_loop(self):
+        """Advance the wheel every tick and fire due timers"""
+        while self.running:
+            now = time.time()
+            members = self.wheel.advance(now)
+            for start in range(0, len(members), 100):
+                await asyncio.gather(
+                    *(self._fire(member, now) for member in members[start:start + 100]),
+                    return_exceptions=True
+                )
+            await asyncio.sleep(self.tick)
+    
+    async def _fire(self, member: str, now: float):
+        """Claim a timer and apply its link transition"""
+        due = self.due.pop(member, now)
+        kind, link_id = member.split(':', 1)
+        try:
+            if self.redis.connected:
+                # Only the instance that removes the member runs the transition
+                if await self.redis.zrem(timers_key(), member) == 0:
+                    return
+            await self._transition(kind, link_id)
+        except asyncio.CancelledError:
+            # Stopped mid-transition: hand the timer back to the durable store
+            await self.redis.zadd(timers_key(), {member: due})
+            raise
+        except Exception as e:
+            await self._retry(member, e)
+            return
+        
+        self.attempts.pop(member, None)
+        self.stats['fired'] += 1
+        self.stats['lag_max_ms'] = max(self.stats['lag_max_ms'], (now - due) * 1000)
+    
+    async def _retry(self, member: str, error: Exception):
+        """Put a timer whose transition failed back, due after a backoff"""
+        attempts = self.attempts.get(member, 0) + 1
+        self.attempts[member] = attempts
+        self.stats['retries'] += 1
+        delay = min(self.retry_delay * 2 ** (attempts - 1), self.horizon)
+        print(f"Timer {member} failed ({error}), retrying in {delay:.0f}s")
+        
+        due = time.time() + delay
+        await self.redis.zadd(timers_key(), {member: due})
+        self._add(member, due)
+    
+    async def _transition(self, kind: str, link_id: str):
+        """Expire the link and cache the negative outcome (raises if the update failed).
+        
+        Self-destructed links end as 'expired' with revoked_at set, as the
+        self-destruct plugin always did.
+        """
+        from database.connection import get_database
+        from database.queries.link_queries import LinkQueries
+        from storage.cache_manager import cache_manager
+        from utils.constants import LINK_ACCESS_EXPIRED, LINK_ACCESS_SELF_DESTRUCTED
+        
+        link_queries = LinkQueries(await get_database())
+        if kind == TIMER_SELF_DESTRUCT:
+            expired = await link_queries.expire_if_active(link_id, {'revoked_at': datetime.utcnow()})
+            reason = LINK_ACCESS_SELF_DESTRUCTED
+        else:
+            expired = await link_queries.expire_if_active(link_id)
+            reason = LINK_ACCESS_EXPIRED
+        
+        if expired:
+            await cache_manager.cache_dead_link(link_id, reason)
+            # The link leaves the owner's active list
+            await cache_manager.bump_list_version(expired['user_id'])
+            if kind == TIMER_SELF_DESTRUCT:
+                print(f"💥 Self-destructed: {link_id}")
+
+# Global timer engine
+timer_engine = TimerEngine()
\ No newline at end of file
@@ -0,0 +1,195 @@
+"""Bounded upload work queue with per-user fairness"""
+import asyncio
+import time
+from collections import defaultdict, deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+from config import config
+
+Job = Callable[[], Awaitable[None]]
+Drop = Optional[Callable[[], Awaitable[None]]]
+
+class UploadQueue:
+    """Run upload jobs on a fixed worker pool, round-robin across users.
+    
+    Each user has at most `per_user_concurrency` jobs running and at most
+    `per_user_limit` waiting; the whole queue holds at most `max_depth`.
+    On stop, queued jobs get `drain_timeout` seconds to run; jobs still
+    waiting after that are dropped and their `on_drop` callbacks told.
+    """
+    
+    def __init__(self,
+                 workers: int = config.UPLOAD_WORKERS,
+                 per_user_concurrency: int = config.UPLOAD_PER_USER_CONCURRENCY,
+                 max_depth: int = config.UPLOAD_QUEUE_SIZE,
+                 per_user_limit: int = config.UPLOAD_QUEUE_PER_USER,
+                 drain_timeout: float = config.UPLOAD_DRAIN_TIMEOUT):
+        self.workers = workers
+        self.per_user_concurrency = per_user_concurrency
+        self.max_depth = max_depth
+        self.per_user_limit = per_user_limit
+        self.drain_timeout = drain_timeout
+        self.queues: Dict[int, Deque[Tuple[Job, float, Drop]]] = defaultdict(deque)
+        self.ring: Deque[int] = deque()  # users with waiting jobs, in turn order
+        self.active: Dict[int, int] = defaultdict(int)
+        self.depth = 0
+        self.cond: Optional[asyncio.Condition] = None
+        self.tasks: List[asyncio.Task] = []
+        self.running = False
+        self.draining = False
+        self.stats = {
+            'enqueued': 0,
+            'completed': 0,
+            'failed': 0,
+            'rejected': 0,
+            'dropped': 0,
+            'max_depth': 0,
+            'total_wait_ms': 0.0,
+            'max_wait_ms': 0.0,
+        }
+    
+    async def start(self):
+        """Start the worker pool"""
+        if self.running:
+            return
+        self.cond = asyncio.Condition()
+        self.running = True
+        self.tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        print(f"✅ Upload queue started ({self.workers} workers)")
+    
+    async def stop(self):
+        """Stop taking jobs, drain the queue for a while and drop what is left"""
+        if not self.running:
+            return
+        self.draining = True
+        async with self.cond:
+            self.cond.notify_all()
+        _, pending = await asyncio.wait(self.tasks, timeout=self.drain_timeout)
+        
+        # Workers finish the job they are running; nothing new starts
+        self.running = False
+        async with self.cond:
+            dropped = [entry for queue in self.queues.values() for entry in queue]
+            self.queues.clear()
+            self.ring.clear()
+            self.depth = 0
+            self.cond.notify_all()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        self.tasks = []
+        self.draining = False
+        
+        if dropped:
+            print(f"⚠️  Upload queue stopped with {len(dropped)} jobs waiting")
+            self.stats['dropped'] += len(dropped)
+        for _, _, on_drop in dropped:
+            if on_drop:
+                try:
+                    await on_drop()
+                except Exception as e:
+                    print(f"Upload drop notice error: {e}")
+    
+    async def submit(self, user_id: int, job: Job, on_drop: Drop = None) -> Optional[int]:
+        """Queue a job for a user.
+        
+        Returns the number of jobs expected to start before it (0 when a
+        worker picks it up right away), or None if the queue is full or
+        shutting down. on_drop is awaited if the job is dropped on stop.
+        """
+        if not self.running:
+            await job()
+            return 0
+        
+        async with self.cond:
+            queue = self.queues[user_id]
+            if (self.draining or self.depth >= self.max_depth
+                    or len(queue) >= self.per_user_limit):
+                if not queue:
+                    del self.queues[user_id]
+                self.stats['rejected'] += 1
+                return None
+            
+            queue.append((job, time.monotonic(), on_drop))
+            if len(queue) == 1:
+                self.ring.append(user_id)
+            self.depth += 1
+            self.stats['enqueued'] += 1
+            self.stats['max_depth'] = max(self.stats['max_depth'], self.depth)
+            
+            position = self._position(user_id)
+            self.cond.notify()
+            return position
+    
+    def get_stats(self) -> dict:
+        """Get queue depth and wait-time metrics"""
+        stats = dict(self.stats)
+        started = stats['completed'] + stats['failed']
+        stats['depth'] = self.depth
+        stats['running'] = sum(self.active.values())
+        stats['waiting_users'] = len(self.ring)
+        stats['avg_wait_ms'] = stats['total_wait_ms'] / started if started else 0.0
+        oldest = [queue[0][1] for queue in self.queues.values() if queue]
+        stats['oldest_wait_ms'] = (time.monotonic() - min(oldest)) * 1000 if oldest else 0.0
+        return stats
+    
+    def _position(self, user_id: int) -> int:
+        """Jobs ahead of the user's newest job under round-robin order"""
+        rank = len(self.queues[user_id])
+        ahead = rank - 1 + sum(
+            min(len(queue), rank) for uid, queue in self.queues.items() if uid != user_id
+        )
+        idle = self.workers - sum(self.active.values())
+        position = max(0, ahead + 1 - idle)
+        if rank > self.per_user_concurrency - self.active.get(user_id, 0):
+            # Held back by the user's own concurrency cap
+            position = max(position, 1)
+        return position
+    
+    def _next_job(self) -> Optional[Tuple[int, Job, float]]:
+        """Take the next job from the first user in turn below their concurrency cap"""
+        for _ in range(len(self.ring)):
+            user_id = self.ring[0]
+            self.ring.rotate(-1)
+            if self.active[user_id] >= self.per_user_concurrency:
+                continue
+            
+            queue = self.queues[user_id]
+            job, enqueued_at, _ = queue.popleft()
+            if not queue:
+                self.ring.remove(user_id)
+                del self.queues[user_id]
+            self.depth -= 1
+            self.active[user_id] += 1
+            return user_id, job, enqueued_at
+        return None
+    
+    async def _worker(self):
+        """Run jobs until stopped, or until the queue is drained"""
+        while self.running:
+            async with self.cond:
+                entry = self._next_job()
+                while entry is None and self.running and not (self.draining and not self.depth):
+                    await self.cond.wait()
+                    entry = self._next_job()
+                if entry is None:
+                    return
+            
+            user_id, job, enqueued_at = entry
+            wait_ms = (time.monotonic() - enqueued_at) * 1000
+            self.stats['total_wait_ms'] += wait_ms
+            self.stats['max_wait_ms'] = max(self.stats['max_wait_ms'], wait_ms)
+            try:
+                await job()
+                self.stats['completed'] += 1
+            except Exception as e:
+                self.stats['failed'] += 1
+                print(f"Upload job error: {e}")
+            finally:
+                async with self.cond:
+                    self.active[user_id] -= 1
+                    if not self.active[user_id]:
+                        del self.active[user_id]
+                    # A job of this user may have been held back by its cap
+                    self.cond.notify_all()
+
+# Global upload queue
+upload_queue = UploadQueue()
\ No newline at end of file
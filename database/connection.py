@@ -11,6 +11,7 @@ class DatabaseConnection:
         self.client: Optional[AsyncIOMotorClient] = None
         self.db = None
         self.sync_client: Optional[MongoClient] = None
+        self.supports_transactions = False
         
     async def connect(self):
         """Establish async database connection"""
@@ -19,12 +20,22 @@ class DatabaseConnection:
             self.db = self.client[config.DB_NAME]
             # Test connection
             await self.client.admin.command('ping')
+            self.supports_transactions = await self._check_transactions()
             print("✅ Database connected successfully")
             return True
         except Exception as e:
             print(f"❌ Database connection failed: {e}")
             return False
     
+    async def _check_transactions(self) -> bool:
+        """Multi-document transactions need a replica set or sharded cluster"""
+        try:
+            hello = await self.client.admin.command('hello')
+        except Exception:
+            # Servers before 4.4.2 only know the legacy command name
+            hello = await self.client.admin.command('isMaster')
+        return bool(hello.get('setName')) or hello.get('msg') == 'isdbgrid'
+    
     def connect_sync(self):
         """Establish sync database connection for migrations"""
         try:
@@ -51,29 +62,66 @@ class DatabaseConnection:
             await self.db.users.create_index('user_id', unique=True)
             await self.db.users.create_index('role')
             await self.db.users.create_index('created_at')
+            await self.db.users.create_index('last_active')
             
             # File indexes
             await self.db.files.create_index('file_id', unique=True)
-            await self.db.files.create_index('user_id')
+            await self.db.files.create_index(
+                [('user_id', 1), ('created_at', -1), ('_id', -1)],
+                partialFilterExpression={'is_deleted': False}
+            )
+            await self.db.files.create_index(
+                [('download_count', -1)],
+                partialFilterExpression={'is_deleted': False}
+            )
+            for keys in ([('user_id', 1), ('file_type', 1), ('created_at', -1)],
+                         [('user_id', 1), ('tags', 1), ('created_at', -1)],
+                         [('user_id', 1), ('file_size', -1)],
+                         [('user_id', 1), ('download_count', -1)]):
+                await self.db.files.create_index(keys, partialFilterExpression={'is_deleted': False})
             await self.db.files.create_index('created_at')
             await self.db.files.create_index('is_deleted')
+            await self.db.files.create_index('file_unique_id')
+            await self.db.files.create_index([('storage_channel_id', 1), ('telegram_message_id', 1)])
+            
+            # Stored media indexes
+            await self.db.stored_media.create_index('file_unique_id', unique=True)
+            await self.db.stored_media.create_index([('storage_channel_id', 1), ('telegram_message_id', 1)])
+            
+            # Mirror queue indexes
+            await self.db.mirror_queue.create_index(
+                [('mirror_channel_id', 1), ('source_channel_id', 1), ('message_id', 1)], unique=True
+            )
+            await self.db.mirror_queue.create_index([('status', 1), ('enqueued_at', 1), ('next_attempt_at', 1)])
             
             # Link indexes
             await self.db.links.create_index('link_id', unique=True)
             await self.db.links.create_index('file_id')
-            await self.db.links.create_index('user_id')
-            await self.db.links.create_index('status')
+            await self.db.links.create_index([('user_id', 1), ('created_at', -1), ('_id', -1)])
+            await self.db.links.create_index([('status', 1), ('user_id', 1), ('created_at', -1), ('_id', -1)])
+            await self.db.links.create_index([('status', 1), ('expires_at', 1)])
             await self.db.links.create_index('expires_at')
             
             # Access log indexes
             await self.db.access_logs.create_index('link_id')
             await self.db.access_logs.create_index('accessed_at')
+            await self.db.access_logs.create_index([('success', 1), ('user_id', 1)])
+            await self.db.access_logs.create_index([('file_id', 1), ('success', 1)])
             
             # Audit log indexes
-            await self.db.audit_logs.create_index('user_id')
-            await self.db.audit_logs.create_index('action')
+            await self.db.audit_logs.create_index([('user_id', 1), ('timestamp', -1)])
+            await self.db.audit_logs.create_index([('resource_id', 1), ('timestamp', -1)])
+            await self.db.audit_logs.create_index([('action', 1), ('timestamp', -1)])
             await self.db.audit_logs.create_index('timestamp')
             
+            # Payment indexes
+            await self.db.payments.create_index([('user_id', 1), ('created_at', -1), ('_id', -1)])
+            
+            # Search index collections
+            await self.db.search_postings.create_index([('user_id', 1), ('file_id', 1), ('trigram', 1)], unique=True)
+            await self.db.search_postings.create_index([('user_id', 1), ('trigram', 1), ('created_at', -1)])
+            await self.db.search_terms.create_index([('user_id', 1), ('trigram', 1)], unique=True)
+            
             print("✅ Database indexes created")
         except Exception as e:
             print(f"⚠️  Error creating indexes: {e}")
@@ -0,0 +1,95 @@
+"""Group commit for concurrent inserts"""
+import asyncio
+from typing import Dict, List, Set, Tuple
+from pymongo import InsertOne
+from pymongo.errors import BulkWriteError
+from config import config
+
+class GroupCommit:
+    """Collect inserts from concurrent callers and write them with one bulk_write.
+    
+    Each caller waits on its own future and gets its own result; a failed
+    document (e.g. a duplicate key) does not fail the rest of the batch.
+    """
+    
+    def __init__(self,
+                 window: float = config.GROUP_COMMIT_WINDOW,
+                 max_batch: int = config.GROUP_COMMIT_MAX_BATCH):
+        self.window = window / 1000
+        self.max_batch = max_batch
+        self.pending: Dict[str, List[Tuple[dict, asyncio.Future]]] = {}
+        self.collections: Dict[str, object] = {}
+        self.timers: Dict[str, asyncio.Task] = {}
+        self.writes: Set[asyncio.Task] = set()
+        self.stats = {
+            'documents': 0,
+            'batches': 0,
+            'failed': 0,
+            'max_batch_size': 0,
+        }
+    
+    async def insert(self, collection, doc: dict) -> bool:
+        """Queue a document for the next batch on collection and wait for it"""
+        name = collection.full_name
+        future = asyncio.get_running_loop().create_future()
+        batch = self.pending.setdefault(name, [])
+        batch.append((doc, future))
+        self.collections[name] = collection
+        
+        if len(batch) >= self.max_batch:
+            timer = self.timers.pop(name, None)
+            if timer:
+                timer.cancel()
+            task = asyncio.create_task(self._write(name, self.pending.pop(name)))
+            self.writes.add(task)
+            task.add_done_callback(self.writes.discard)
+        elif name not in self.timers:
+            self.timers[name] = asyncio.create_task(self._flush_later(name))
+        
+        # Shield so a cancelled caller doesn't cancel the write for the rest
+        return await asyncio.shield(future)
+    
+    def get_stats(self) -> dict:
+        """Get batching counters"""
+        stats = dict(self.stats)
+        stats['pending'] = sum(len(batch) for batch in self.pending.values())
+        stats['avg_batch_size'] = (
+            stats['documents'] / stats['batches'] if stats['batches'] else 0
+        )
+        return stats
+    
+    async def _flush_later(self, name: str):
+        """Flush a collection's batch once the window has passed"""
+        await asyncio.sleep(self.window)
+        self.timers.pop(name, None)
+        batch = self.pending.pop(name, [])
+        if batch:
+            await self._write(name, batch)
+    
+    async def _write(self, name: str, batch: List[Tuple[dict, asyncio.Future]]):
+        """Write one batch and resolve its callers' futures"""
+        self.stats['batches'] += 1
+        self.stats['documents'] += len(batch)
+        self.stats['max_batch_size'] = max(self.stats['max_batch_size'], len(batch))
+        
+        failed = set()
+        try:
+            await self.collections[name].bulk_write(
+                [InsertOne(doc) for doc, _ in batch],
+                ordered=False
+            )
+        except BulkWriteError as e:
+            for error in e.details.get('writeErrors', []):
+                failed.add(error['index'])
+                print(f"Error inserting into {name}: {error.get('errmsg')}")
+        except Exception as e:
+            print(f"Error writing batch to {name}: {e}")
+            failed = set(range(len(batch)))
+        
+        self.stats['failed'] += len(failed)
+        for index, (_, future) in enumerate(batch):
+            if not future.done():
+                future.set_result(index not in failed)
+
+# Global group commit writer
+group_commit = GroupCommit()
\ No newline at end of file
@@ -0,0 +1,17 @@
+"""Migration 004: Create stored media table for upload dedup"""
+
+def up(db):
+    """Apply migration"""
+    collection = db.stored_media
+    
+    # Create indexes
+    collection.create_index('file_unique_id', unique=True)
+    db.files.create_index('file_unique_id')
+    
+    print("✅ Migration 004: Stored media table created")
+
+def down(db):
+    """Rollback migration"""
+    db.stored_media.drop()
+    db.files.drop_index('file_unique_id_1')
+    print("↩️ Migration 004: Stored media table dropped")
\ No newline at end of file
@@ -0,0 +1,68 @@
+"""Migration 005: Compound and partial indexes from the query plan audit"""
+
+INDEXES = {
+    'access_logs': [
+        ([('file_id', 1), ('success', 1)], {}),
+        ([('success', 1), ('user_id', 1)], {}),
+    ],
+    'audit_logs': [
+        ([('action', 1), ('timestamp', -1)], {}),
+        ([('resource_id', 1), ('timestamp', -1)], {}),
+        ([('user_id', 1), ('timestamp', -1)], {}),
+    ],
+    'files': [
+        ([('download_count', -1)], {'partialFilterExpression': {'is_deleted': False}}),
+        ([('user_id', 1), ('created_at', -1)], {'partialFilterExpression': {'is_deleted': False}}),
+    ],
+    'links': [
+        ([('status', 1), ('expires_at', 1)], {}),
+        ([('status', 1), ('user_id', 1), ('created_at', -1)], {}),
+        ([('user_id', 1), ('created_at', -1)], {}),
+    ],
+    'mirror_queue': [
+        ([('status', 1), ('enqueued_at', 1), ('next_attempt_at', 1)], {}),
+    ],
+    'users': [
+        ([('last_active', 1)], {}),
+    ],
+}
+
+# Single-field indexes the compound ones above make redundant
+REDUNDANT = {
+    'audit_logs': ['action_1', 'user_id_1'],
+    'files': ['user_id_1'],
+    'links': ['status_1', 'user_id_1'],
+}
+
+def index_name(keys) -> str:
+    """Default MongoDB name for an index key list"""
+    return '_'.join(f"{field}_{direction}" for field, direction in keys)
+
+def up(db):
+    """Apply migration"""
+    for collection, indexes in INDEXES.items():
+        for keys, options in indexes:
+            db[collection].create_index(keys, **options)
+    
+    for collection, names in REDUNDANT.items():
+        existing = db[collection].index_information()
+        for name in names:
+            if name in existing:
+                db[collection].drop_index(name)
+    
+    print("✅ Migration 005: Query plan indexes created")
+
+def down(db):
+    """Rollback migration"""
+    for collection, names in REDUNDANT.items():
+        for name in names:
+            field, direction = name.rsplit('_', 1)
+            db[collection].create_index([(field, int(direction))])
+    
+    for collection, indexes in INDEXES.items():
+        existing = db[collection].index_information()
+        for keys, options in indexes:
+            if index_name(keys) in existing:
+                db[collection].drop_index(index_name(keys))
+    
+    print("↩️ Migration 005: Query plan indexes dropped")
\ No newline at end of file
@@ -0,0 +1,48 @@
+"""Migration 006: Create the per-user trigram search index"""
+from pymongo import UpdateOne
+from utils.trigrams import trigrams
+
+BATCH_SIZE = 1000
+
+def up(db):
+    """Apply migration"""
+    db.search_postings.create_index([('user_id', 1), ('file_id', 1), ('trigram', 1)], unique=True)
+    db.search_postings.create_index([('user_id', 1), ('trigram', 1), ('created_at', -1)])
+    db.search_terms.create_index([('user_id', 1), ('trigram', 1)], unique=True)
+    
+    # Backfill from existing files, one user at a time
+    indexed = 0
+    for user_id in db.files.distinct('user_id', {'is_deleted': False}):
+        postings, counts = [], {}
+        cursor = db.files.find(
+            {'user_id': user_id, 'is_deleted': False},
+            {'file_id': 1, 'file_name': 1, 'created_at': 1, '_id': 0}
+        )
+        for file in cursor:
+            for trigram in trigrams(file.get('file_name', '')):
+                postings.append(UpdateOne(
+                    {'user_id': user_id, 'file_id': file['file_id'], 'trigram': trigram},
+                    {'$setOnInsert': {'created_at': file['created_at']}},
+                    upsert=True
+                ))
+                counts[trigram] = counts.get(trigram, 0) + 1
+            indexed += 1
+        
+        for start in range(0, len(postings), BATCH_SIZE):
+            db.search_postings.bulk_write(postings[start:start + BATCH_SIZE], ordered=False)
+        
+        # Recount rather than increment so the migration can be re-run
+        terms = [
+            UpdateOne({'user_id': user_id, 'trigram': trigram}, {'$set': {'count': count}}, upsert=True)
+            for trigram, count in counts.items()
+        ]
+        for start in range(0, len(terms), BATCH_SIZE):
+            db.search_terms.bulk_write(terms[start:start + BATCH_SIZE], ordered=False)
+    
+    print(f"✅ Migration 006: Search index created ({indexed} files indexed)")
+
+def down(db):
+    """Rollback migration"""
+    db.search_postings.drop()
+    db.search_terms.drop()
+    print("↩️ Migration 006: Search index dropped")
\ No newline at end of file
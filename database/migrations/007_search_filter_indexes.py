@@ -0,0 +1,29 @@
+"""Migration 007: Indexes behind /search metadata filters"""
+
+# Partial compound indexes the search query planner chooses between
+INDEXES = [
+    [('user_id', 1), ('file_type', 1), ('created_at', -1)],
+    [('user_id', 1), ('tags', 1), ('created_at', -1)],
+    [('user_id', 1), ('file_size', -1)],
+    [('user_id', 1), ('download_count', -1)],
+]
+
+def index_name(keys) -> str:
+    """Default MongoDB name for an index key list"""
+    return '_'.join(f"{field}_{direction}" for field, direction in keys)
+
+def up(db):
+    """Apply migration"""
+    for keys in INDEXES:
+        db.files.create_index(keys, partialFilterExpression={'is_deleted': False})
+    
+    print("✅ Migration 007: Search filter indexes created")
+
+def down(db):
+    """Rollback migration"""
+    existing = db.files.index_information()
+    for keys in INDEXES:
+        if index_name(keys) in existing:
+            db.files.drop_index(index_name(keys))
+    
+    print("↩️ Migration 007: Search filter indexes dropped")
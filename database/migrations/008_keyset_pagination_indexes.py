@@ -0,0 +1,56 @@
+"""Migration 008: Indexes for keyset (cursor) pagination"""
+
+# Page order is (created_at, _id), so ties on created_at stay in the index
+INDEXES = {
+    'files': [
+        ([('user_id', 1), ('created_at', -1), ('_id', -1)], {'partialFilterExpression': {'is_deleted': False}}),
+    ],
+    'links': [
+        ([('status', 1), ('user_id', 1), ('created_at', -1), ('_id', -1)], {}),
+        ([('user_id', 1), ('created_at', -1), ('_id', -1)], {}),
+    ],
+    'payments': [
+        ([('user_id', 1), ('created_at', -1), ('_id', -1)], {}),
+    ],
+}
+
+# Prefixes of the indexes above
+REPLACED = {
+    'files': [([('user_id', 1), ('created_at', -1)], {'partialFilterExpression': {'is_deleted': False}})],
+    'links': [
+        ([('status', 1), ('user_id', 1), ('created_at', -1)], {}),
+        ([('user_id', 1), ('created_at', -1)], {}),
+    ],
+}
+
+def index_name(keys) -> str:
+    """Default MongoDB name for an index key list"""
+    return '_'.join(f"{field}_{direction}" for field, direction in keys)
+
+def up(db):
+    """Apply migration"""
+    for collection, indexes in INDEXES.items():
+        for keys, options in indexes:
+            db[collection].create_index(keys, **options)
+    
+    for collection, indexes in REPLACED.items():
+        existing = db[collection].index_information()
+        for keys, _ in indexes:
+            if index_name(keys) in existing:
+                db[collection].drop_index(index_name(keys))
+    
+    print("✅ Migration 008: Keyset pagination indexes created")
+
+def down(db):
+    """Rollback migration"""
+    for collection, indexes in REPLACED.items():
+        for keys, options in indexes:
+            db[collection].create_index(keys, **options)
+    
+    for collection, indexes in INDEXES.items():
+        existing = db[collection].index_information()
+        for keys, _ in indexes:
+            if index_name(keys) in existing:
+                db[collection].drop_index(index_name(keys))
+    
+    print("↩️ Migration 008: Keyset pagination indexes dropped")
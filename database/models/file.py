@@ -8,6 +8,9 @@ class File(BaseModel):
     user_id: int
     telegram_file_id: str
     telegram_message_id: int
+    storage_channel_id: Optional[int] = None  # None: config.STORAGE_CHANNEL_ID
+    mirrors: Dict[str, int] = Field(default_factory=dict)  # mirror channel id -> message id
+    file_unique_id: Optional[str] = None  # Telegram content ID, shared across re-uploads
     file_name: str
     file_size: int  # bytes
     file_type: str  # document, video, audio, photo, etc.
@@ -13,6 +13,7 @@ class Link(BaseModel):
     self_destruct: bool = False
     self_destruct_after: Optional[int] = None  # seconds after first access
     password: Optional[str] = None
+    signed: bool = False  # link_id is a self-validating signed token
     expires_at: Optional[datetime] = None
     first_accessed_at: Optional[datetime] = None
     last_accessed_at: Optional[datetime] = None
@@ -35,21 +36,27 @@ class Link(BaseModel):
     
     def is_accessible(self) -> bool:
         """Check if link is accessible"""
+        return self.denial_reason() is None
+    
+    def denial_reason(self) -> Optional[str]:
+        """Get the reason code this link would be refused, or None if accessible"""
+        if self.status == 'revoked':
+            return 'revoked'
         if self.status != 'active':
-            return False
+            return 'expired' if self.status == 'expired' else 'unavailable'
         
         # Check expiry
         if self.expires_at and datetime.utcnow() > self.expires_at:
-            return False
+            return 'expired'
         
         # Check max access
         if self.max_access and self.access_count >= self.max_access:
-            return False
+            return 'exhausted'
         
         # Check self-destruct
         if self.self_destruct and self.first_accessed_at and self.self_destruct_after:
             elapsed = (datetime.utcnow() - self.first_accessed_at).total_seconds()
             if elapsed > self.self_destruct_after:
-                return False
+                return 'self_destructed'
         
-        return True
\ No newline at end of file
+        return None
\ No newline at end of file
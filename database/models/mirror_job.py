@@ -0,0 +1,28 @@
+from datetime import datetime
+from typing import Dict, Any, Optional
+from pydantic import BaseModel, Field
+
+class MirrorJob(BaseModel):
+    """Pending replication of a storage message to one mirror channel"""
+    source_channel_id: int
+    message_id: int
+    mirror_channel_id: int
+    attempts: int = 0
+    status: str = 'pending'  # pending, failed
+    last_error: Optional[str] = None
+    next_attempt_at: datetime = Field(default_factory=datetime.utcnow)
+    lease_until: Optional[datetime] = None
+    lease_owner: Optional[str] = None
+    enqueued_at: datetime = Field(default_factory=datetime.utcnow)
+    
+    class Config:
+        json_encoders = {
+            datetime: lambda v: v.isoformat()
+        }
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return self.model_dump()
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'MirrorJob':
+        return cls(**data)
@@ -0,0 +1,25 @@
+from datetime import datetime
+from typing import Dict, Any, Optional
+from pydantic import BaseModel, Field
+
+class StoredMedia(BaseModel):
+    """Storage channel message shared by every File with the same content"""
+    file_unique_id: str
+    telegram_message_id: int
+    storage_channel_id: Optional[int] = None
+    mirrors: Dict[str, int] = Field(default_factory=dict)  # mirror channel id -> message id
+    telegram_file_id: str
+    ref_count: int = 0
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    
+    class Config:
+        json_encoders = {
+            datetime: lambda v: v.isoformat()
+        }
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return self.model_dump()
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'StoredMedia':
+        return cls(**data)
\ No newline at end of file
@@ -0,0 +1,121 @@
+"""Keyset pagination with opaque continuation tokens"""
+import base64
+import struct
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from bson import ObjectId
+
+EPOCH = datetime(1970, 1, 1)
+
+def encode_cursor(values: List[Any], backward: bool = False) -> str:
+    """Pack a direction and sort key values into a short URL-safe token"""
+    packed = b'<' if backward else b'>'
+    for value in values:
+        if isinstance(value, datetime):
+            packed += b'd' + struct.pack('>q', (value - EPOCH) // timedelta(milliseconds=1))
+        elif isinstance(value, ObjectId):
+            packed += b'o' + value.binary
+        elif isinstance(value, int):
+            packed += b'i' + struct.pack('>q', value)
+        else:
+            raise ValueError(f"Cannot encode cursor value: {value!r}")
+    return base64.urlsafe_b64encode(packed).rstrip(b'=').decode()
+
+def decode_cursor(token: str) -> Optional[Tuple[bool, List[Any]]]:
+    """(backward, sort key values) of a token, or None if it is malformed"""
+    try:
+        packed = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        if packed[:1] not in (b'<', b'>'):
+            return None
+        backward = packed[:1] == b'<'
+        values, position = [], 1
+        while position < len(packed):
+            tag = packed[position:position + 1]
+            if tag == b'd':
+                milliseconds, = struct.unpack_from('>q', packed, position + 1)
+                values.append(EPOCH + timedelta(milliseconds=milliseconds))
+                position += 9
+            elif tag == b'o':
+                values.append(ObjectId(packed[position + 1:position + 13]))
+                position += 13
+            elif tag == b'i':
+                value, = struct.unpack_from('>q', packed, position + 1)
+                values.append(value)
+                position += 9
+            else:
+                return None
+        return backward, values
+    except Exception:
+        return None
+
+def keyset_filter(sort: List[Tuple[str, int]], values: List[Any]) -> Dict[str, Any]:
+    """Condition selecting documents after values in sort order.
+    
+    The leading key gets a plain range so the index bounds the scan;
+    ties on it are broken by the remaining keys.
+    """
+    (field, direction), rest = sort[0], sort[1:]
+    strict = '$lt' if direction < 0 else '$gt'
+    if not rest:
+        return {field: {strict: values[0]}}
+    
+    tie, tie_direction = rest[0]
+    return {
+        field: {'$lte' if direction < 0 else '$gte': values[0]},
+        '$or': [
+            {field: {strict: values[0]}},
+            {tie: {'$lt' if tie_direction < 0 else '$gt': values[1]}},
+        ]
+    }
+
+async def fetch_page(collection,
+                     query: Dict[str, Any],
+                     sort: List[Tuple[str, int]],
+                     limit: int,
+                     cursor: Optional[str] = None,
+                     stages: Optional[List[dict]] = None) -> Tuple[List[dict], Optional[str], Optional[str]]:
+    """One page of documents with the tokens for the next and previous pages.
+    
+    A token is None when there is nothing further that way. sort must
+    end in a unique key and match an index with the query's equality
+    fields in front, so every page, forwards or back, is one bounded
+    index scan. stages run on the sorted documents before the page limit,
+    so they may drop some (e.g. a $lookup and a $match on what it joined)
+    and a page still holds limit documents when enough remain. A
+    malformed cursor starts from the first page.
+    """
+    decoded = decode_cursor(cursor) if cursor else None
+    if decoded and len(decoded[1]) != len(sort):
+        decoded = None
+    backward = bool(decoded and decoded[0])
+    
+    # Going back reads the preceding documents in reverse order
+    scan = [(field, -direction) for field, direction in sort] if backward else sort
+    match = {**query, **keyset_filter(scan, decoded[1])} if decoded else query
+    
+    if stages:
+        pipeline = [{'$match': match}, {'$sort': dict(scan)}, *stages, {'$limit': limit + 1}]
+        docs = [doc async for doc in collection.aggregate(pipeline)]
+    else:
+        docs = [doc async for doc in collection.find(match).sort(scan).limit(limit + 1)]
+    
+    more = len(docs) > limit
+    docs = docs[:limit]
+    if backward:
+        docs.reverse()
+        if not docs:
+            # Everything before was deleted meanwhile
+            return await fetch_page(collection, query, sort, limit, None, stages)
+    if not docs:
+        return [], None, None
+    
+    def key(doc):
+        return [doc[field] for field, _ in sort]
+    
+    if backward:
+        next_cursor = encode_cursor(key(docs[-1]))
+        prev_cursor = encode_cursor(key(docs[0]), backward=True) if more else None
+    else:
+        next_cursor = encode_cursor(key(docs[-1])) if more else None
+        prev_cursor = encode_cursor(key(docs[0]), backward=True) if decoded else None
+    return docs, next_cursor, prev_cursor
@@ -1,52 +1,109 @@
 from datetime import datetime
-from typing import Optional, List
+from typing import Dict, Optional, List, Tuple
+from pymongo import ReturnDocument, UpdateMany
+from pymongo.errors import DuplicateKeyError
 from database.models.file import File
+from database.models.stored_media import StoredMedia
+from database.group_commit import group_commit
+from database.pagination import fetch_page
+from database.single_flight import single_flight
+from utils.trigrams import literal_pattern
+from config import config
 
 class FileQueries:
     """File database queries"""
     
     def __init__(self, db):
         self.collection = db.files
+        self.media_collection = db.stored_media
     
     async def create_file(self, file: File) -> bool:
         """Create new file record"""
         try:
-            await self.collection.insert_one(file.to_dict())
-            return True
+            return await group_commit.insert(self.collection, file.to_dict())
         except Exception as e:
             print(f"Error creating file: {e}")
             return False
     
+    async def create_files(self, files: List[File], session=None) -> bool:
+        """Create several file records in one round trip"""
+        try:
+            await self.collection.insert_many(
+                [file.to_dict() for file in files],
+                session=session
+            )
+            return True
+        except Exception as e:
+            if session:
+                # Let the transaction retry or abort
+                raise
+            print(f"Error creating files: {e}")
+            return False
+    
+    async def remove_files(self, file_ids: List[str]) -> int:
+        """Hard delete file records (compensation for a failed upload)"""
+        try:
+            result = await self.collection.delete_many({'file_id': {'$in': file_ids}})
+            return result.deleted_count
+        except Exception as e:
+            print(f"Error removing files: {e}")
+            return 0
+    
     async def get_file(self, file_id: str) -> Optional[File]:
         """Get file by ID"""
+        file = await single_flight.do(
+            f"files:{file_id}",
+            lambda: self._find_file(file_id)
+        )
+        # Callers may mutate the model, so each gets its own copy
+        return file.model_copy() if file else None
+    
+    async def _find_file(self, file_id: str) -> Optional[File]:
+        """Fetch file document"""
         doc = await self.collection.find_one({'file_id': file_id, 'is_deleted': False})
         if doc:
             doc.pop('_id', None)
             return File.from_dict(doc)
         return None
     
-    async def get_user_files(self, user_id: int, skip: int = 0, limit: int = 50) -> List[File]:
-        """Get all files for a user"""
-        cursor = self.collection.find(
-            {'user_id': user_id, 'is_deleted': False}
-        ).sort('created_at', -1).skip(skip).limit(limit)
+    async def get_user_files(self, user_id: int, cursor: Optional[str] = None,
+                             limit: int = 50) -> Tuple[List[File], Optional[str], Optional[str]]:
+        """Get a page of a user's files, newest first, with the next and previous page cursors"""
+        docs, next_cursor, prev_cursor = await fetch_page(
+            self.collection,
+            {'user_id': user_id, 'is_deleted': False},
+            [('created_at', -1), ('_id', -1)],
+            limit,
+            cursor
+        )
         
         files = []
-        async for doc in cursor:
+        for doc in docs:
+            doc.pop('_id', None)
+            files.append(File.from_dict(doc))
+        return files, next_cursor, prev_cursor
+    
+    async def get_files(self, file_ids: List[str]) -> List[File]:
+        """Get several files by ID"""
+        files = []
+        async for doc in self.collection.find({'file_id': {'$in': file_ids}, 'is_deleted': False}):
             doc.pop('_id', None)
             files.append(File.from_dict(doc))
         return files
     
-    async def search_files(self, user_id: int, query: str) -> List[File]:
-        """Search files by name"""
-        cursor = self.collection.find({
-            'user_id': user_id,
-            'is_deleted': False,
-            'file_name': {'$regex': query, '$options': 'i'}
-        }).sort('created_at', -1).limit(20)
+    async def search_files(self, user_id: int, query: str, scan_limit: int = 2000) -> List[File]:
+        """Search the user's newest files for a literal name fragment"""
+        pattern = literal_pattern(query)
+        pipeline = [
+            {'$match': {'user_id': user_id, 'is_deleted': False}},
+            {'$sort': {'created_at': -1}},
+            {'$limit': scan_limit},
+            {'$match': {'file_name': {'$regex': pattern, '$options': 'i'}}},
+            {'$limit': 20}
+        ]
         
         files = []
-        async for doc in cursor:
+        async for doc in self.collection.aggregate(pipeline):
             doc.pop('_id', None)
             files.append(File.from_dict(doc))
         return files
@@ -64,10 +121,44 @@ class FileQueries:
             print(f"Error updating file: {e}")
             return False
     
+    async def replace_telegram_file_id(self, file_unique_id: str, telegram_file_id: str) -> List[str]:
+        """Set a fresh file_id on every file with this content and its stored media; returns the file IDs"""
+        try:
+            query = {'file_unique_id': file_unique_id, 'is_deleted': False}
+            file_ids = await self.collection.distinct('file_id', query)
+            await self.collection.update_many(
+                query,
+                {'$set': {'telegram_file_id': telegram_file_id, 'updated_at': datetime.utcnow()}}
+            )
+            await self.media_collection.update_one(
+                {'file_unique_id': file_unique_id},
+                {'$set': {'telegram_file_id': telegram_file_id}}
+            )
+            return file_ids
+        except Exception as e:
+            print(f"Error replacing file_id: {e}")
+            return []
+    
     async def delete_file(self, file_id: str) -> bool:
         """Soft delete file"""
         return await self.update_file(file_id, {'is_deleted': True})
     
+    async def delete_user_file(self, file_id: str, user_id: int, session=None) -> Optional[File]:
+        """Soft delete a user's file, returning it as it was (None if not found)"""
+        try:
+            doc = await self.collection.find_one_and_update(
+                {'file_id': file_id, 'user_id': user_id, 'is_deleted': False},
+                {'$set': {'is_deleted': True, 'updated_at': datetime.utcnow()}},
+                session=session
+            )
+            if doc:
+                doc.pop('_id', None)
+                return File.from_dict(doc)
+            return None
+        except Exception as e:
+            print(f"Error deleting file: {e}")
+            return None
+    
     async def increment_download_count(self, file_id: str) -> bool:
         """Increment file download count"""
         try:
@@ -80,6 +171,21 @@ class FileQueries:
             print(f"Error incrementing download count: {e}")
             return False
     
+    async def count_in_range(self, query: Dict, index: List[tuple], limit: int) -> int:
+        """Count matches through one index, stopping at limit"""
+        return await self.collection.count_documents(query, hint=index, limit=limit)
+    
+    async def find_with_index(self, query: Dict, index: List[tuple],
+                              sort: List[tuple], limit: int = 20) -> List[File]:
+        """Run a filter through a chosen index"""
+        cursor = self.collection.find(query, hint=index).sort(sort).limit(limit)
+        
+        files = []
+        async for doc in cursor:
+            doc.pop('_id', None)
+            files.append(File.from_dict(doc))
+        return files
+    
     async def get_user_file_count(self, user_id: int) -> int:
         """Get total file count for user"""
         return await self.collection.count_documents({
@@ -94,4 +200,84 @@ class FileQueries:
             {'$group': {'_id': None, 'total': {'$sum': '$file_size'}}}
         ]
         result = await self.collection.aggregate(pipeline).to_list(1)
-        return result[0]['total'] if result else 0
\ No newline at end of file
+        return result[0]['total'] if result else 0
+    
+    async def acquire_stored_media(self, file_unique_id: str) -> Optional[StoredMedia]:
+        """Take a reference on already stored content, if any"""
+        doc = await self.media_collection.find_one_and_update(
+            {'file_unique_id': file_unique_id},
+            {'$inc': {'ref_count': 1}},
+            return_document=ReturnDocument.AFTER
+        )
+        if doc:
+            doc.pop('_id', None)
+            return StoredMedia.from_dict(doc)
+        return None
+    
+    async def register_stored_media(self, media: StoredMedia) -> Optional[StoredMedia]:
+        """Record newly stored content with one reference.
+        
+        If a concurrent upload registered the same content first, a reference
+        on that record is returned instead.
+        """
+        try:
+            media.ref_count = 1
+            await self.media_collection.insert_one(media.to_dict())
+            return media
+        except DuplicateKeyError:
+            return await self.acquire_stored_media(media.file_unique_id)
+        except Exception as e:
+            print(f"Error registering stored media: {e}")
+            return None
+    
+    async def set_mirror_ids(self,
+                             source_channel_id: int,
+                             mirror_channel_id: int,
+                             mapping: Dict[int, int]) -> bool:
+        """Record mirror message ids (storage message id -> mirror message id)"""
+        channel_filter = source_channel_id
+        if source_channel_id == config.STORAGE_CHANNEL_ID:
+            # Records from before sharding leave the channel unset
+            channel_filter = {'$in': [source_channel_id, None]}
+        
+        field = f"mirrors.{mirror_channel_id}"
+        try:
+            for collection in (self.collection, self.media_collection):
+                await collection.bulk_write([
+                    UpdateMany(
+                        {'storage_channel_id': channel_filter, 'telegram_message_id': message_id},
+                        {'$set': {field: mirror_message_id}}
+                    )
+                    for message_id, mirror_message_id in mapping.items()
+                ], ordered=False)
+            return True
+        except Exception as e:
+            print(f"Error recording mirror ids: {e}")
+            return False
+    
+    async def purge_stored_media(self, file_unique_id: str) -> Optional[StoredMedia]:
+        """Remove a stored media record nobody references; returns it (None if referenced again)"""
+        try:
+            doc = await self.media_collection.find_one_and_delete(
+                {'file_unique_id': file_unique_id, 'ref_count': {'$lte': 0}}
+            )
+            if doc:
+                doc.pop('_id', None)
+                return StoredMedia.from_dict(doc)
+            return None
+        except Exception as e:
+            print(f"Error purging stored media: {e}")
+            return None
+    
+    async def release_stored_media(self, file_unique_id: str) -> int:
+        """Drop a reference; returns the remaining count (0 = message unused)"""
+        try:
+            doc = await self.media_collection.find_one_and_update(
+                {'file_unique_id': file_unique_id, 'ref_count': {'$gt': 0}},
+                {'$inc': {'ref_count': -1}},
+                return_document=ReturnDocument.AFTER
+            )
+            return doc['ref_count'] if doc else 0
+        except Exception as e:
+            print(f"Error releasing stored media: {e}")
+            return 0
\ No newline at end of file
@@ -1,6 +1,11 @@
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Tuple
+from pymongo import ReturnDocument
+from database.models.file import File
 from database.models.link import Link
+from database.group_commit import group_commit
+from database.pagination import fetch_page
+from database.single_flight import single_flight
 
 class LinkQueries:
     """Link database queries"""
@@ -11,32 +16,101 @@ class LinkQueries:
     async def create_link(self, link: Link) -> bool:
         """Create new download link"""
         try:
-            await self.collection.insert_one(link.to_dict())
-            return True
+            return await group_commit.insert(self.collection, link.to_dict())
         except Exception as e:
             print(f"Error creating link: {e}")
             return False
     
+    async def create_links(self, links: List[Link], session=None) -> bool:
+        """Create several download links in one round trip"""
+        try:
+            await self.collection.insert_many(
+                [link.to_dict() for link in links],
+                session=session
+            )
+            return True
+        except Exception as e:
+            if session:
+                # Let the transaction retry or abort
+                raise
+            print(f"Error creating links: {e}")
+            return False
+    
+    async def remove_links(self, link_ids: List[str]) -> int:
+        """Hard delete links (compensation for a failed upload)"""
+        try:
+            result = await self.collection.delete_many({'link_id': {'$in': link_ids}})
+            return result.deleted_count
+        except Exception as e:
+            print(f"Error removing links: {e}")
+            return 0
+    
     async def get_link(self, link_id: str) -> Optional[Link]:
         """Get link by ID"""
+        link = await single_flight.do(
+            f"links:{link_id}",
+            lambda: self._find_link(link_id)
+        )
+        # Callers may mutate the model, so each gets its own copy
+        return link.model_copy() if link else None
+    
+    async def _find_link(self, link_id: str) -> Optional[Link]:
+        """Fetch link document"""
         doc = await self.collection.find_one({'link_id': link_id})
         if doc:
             doc.pop('_id', None)
             return Link.from_dict(doc)
         return None
     
-    async def get_user_links(self, user_id: int, active_only: bool = False) -> List[Link]:
-        """Get all links for a user"""
+    async def get_user_links(self, user_id: int, active_only: bool = False, cursor: Optional[str] = None,
+                             limit: int = 50) -> Tuple[List[Link], Optional[str], Optional[str]]:
+        """Get a page of a user's links, newest first, with the next and previous page cursors"""
         query = {'user_id': user_id}
         if active_only:
             query['status'] = 'active'
         
-        cursor = self.collection.find(query).sort('created_at', -1).limit(50)
+        docs, next_cursor, prev_cursor = await fetch_page(
+            self.collection, query, [('created_at', -1), ('_id', -1)], limit, cursor
+        )
         links = []
-        async for doc in cursor:
+        for doc in docs:
             doc.pop('_id', None)
             links.append(Link.from_dict(doc))
-        return links
+        return links, next_cursor, prev_cursor
+    
+    async def get_user_links_with_files(self, user_id: int, active_only: bool = False,
+                                        cursor: Optional[str] = None, limit: int = 50
+                                        ) -> Tuple[List[Tuple[Link, File]], Optional[str], Optional[str]]:
+        """Like get_user_links, with each link's file joined in the same query.
+        
+        Links whose file is missing or deleted are left out of the pages.
+        """
+        query = {'user_id': user_id}
+        if active_only:
+            query['status'] = 'active'
+        
+        docs, next_cursor, prev_cursor = await fetch_page(
+            self.collection, query, [('created_at', -1), ('_id', -1)], limit, cursor,
+            stages=[
+                {'$lookup': {
+                    'from': 'files',
+                    'localField': 'file_id',
+                    'foreignField': 'file_id',
+                    'as': 'files'
+                }},
+                {'$match': {'files': {'$elemMatch': {'is_deleted': False}}}}
+            ]
+        )
+        pairs = []
+        for doc in docs:
+            doc.pop('_id', None)
+            file = None
+            for file_doc in doc.pop('files', []):
+                if not file_doc.get('is_deleted'):
+                    file_doc.pop('_id', None)
+                    file = File.from_dict(file_doc)
+            pairs.append((Link.from_dict(doc), file))
+        return pairs, next_cursor, prev_cursor
     
     async def get_file_links(self, file_id: str) -> List[Link]:
         """Get all links for a file"""
@@ -72,18 +146,75 @@ class LinkQueries:
             now = datetime.utcnow()
             await self.collection.update_one(
                 {'link_id': link_id},
-                {
-                    '$inc': {'access_count': 1},
-                    '$set': {'last_accessed_at': now},
-                    '$setOnInsert': {'first_accessed_at': now}
-                },
-                upsert=False
+                [{'$set': {
+                    'access_count': {'$add': ['$access_count', 1]},
+                    'last_accessed_at': now,
+                    'first_accessed_at': {'$ifNull': ['$first_accessed_at', now]}
+                }}]
             )
             return True
         except Exception as e:
             print(f"Error incrementing access: {e}")
             return False
     
+    async def redeem_link(self, link_id: str) -> Optional[Link]:
+        """Atomically validate and record one access in a single round trip.
+        
+        The filter only matches links that are still active, unexpired, under
+        their access cap and not self-destructed, so concurrent redemptions can
+        never push access_count past max_access. Returns the updated link, or
+        None if the link is missing or no longer accessible.
+        """
+        now = datetime.utcnow()
+        query = {
+            'link_id': link_id,
+            'status': 'active',
+            '$and': [
+                {'$or': [
+                    {'expires_at': None},
+                    {'expires_at': {'$gt': now}}
+                ]},
+                {'$or': [
+                    {'max_access': None},
+                    {'max_access': 0},
+                    {'$expr': {'$lt': ['$access_count', '$max_access']}}
+                ]},
+                {'$or': [
+                    {'self_destruct': False},
+                    {'first_accessed_at': None},
+                    {'self_destruct_after': None},
+                    {'$expr': {'$gte': [
+                        {'$add': [
+                            '$first_accessed_at',
+                            {'$multiply': ['$self_destruct_after', 1000]}
+                        ]},
+                        now
+                    ]}}
+                ]}
+            ]
+        }
+        update = [
+            {'$set': {
+                'access_count': {'$add': ['$access_count', 1]},
+                'last_accessed_at': now,
+                'first_accessed_at': {'$ifNull': ['$first_accessed_at', now]}
+            }}
+        ]
+        try:
+            doc = await self.collection.find_one_and_update(
+                query,
+                update,
+                return_document=ReturnDocument.AFTER
+            )
+        except Exception as e:
+            print(f"Error redeeming link: {e}")
+            return None
+        
+        if doc:
+            doc.pop('_id', None)
+            return Link.from_dict(doc)
+        return None
+    
     async def set_first_access(self, link_id: str) -> bool:
         """Set first access time if not already set"""
         try:
@@ -95,6 +226,44 @@ class LinkQueries:
         except Exception as e:
             return False
     
+    async def expire_if_active(self, link_id: str, updates: Optional[dict] = None) -> Optional[dict]:
+        """Mark link expired unless it already left the active state.
+        
+        Returns the link document as it was (None if it was not active).
+        Database errors are raised so timers can retry the transition.
+        """
+        return await self.collection.find_one_and_update(
+            {'link_id': link_id, 'status': 'active'},
+            {'$set': {'status': 'expired', **(updates or {})}},
+            projection={'_id': 0, 'link_id': 1, 'user_id': 1}
+        )
+    
+    async def get_due_links(self, until: datetime, limit: int = 1000) -> List[dict]:
+        """Active links whose expiry or self-destruct deadline is before until"""
+        cursor = self.collection.find(
+            {
+                'status': 'active',
+                '$or': [
+                    {'expires_at': {'$lte': until}},
+                    {
+                        'self_destruct': True,
+                        'first_accessed_at': {'$ne': None},
+                        'self_destruct_after': {'$ne': None},
+                        '$expr': {'$lte': [
+                            {'$add': [
+                                '$first_accessed_at',
+                                {'$multiply': ['$self_destruct_after', 1000]}
+                            ]},
+                            until
+                        ]}
+                    }
+                ]
+            },
+            {'_id': 0, 'link_id': 1, 'expires_at': 1, 'self_destruct': 1,
+             'self_destruct_after': 1, 'first_accessed_at': 1}
+        ).limit(limit)
+        return await cursor.to_list(limit)
+    
     async def cleanup_expired_links(self) -> int:
         """Mark expired links as expired"""
         try:
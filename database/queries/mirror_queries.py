@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+from typing import Dict, List
+from pymongo import UpdateOne
+from database.models.mirror_job import MirrorJob
+
+class MirrorQueries:
+    """Mirror replication queue queries"""
+    
+    def __init__(self, db):
+        self.collection = db.mirror_queue
+    
+    async def enqueue(self, jobs: List[MirrorJob]) -> bool:
+        """Queue replication jobs"""
+        try:
+            await self.collection.insert_many([job.to_dict() for job in jobs], ordered=False)
+            return True
+        except Exception as e:
+            print(f"Error queueing mirror jobs: {e}")
+            return False
+    
+    async def claim_due(self, owner: str, limit: int = 1000, lease_seconds: int = 300) -> List[MirrorJob]:
+        """Lease due jobs so only one instance replicates them"""
+        now = datetime.utcnow()
+        due = {
+            'status': 'pending',
+            'next_attempt_at': {'$lte': now},
+            '$or': [{'lease_until': None}, {'lease_until': {'$lte': now}}]
+        }
+        cursor = self.collection.find(due, {'_id': 1}).sort('enqueued_at', 1).limit(limit)
+        ids = [doc['_id'] async for doc in cursor]
+        if not ids:
+            return []
+        
+        lease_until = now + timedelta(seconds=lease_seconds)
+        await self.collection.update_many(
+            {'_id': {'$in': ids}, **due},
+            {'$set': {'lease_until': lease_until, 'lease_owner': owner}}
+        )
+        
+        jobs = []
+        async for doc in self.collection.find({'_id': {'$in': ids}, 'lease_owner': owner,
+                                               'lease_until': lease_until}):
+            doc.pop('_id', None)
+            jobs.append(MirrorJob.from_dict(doc))
+        return jobs
+    
+    async def complete(self, mirror_channel_id: int, source_channel_id: int, message_ids: List[int]) -> int:
+        """Remove finished jobs"""
+        result = await self.collection.delete_many({
+            'mirror_channel_id': mirror_channel_id,
+            'source_channel_id': source_channel_id,
+            'message_id': {'$in': message_ids}
+        })
+        return result.deleted_count
+    
+    async def reschedule(self, jobs: List[MirrorJob]) -> bool:
+        """Store updated attempt counts, errors and retry times"""
+        try:
+            await self.collection.bulk_write([
+                UpdateOne(
+                    {
+                        'mirror_channel_id': job.mirror_channel_id,
+                        'source_channel_id': job.source_channel_id,
+                        'message_id': job.message_id
+                    },
+                    {'$set': {
+                        'attempts': job.attempts,
+                        'status': job.status,
+                        'last_error': job.last_error,
+                        'next_attempt_at': job.next_attempt_at,
+                        'lease_until': None,
+                        'lease_owner': None
+                    }}
+                )
+                for job in jobs
+            ], ordered=False)
+            return True
+        except Exception as e:
+            print(f"Error rescheduling mirror jobs: {e}")
+            return False
+    
+    async def get_backlog(self) -> Dict[int, dict]:
+        """Pending and failed job counts and oldest pending job per mirror"""
+        pipeline = [
+            {'$group': {
+                '_id': {'mirror': '$mirror_channel_id', 'status': '$status'},
+                'count': {'$sum': 1},
+                'oldest': {'$min': '$enqueued_at'}
+            }}
+        ]
+        backlog: Dict[int, dict] = {}
+        async for doc in self.collection.aggregate(pipeline):
+            entry = backlog.setdefault(doc['_id']['mirror'], {'pending': 0, 'failed': 0, 'oldest_pending': None})
+            entry[doc['_id']['status']] = doc['count']
+            if doc['_id']['status'] == 'pending':
+                entry['oldest_pending'] = doc['oldest']
+        return backlog
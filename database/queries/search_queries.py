@@ -0,0 +1,83 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Set, Tuple
+from pymongo import UpdateOne
+
+class SearchQueries:
+    """Per-user trigram posting list queries"""
+    
+    def __init__(self, db):
+        self.postings = db.search_postings  # one document per (user, file, trigram)
+        self.terms = db.search_terms  # document frequency per (user, trigram)
+    
+    async def add_postings(self, user_id: int, entries: Iterable[Tuple[str, datetime, Set[str]]]) -> bool:
+        """Index files given as (file_id, created_at, trigrams)"""
+        operations, grams = [], []
+        for file_id, created_at, file_trigrams in entries:
+            for trigram in file_trigrams:
+                operations.append(UpdateOne(
+                    {'user_id': user_id, 'file_id': file_id, 'trigram': trigram},
+                    {'$setOnInsert': {'created_at': created_at}},
+                    upsert=True
+                ))
+                grams.append(trigram)
+        if not operations:
+            return True
+        
+        try:
+            result = await self.postings.bulk_write(operations, ordered=False)
+            # Only postings that are new count towards the frequencies
+            added: Dict[str, int] = {}
+            for index in result.upserted_ids:
+                added[grams[index]] = added.get(grams[index], 0) + 1
+            await self._increment_terms(user_id, added)
+            return True
+        except Exception as e:
+            print(f"Error adding search postings: {e}")
+            return False
+    
+    async def remove_postings(self, user_id: int, file_id: str) -> bool:
+        """Drop a file from its owner's index"""
+        try:
+            cursor = self.postings.find({'user_id': user_id, 'file_id': file_id}, {'trigram': 1, '_id': 0})
+            grams = [doc['trigram'] async for doc in cursor]
+            if not grams:
+                return True
+            await self.postings.delete_many({'user_id': user_id, 'file_id': file_id})
+            await self._increment_terms(user_id, {trigram: -1 for trigram in grams})
+            return True
+        except Exception as e:
+            print(f"Error removing search postings: {e}")
+            return False
+    
+    async def get_frequencies(self, user_id: int, trigrams: Iterable[str]) -> Dict[str, int]:
+        """Number of the user's files containing each trigram"""
+        grams = list(trigrams)
+        frequencies = {trigram: 0 for trigram in grams}
+        cursor = self.terms.find({'user_id': user_id, 'trigram': {'$in': grams}}, {'_id': 0})
+        async for doc in cursor:
+            frequencies[doc['trigram']] = doc['count']
+        return frequencies
+    
+    async def get_recent_postings(self, user_id: int, trigram: str, limit: int) -> List[Tuple[str, datetime]]:
+        """Newest files containing a trigram, as (file_id, created_at)"""
+        cursor = self.postings.find(
+            {'user_id': user_id, 'trigram': trigram},
+            {'file_id': 1, 'created_at': 1, '_id': 0}
+        ).sort('created_at', -1).limit(limit)
+        return [(doc['file_id'], doc['created_at']) async for doc in cursor]
+    
+    async def count_overlap(self, user_id: int, file_ids: List[str], trigrams: Iterable[str]) -> Dict[str, int]:
+        """How many of the trigrams each candidate file contains"""
+        pipeline = [
+            {'$match': {'user_id': user_id, 'file_id': {'$in': file_ids}, 'trigram': {'$in': list(trigrams)}}},
+            {'$group': {'_id': '$file_id', 'overlap': {'$sum': 1}}}
+        ]
+        return {doc['_id']: doc['overlap'] async for doc in self.postings.aggregate(pipeline)}
+    
+    async def _increment_terms(self, user_id: int, deltas: Dict[str, int]):
+        """Apply document frequency changes"""
+        if deltas:
+            await self.terms.bulk_write([
+                UpdateOne({'user_id': user_id, 'trigram': trigram}, {'$inc': {'count': delta}}, upsert=True)
+                for trigram, delta in deltas.items()
+            ], ordered=False)
\ No newline at end of file
@@ -1,6 +1,7 @@
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 from database.models.user import User
+from database.pagination import fetch_page
 
 class UserQueries:
     """User database queries"""
@@ -58,6 +59,19 @@ class UserQueries:
             print(f"Error incrementing stats: {e}")
             return False
     
+    async def increment_stats_many(self, user_id: int, deltas: Dict[str, int], session=None) -> bool:
+        """Increment several user statistics in one update"""
+        try:
+            await self.collection.update_one(
+                {'user_id': user_id},
+                {'$inc': deltas},
+                session=session
+            )
+            return True
+        except Exception as e:
+            print(f"Error incrementing stats: {e}")
+            return False
+    
     async def ban_user(self, user_id: int) -> bool:
         """Ban user"""
         return await self.update_user(user_id, {'is_banned': True, 'role': 'banned'})
@@ -66,14 +80,15 @@ class UserQueries:
         """Unban user"""
         return await self.update_user(user_id, {'is_banned': False, 'role': 'user'})
     
-    async def get_all_users(self, skip: int = 0, limit: int = 100) -> list:
-        """Get all users with pagination"""
-        cursor = self.collection.find({}).skip(skip).limit(limit)
+    async def get_all_users(self, cursor: Optional[str] = None,
+                            limit: int = 100) -> Tuple[List[User], Optional[str], Optional[str]]:
+        """Get a page of users by user ID with the next and previous page cursors"""
+        docs, next_cursor, prev_cursor = await fetch_page(self.collection, {}, [('user_id', 1)], limit, cursor)
         users = []
-        async for doc in cursor:
+        for doc in docs:
             doc.pop('_id', None)
             users.append(User.from_dict(doc))
-        return users
+        return users, next_cursor, prev_cursor
     
     async def get_user_count(self) -> int:
         """Get total user count"""
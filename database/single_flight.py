@@ -0,0 +1,66 @@
+"""Single-flight coalescing for concurrent identical lookups"""
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict
+
+class SingleFlight:
+    """Share one in-flight lookup between all concurrent callers of the same key"""
+    
+    def __init__(self, max_tracked_keys: int = 10000):
+        self.inflight: Dict[str, asyncio.Future] = {}
+        self.max_tracked_keys = max_tracked_keys
+        self.key_stats: "OrderedDict[str, Dict[str, int]]" = OrderedDict()
+        self.stats = {
+            'calls': 0,
+            'executions': 0,
+            'shared': 0,
+        }
+    
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn for key, or join the call already in flight for it"""
+        self.stats['calls'] += 1
+        task = self.inflight.get(key)
+        
+        if task is None:
+            self.stats['executions'] += 1
+            self._record(key, shared=False)
+            task = asyncio.ensure_future(fn())
+            self.inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.stats['shared'] += 1
+            self._record(key, shared=True)
+        
+        # Shield so one cancelled caller doesn't cancel the lookup for the rest
+        return await asyncio.shield(task)
+    
+    def _finish(self, key: str, task: asyncio.Future):
+        """Drop a finished lookup so later calls query fresh data"""
+        self.inflight.pop(key, None)
+        if not task.cancelled():
+            # Mark the exception retrieved even if every caller was cancelled
+            task.exception()
+    
+    def _record(self, key: str, shared: bool):
+        """Update per-key hit statistics"""
+        entry = self.key_stats.pop(key, None) or {'executions': 0, 'shared': 0}
+        entry['shared' if shared else 'executions'] += 1
+        self.key_stats[key] = entry
+        if len(self.key_stats) > self.max_tracked_keys:
+            self.key_stats.popitem(last=False)
+    
+    def get_stats(self, top: int = 10) -> dict:
+        """Get totals and the keys that absorbed the most reads"""
+        hottest = sorted(
+            self.key_stats.items(),
+            key=lambda item: item[1]['shared'],
+            reverse=True
+        )[:top]
+        return {
+            **self.stats,
+            'inflight': len(self.inflight),
+            'hottest_keys': dict(hottest),
+        }
+
+# Global single-flight group for database lookups
+single_flight = SingleFlight()
\ No newline at end of file
@@ -4,6 +4,7 @@ from database.connection import get_database
 from services.user_service import UserService
 from services.analytics_service import AnalyticsServiceFactory
 from core.middleware import admin_only
+from core.rate_scheduler import background
 from utils.constants import ADMIN_PANEL
 from utils.formatter import format_stats, format_file_size
 
@@ -23,7 +24,7 @@ def setup_handlers(app: Client):
         db = await get_database()
         user_service = UserService(db)
         
-        users = await user_service.get_all_users(limit=50)
+        users, _, _ = await user_service.get_all_users(limit=50)
         
         if not users:
             await message.reply_text("👥 No users found.")
@@ -121,25 +122,32 @@ def setup_handlers(app: Client):
         db = await get_database()
         user_service = UserService(db)
         
-        users = await user_service.get_all_users(limit=10000)
+        total_users = await user_service.user_queries.get_user_count()
         
         status_msg = await message.reply_text(
-            f"📤 Broadcasting to {len(users)} users..."
+            f"📤 Broadcasting to {total_users} users..."
         )
         
         success_count = 0
         fail_count = 0
         
-        for user in users:
-            try:
-                await client.send_message(
-                    chat_id=user.user_id,
-                    text=f"📢 Announcement:\n\n{broadcast_text}"
-                )
-                success_count += 1
-            except Exception as e:
-                fail_count += 1
-                print(f"Broadcast failed for {user.user_id}: {e}")
+        # Announcements yield to user-facing sends
+        with background():
+            cursor = None
+            while True:
+                users, cursor, _ = await user_service.get_all_users(cursor, limit=500)
+                for user in users:
+                    try:
+                        await client.send_message(
+                            chat_id=user.user_id,
+                            text=f"📢 Announcement:\n\n{broadcast_text}"
+                        )
+                        success_count += 1
+                    except Exception as e:
+                        fail_count += 1
+                        print(f"Broadcast failed for {user.user_id}: {e}")
+                if not cursor:
+                    break
         
         await status_msg.edit_text(
             f"✅ Broadcast complete!\n\n"
@@ -39,15 +39,24 @@ def setup_handlers(app: Client):
         # Send file
         try:
             channel_manager = ChannelManager(client)
-            await message.reply_text("📥 Preparing your file...")
             
-            await channel_manager.copy_file(
+            # Send by stored file_id, falling back to the storage channel and its mirrors
+            sent, fresh_file_id = await channel_manager.deliver_file(
+                telegram_file_id=file.telegram_file_id,
                 message_id=file.telegram_message_id,
                 to_chat_id=message.chat.id,
-                caption=f"📁 {file.file_name}\n💾 {format_file_size(file.file_size)}"
+                caption=f"📁 {file.file_name}\n💾 {format_file_size(file.file_size)}",
+                channel_id=file.storage_channel_id,
+                mirrors=file.mirrors,
+                file_unique_id=file.file_unique_id
             )
             
-            await message.reply_text("✅ File sent successfully!")
+            if not sent:
+                await message.reply_text("❌ Error downloading file.")
+                return
+            
+            if fresh_file_id:
+                await file_service.refresh_telegram_file_id(file.file_id, fresh_file_id, file.file_unique_id)
             
         except Exception as e:
             print(f"Download error: {e}")
@@ -0,0 +1,36 @@
+from typing import Optional
+from pyrogram import Client, filters
+from pyrogram.types import CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
+from database.connection import get_database
+from services.page_service import PageService
+from core.client import bot_client
+
+def keyboard(page: dict) -> Optional[InlineKeyboardMarkup]:
+    """Prev/Next buttons of a rendered page"""
+    if not page['buttons']:
+        return None
+    return InlineKeyboardMarkup([[
+        InlineKeyboardButton(label, callback_data=data) for label, data in page['buttons']
+    ]])
+
+def setup_handlers(app: Client):
+    """Setup list page callbacks"""
+    
+    @app.on_callback_query(filters.regex(r"^pg:(files|links|search):\d+:"))
+    async def page_callback_handler(client: Client, callback_query: CallbackQuery):
+        """Turn a /myfiles, /links or /search page"""
+        _, view, number, token = callback_query.data.split(':', 3)
+        user_id = callback_query.from_user.id
+        
+        db = await get_database()
+        page_service = PageService(db)
+        
+        page = await page_service.get_page(
+            user_id, view, max(1, int(number)), token, bot_username=bot_client.get_username()
+        )
+        if not page:
+            await callback_query.answer("⌛ This list has changed. Run the command again.", show_alert=True)
+            return
+        
+        await callback_query.answer()
+        await callback_query.message.edit_text(page['text'], reply_markup=keyboard(page))
@@ -1,8 +1,8 @@
 from pyrogram import Client, filters
 from pyrogram.types import Message
 from database.connection import get_database
-from services.file_service import FileService
-from utils.formatter import format_file_size, format_datetime
+from services.page_service import PageService
+from handlers.pages import keyboard
 
 def setup_handlers(app: Client):
     """Setup search handlers"""
@@ -12,8 +12,14 @@ def setup_handlers(app: Client):
         """Handle /search command"""
         if len(message.command) < 2:
             await message.reply_text(
-                "ℹ️ Usage: /search <query>\n\n"
-                "Example: /search report.pdf"
+                "ℹ️ Usage: /search <query> [filters]\n\n"
+                "Filters:\n"
+                "• type:video (document, video, audio, photo)\n"
+                "• size>100MB, size<1GB\n"
+                "• after:2026-01-01, before:2026-02-01\n"
+                "• tag:invoice\n"
+                "• sort:newest, oldest, downloads, largest, smallest\n\n"
+                "Example: /search report type:document size>1MB sort:downloads"
             )
             return
         
@@ -21,26 +27,19 @@ def setup_handlers(app: Client):
         user_id = message.from_user.id
         
         db = await get_database()
-        file_service = FileService(db)
+        page_service = PageService(db)
         
         # Search files
-        files = await file_service.search_files(user_id, query)
+        try:
+            page = await page_service.start_search(user_id, query)
+        except ValueError as e:
+            await message.reply_text(f"⚠️ {e}")
+            return
         
-        if not files:
+        if not page:
             await message.reply_text(
                 f"🔍 No files found matching: {query}"
             )
             return
         
-        # Build response
-        response = f"🔍 Search Results for: {query}\n\n"
-        
-        for idx, file in enumerate(files[:15], 1):  # Limit to 15
-            response += f"{idx}. {file.file_name}\n"
-            response += f"   💾 {format_file_size(file.file_size)}\n"
-            response += f"   📅 {format_datetime(file.created_at)}\n"
-            response += f"   🆔 `{file.file_id}`\n\n"
-        
-        response += "\nℹ️ Use /download <file_id> to download a file"
-        
-        await message.reply_text(response)
\ No newline at end of file
+        await message.reply_text(page['text'], reply_markup=keyboard(page))
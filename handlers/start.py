@@ -1,6 +1,6 @@
 from pyrogram import Client, filters
 from pyrogram.types import Message
-from utils.constants import WELCOME_MESSAGE, HELP_MESSAGE
+from utils.constants import WELCOME_MESSAGE, HELP_MESSAGE, LINK_ACCESS_MESSAGES
 from database.connection import get_database
 from services.user_service import UserService
 from services.link_service import LinkService
@@ -46,22 +46,10 @@ async def handle_download_link(client: Client, message: Message, link_id: str):
     link_service = LinkService(db)
     file_service = FileService(db)
     
-    # Get link
-    link = await link_service.get_link(link_id)
-    if not link:
-        await message.reply_text("❌ Invalid download link.")
-        return
-    
-    # Validate and access link
-    success, error = await link_service.access_link(link_id, message.from_user.id)
-    if not success:
-        await message.reply_text(error)
-        return
-    
-    # Get file
-    file = await file_service.get_file(link.file_id)
-    if not file:
-        await message.reply_text("❌ File not found.")
+    # Validate link and resolve the cached download descriptor
+    descriptor, reason = await link_service.resolve_download(link_id, message.from_user.id)
+    if not descriptor:
+        await message.reply_text(LINK_ACCESS_MESSAGES[reason])
         return
     
     # Send file
@@ -69,19 +57,28 @@ async def handle_download_link(client: Client, message: Message, link_id: str):
         from storage.channel_manager import ChannelManager
         channel_manager = ChannelManager(client)
         
-        await message.reply_text("📥 Preparing your file...")
-        
-        # Forward file from channel
-        await channel_manager.copy_file(
-            message_id=file.telegram_message_id,
+        # Send by stored file_id, falling back to the storage channel and its mirrors
+        sent, fresh_file_id = await channel_manager.deliver_file(
+            telegram_file_id=descriptor['telegram_file_id'],
+            message_id=descriptor['telegram_message_id'],
             to_chat_id=message.chat.id,
-            caption=f"📁 {file.file_name}\n\n💾 Size: {format_file_size(file.file_size)}"
+            caption=descriptor['caption'],
+            channel_id=descriptor.get('storage_channel_id'),
+            mirrors=descriptor.get('mirrors'),
+            file_unique_id=descriptor.get('file_unique_id')
         )
         
-        # Increment download count
-        await file_service.increment_download(file.file_id)
+        if not sent:
+            await message.reply_text("❌ Error sending file. Please try again later.")
+            return
         
-        await message.reply_text("✅ File sent successfully!")
+        if fresh_file_id:
+            await file_service.refresh_telegram_file_id(
+                descriptor['file_id'], fresh_file_id, descriptor.get('file_unique_id')
+            )
+        
+        # Increment download count
+        await file_service.increment_download(descriptor['file_id'])
         
     except Exception as e:
         print(f"Error sending file: {e}")
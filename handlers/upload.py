@@ -1,132 +1,372 @@
+from typing import Awaitable, Callable, List, Optional
 from pyrogram import Client, filters
 from pyrogram.types import Message
 from database.connection import get_database
 from services.file_service import FileService
-from services.link_service import LinkService
 from storage.channel_manager import ChannelManager
+from storage.mirror_manager import mirror_manager
+from storage.storage_channels import storage_channels
 from utils.formatter import format_file_size, format_link
 from utils.constants import ALLOWED_FILE_TYPES
 from config import config
-from core.bot_client import bot_client
+from core.client import bot_client
+from core.media_groups import media_group_collector
+from core.upload_queue import upload_queue
+import asyncio
 import os
 import tempfile
 
-def setup_handlers(app: Client):
-    """Setup upload handlers"""
+def get_media_info(message: Message) -> Optional[dict]:
+    """Extract the uploaded media and its metadata from a message"""
+    if message.document:
+        file = message.document
+        file_type = 'document'
+        file_name = file.file_name
+        mime_type = file.mime_type
+    elif message.video:
+        file = message.video
+        file_type = 'video'
+        file_name = f"video_{file.file_unique_id}.mp4"
+        mime_type = file.mime_type
+    elif message.audio:
+        file = message.audio
+        file_type = 'audio'
+        file_name = file.file_name or f"audio_{file.file_unique_id}.mp3"
+        mime_type = file.mime_type
+    elif message.photo:
+        file = message.photo
+        file_type = 'photo'
+        file_name = f"photo_{message.id}.jpg"
+        mime_type = 'image/jpeg'
+    else:
+        return None
     
-    @app.on_message(filters.document | filters.video | filters.audio | filters.photo)
-    async def file_upload_handler(client: Client, message: Message):
-        """Handle file uploads"""
-        user_id = message.from_user.id
-        
-        # Get file info
-        if message.document:
-            file = message.document
-            file_type = 'document'
-            file_name = file.file_name
-            file_size = file.file_size
-            mime_type = file.mime_type
-        elif message.video:
-            file = message.video
-            file_type = 'video'
-            file_name = f"video_{file.file_unique_id}.mp4"
-            file_size = file.file_size
-            mime_type = file.mime_type
-        elif message.audio:
-            file = message.audio
-            file_type = 'audio'
-            file_name = file.file_name or f"audio_{file.file_unique_id}.mp3"
-            file_size = file.file_size
-            mime_type = file.mime_type
-        elif message.photo:
-            file = message.photo
-            file_type = 'photo'
-            file_name = f"photo_{message.id}.jpg"
-            file_size = file.file_size
-            mime_type = 'image/jpeg'
+    return {
+        'file': file,
+        'file_type': file_type,
+        'file_name': file_name,
+        'file_size': file.file_size,
+        'mime_type': mime_type
+    }
+
+async def enqueue_upload(message: Message, run: Callable[[Optional[Message]], Awaitable[None]]):
+    """Queue an upload job, telling the user when it has to wait"""
+    notice = {}
+    # The job waits until the queued notice exists, so it edits that notice
+    # instead of racing it with a second status message
+    notice_sent = asyncio.Event()
+    if not upload_queue.running:
+        notice_sent.set()
+    
+    async def job():
+        await notice_sent.wait()
+        await run(notice.get('message'))
+    
+    async def on_drop():
+        text = "⚠️ The bot is restarting and your upload was not processed. Please send it again."
+        if notice.get('message'):
+            await notice['message'].edit_text(text)
         else:
-            return
+            await message.reply_text(text)
+    
+    try:
+        position = await upload_queue.submit(message.from_user.id, job, on_drop)
+        if position is None:
+            await message.reply_text(
+                "⚠️ Upload queue is full. Please try again in a few minutes."
+            )
+        elif position > 0:
+            notice['message'] = await message.reply_text(f"⏳ Queued, position {position}")
+    finally:
+        notice_sent.set()
+
+async def enqueue_album(client: Client, messages: List[Message]):
+    """Queue a collected album as one upload job"""
+    await enqueue_upload(
+        messages[0],
+        lambda status_msg: album_upload_handler(client, messages, status_msg)
+    )
+
+async def album_upload_handler(client: Client, messages: List[Message],
+                               status_msg: Optional[Message] = None):
+    """Store an album with one forward, bulk inserts and one summary reply"""
+    first = messages[0]
+    user_id = first.from_user.id
+    max_size_bytes = config.MAX_FILE_SIZE * 1024 * 1024
+    
+    items = []
+    skipped = []
+    for message in messages:
+        info = get_media_info(message)
+        if not info:
+            continue
+        if info['file_size'] > max_size_bytes:
+            skipped.append(info['file_name'])
+            continue
+        items.append((message, info))
+    
+    if not items:
+        text = f"❌ Files are too large! Maximum size: {config.MAX_FILE_SIZE}MB"
+        if status_msg:
+            await status_msg.edit_text(text)
+        else:
+            await first.reply_text(text)
+        return
+    
+    total_size = sum(info['file_size'] for _, info in items)
+    text = (
+        f"📤 Uploading {len(items)} files...\n"
+        f"💾 Size: {format_file_size(total_size)}"
+    )
+    if status_msg:
+        await status_msg.edit_text(text)
+    else:
+        status_msg = await first.reply_text(text)
+    
+    acquired = []
+    try:
+        db = await get_database()
+        file_service = FileService(db)
+        channel_manager = ChannelManager(client)
         
-        # Check file size
-        max_size_mb = config.MAX_FILE_SIZE
-        max_size_bytes = max_size_mb * 1024 * 1024
+        # Reuse stored copies of content uploaded before
+        stored = list(await asyncio.gather(*(
+            file_service.acquire_stored_media(info['file'].file_unique_id)
+            for _, info in items
+        )))
+        acquired = [media.file_unique_id for media in stored if media]
         
-        if file_size > max_size_bytes:
-            await message.reply_text(
-                f"❌ File is too large! Maximum size: {max_size_mb}MB\n"
-                f"Your file: {format_file_size(file_size)}"
+        # Forward everything else with one call per storage channel
+        missing = [i for i, media in enumerate(stored) if not media]
+        placement = {}
+        for i in missing:
+            channel_id = storage_channels.place(user_id, items[i][1]['file'].file_unique_id)
+            placement.setdefault(channel_id, []).append(i)
+        
+        forwarded = {}
+        for channel_id, indices in placement.items():
+            copies = await channel_manager.store_messages(
+                first.chat.id, [items[i][0].id for i in indices], channel_id
             )
+            if len(copies) != len(indices):
+                # Nothing references the copies made so far; remove them
+                for stored_channel_id, copy in [*forwarded.values(), *((channel_id, c) for c in copies)]:
+                    await channel_manager.delete_file(copy.id, stored_channel_id)
+                await status_msg.edit_text("❌ Failed to upload files.")
+                return
+            for i, copy in zip(indices, copies):
+                forwarded[i] = (channel_id, copy)
+        
+        registered = await asyncio.gather(*(
+            file_service.register_stored_media(
+                file_unique_id=items[i][1]['file'].file_unique_id,
+                telegram_message_id=copy.id,
+                telegram_file_id=items[i][1]['file'].file_id,
+                storage_channel_id=channel_id
+            )
+            for i, (channel_id, copy) in forwarded.items()
+        ))
+        replicate = {}
+        for (i, (channel_id, copy)), media in zip(forwarded.items(), registered):
+            if not media:
+                continue
+            stored[i] = media
+            acquired.append(media.file_unique_id)
+            # Lost a race with a concurrent upload of the same content
+            if (media.storage_channel_id, media.telegram_message_id) != (channel_id, copy.id):
+                await channel_manager.delete_file(copy.id, channel_id)
+            else:
+                replicate.setdefault(channel_id, []).append(copy.id)
+        
+        # Copy new storage messages to the mirror channels in the background
+        for channel_id, message_ids in replicate.items():
+            await mirror_manager.enqueue(channel_id, message_ids)
+        
+        if not all(stored):
+            await status_msg.edit_text("❌ Failed to create file records.")
             return
         
-        # Send processing message
-        status_msg = await message.reply_text(
-            f"📤 Uploading {file_name}...\n"
-            f"💾 Size: {format_file_size(file_size)}"
-        )
+        # Create file records and links as one operation
+        uploads = await file_service.create_uploads(user_id, [
+            {
+                'telegram_file_id': media.telegram_file_id,
+                'telegram_message_id': media.telegram_message_id,
+                'storage_channel_id': media.storage_channel_id,
+                'mirrors': media.mirrors,
+                'file_unique_id': media.file_unique_id,
+                'file_name': info['file_name'],
+                'file_size': info['file_size'],
+                'file_type': info['file_type'],
+                'mime_type': info['mime_type']
+            }
+            for (_, info), media in zip(items, stored)
+        ], expiry_days=config.LINK_EXPIRY_DAYS)
+        if not uploads:
+            await status_msg.edit_text("❌ Failed to create file records.")
+            return
+        acquired = []
         
-        try:
-            db = await get_database()
-            file_service = FileService(db)
-            link_service = LinkService(db)
-            channel_manager = ChannelManager(client)
-            
-            # Forward to storage channel
-            forwarded = await client.forward_messages(
-                chat_id=config.STORAGE_CHANNEL_ID,
-                from_chat_id=message.chat.id,
-                message_ids=message.id
+        # Send one summary message
+        bot_username = bot_client.get_username()
+        lines = [f"✅ {len(uploads)} files uploaded successfully!\n"]
+        for record, link in uploads:
+            lines.append(
+                f"📁 {record.file_name} ({format_file_size(record.file_size)})\n"
+                f"🔗 {format_link(link.link_id, bot_username)}\n"
             )
+        if skipped:
+            lines.append(f"⚠️ Skipped (over {config.MAX_FILE_SIZE}MB): {', '.join(skipped)}\n")
+        lines.append(f"⏰ Expires in {config.LINK_EXPIRY_DAYS} days")
+        
+        await status_msg.edit_text("\n".join(lines))
+        
+    except Exception as e:
+        print(f"Album upload error: {e}")
+        await status_msg.edit_text(
+            f"❌ Error uploading files: {str(e)}"
+        )
+    finally:
+        # Drop references taken for records that were never created
+        for file_unique_id in acquired:
+            await file_service.release_stored_media(file_unique_id)
+
+async def process_upload(client: Client, message: Message, info: dict,
+                         status_msg: Optional[Message] = None):
+    """Store a single uploaded file and create its download link"""
+    user_id = message.from_user.id
+    file = info['file']
+    file_type = info['file_type']
+    file_name = info['file_name']
+    file_size = info['file_size']
+    mime_type = info['mime_type']
+    
+    # Send processing message
+    text = (
+        f"📤 Uploading {file_name}...\n"
+        f"💾 Size: {format_file_size(file_size)}"
+    )
+    if status_msg:
+        await status_msg.edit_text(text)
+    else:
+        status_msg = await message.reply_text(text)
+    
+    referenced = False
+    try:
+        db = await get_database()
+        file_service = FileService(db)
+        channel_manager = ChannelManager(client)
+        
+        # Reuse the stored copy if this content was uploaded before
+        stored = await file_service.acquire_stored_media(file.file_unique_id)
+        referenced = stored is not None
+        
+        if not stored:
+            # Forward to this upload's storage channel
+            channel_id = storage_channels.place(user_id, file.file_unique_id)
+            copies = await channel_manager.store_messages(message.chat.id, [message.id], channel_id)
             
-            if not forwarded:
+            if not copies:
                 await status_msg.edit_text("❌ Failed to upload file.")
                 return
+            forwarded = copies[0]
             
-            # Create file record
-            file_record = await file_service.create_file_record(
-                user_id=user_id,
-                telegram_file_id=file.file_id,
+            stored = await file_service.register_stored_media(
+                file_unique_id=file.file_unique_id,
                 telegram_message_id=forwarded.id,
-                file_name=file_name,
-                file_size=file_size,
-                file_type=file_type,
-                mime_type=mime_type,
-                is_encrypted=False
+                telegram_file_id=file.file_id,
+                storage_channel_id=channel_id
             )
             
-            if not file_record:
+            if not stored:
+                await channel_manager.delete_file(forwarded.id, channel_id)
                 await status_msg.edit_text("❌ Failed to create file record.")
                 return
+            referenced = True
             
-            # Create download link
-            link = await link_service.create_link(
-                file_id=file_record.file_id,
-                user_id=user_id,
-                expiry_days=config.LINK_EXPIRY_DAYS
-            )
-            
-            if not link:
-                await status_msg.edit_text("❌ Failed to create download link.")
-                return
-            
-            # Format download link
-            bot_username = bot_client.get_username()
-            download_link = format_link(link.link_id, bot_username)
-            
-            # Send success message
-            await status_msg.edit_text(
-                f"✅ File uploaded successfully!\n\n"
-                f"📁 Name: {file_name}\n"
-                f"💾 Size: {format_file_size(file_size)}\n"
-                f"🆔 File ID: `{file_record.file_id}`\n\n"
-                f"🔗 Download Link:\n{download_link}\n\n"
-                f"⏰ Expires in {config.LINK_EXPIRY_DAYS} days"
-            )
-            
-        except Exception as e:
-            print(f"Upload error: {e}")
-            await status_msg.edit_text(
-                f"❌ Error uploading file: {str(e)}"
+            # Lost a race with a concurrent upload of the same content
+            if (stored.storage_channel_id, stored.telegram_message_id) != (channel_id, forwarded.id):
+                await channel_manager.delete_file(forwarded.id, channel_id)
+            else:
+                # Copy to the mirror channels in the background
+                await mirror_manager.enqueue(channel_id, [forwarded.id])
+        
+        # Create file record and download link
+        file_record, link = await file_service.create_upload(
+            user_id=user_id,
+            telegram_file_id=stored.telegram_file_id,
+            telegram_message_id=stored.telegram_message_id,
+            storage_channel_id=stored.storage_channel_id,
+            mirrors=stored.mirrors,
+            file_name=file_name,
+            file_size=file_size,
+            file_type=file_type,
+            mime_type=mime_type,
+            is_encrypted=False,
+            file_unique_id=file.file_unique_id,
+            expiry_days=config.LINK_EXPIRY_DAYS
+        )
+        
+        if not file_record:
+            await status_msg.edit_text("❌ Failed to create file record.")
+            return
+        referenced = False
+        
+        # Format download link
+        bot_username = bot_client.get_username()
+        download_link = format_link(link.link_id, bot_username)
+        
+        # Send success message
+        await status_msg.edit_text(
+            f"✅ File uploaded successfully!\n\n"
+            f"📁 Name: {file_name}\n"
+            f"💾 Size: {format_file_size(file_size)}\n"
+            f"🆔 File ID: `{file_record.file_id}`\n\n"
+            f"🔗 Download Link:\n{download_link}\n\n"
+            f"⏰ Expires in {config.LINK_EXPIRY_DAYS} days"
+        )
+        
+    except Exception as e:
+        print(f"Upload error: {e}")
+        await status_msg.edit_text(
+            f"❌ Error uploading file: {str(e)}"
+        )
+    finally:
+        # Drop the reference taken for a record that was never created
+        if referenced:
+            await file_service.release_stored_media(file.file_unique_id)
+
+def setup_handlers(app: Client):
+    """Setup upload handlers"""
+    
+    @app.on_message(filters.document | filters.video | filters.audio | filters.photo)
+    async def file_upload_handler(client: Client, message: Message):
+        """Handle file uploads"""
+        # Album items are collected and stored together
+        if message.media_group_id:
+            media_group_collector.add(client, message, enqueue_album)
+            return
+        
+        # Get file info
+        info = get_media_info(message)
+        if not info:
+            return
+        
+        # Check file size
+        max_size_mb = config.MAX_FILE_SIZE
+        max_size_bytes = max_size_mb * 1024 * 1024
+        
+        if info['file_size'] > max_size_bytes:
+            await message.reply_text(
+                f"❌ File is too large! Maximum size: {max_size_mb}MB\n"
+                f"Your file: {format_file_size(info['file_size'])}"
             )
+            return
+        
+        # Forwards and writes run on the upload queue
+        await enqueue_upload(
+            message,
+            lambda status_msg: process_upload(client, message, info, status_msg)
+        )
     
     @app.on_message(filters.command(["upload"]) & filters.private)
     async def upload_command_handler(client: Client, message: Message):
@@ -2,8 +2,9 @@ from pyrogram import Client, filters
 from pyrogram.types import Message
 from database.connection import get_database
 from services.user_service import UserService
-from services.file_service import FileService
 from services.analytics_service import AnalyticsServiceFactory
+from services.page_service import PageService
+from handlers.pages import keyboard
 from utils.formatter import format_file_size, format_datetime
 
 def setup_handlers(app: Client):
@@ -15,32 +16,18 @@ def setup_handlers(app: Client):
         user_id = message.from_user.id
         
         db = await get_database()
-        file_service = FileService(db)
         
-        # Get user files
-        files = await file_service.get_user_files(user_id, limit=20)
+        # First page of user files
+        page = await PageService(db).get_page(user_id, 'files', 1, '')
         
-        if not files:
+        if not page:
             await message.reply_text(
                 "📁 You don't have any files yet.\n\n"
                 "Send me a file to get started!"
             )
             return
         
-        # Build response
-        response = "📁 Your Files:\n\n"
-        
-        for idx, file in enumerate(files, 1):
-            response += f"{idx}. {file.file_name}\n"
-            response += f"   💾 {format_file_size(file.file_size)}\n"
-            response += f"   📥 Downloads: {file.download_count}\n"
-            response += f"   📅 {format_datetime(file.created_at)}\n"
-            response += f"   🆔 `{file.file_id}`\n\n"
-        
-        response += "\nℹ️ Use /download <file_id> to download\n"
-        response += "ℹ️ Use /search <query> to search files"
-        
-        await message.reply_text(response)
+        await message.reply_text(page['text'], reply_markup=keyboard(page))
     
     @app.on_message(filters.command(["stats"]) & filters.private)
     async def stats_handler(client: Client, message: Message):
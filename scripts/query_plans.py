@@ -0,0 +1,596 @@
+#!/usr/bin/env python3
+"""Query plan auditor
+
+Seeds a scratch database, applies the migrations and startup indexes,
+then runs every query method in database/queries and AnalyticsService
+against it while recording the commands they send. Each command is
+explained and flagged when its winning plan scans the collection, sorts
+in memory, or filters on fields its index does not cover.
+
+Usage:
+    python query_plans.py          # report only
+    python query_plans.py emit     # also write the next migration
+    python query_plans.py verify   # emit, apply it and audit again
+"""
+import asyncio
+import copy
+import importlib
+import os
+import random
+import sys
+sys.path.insert(0, '/app/telegram-bot')
+
+from datetime import datetime, timedelta
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import MongoClient, monitoring
+from database.connection import DatabaseConnection
+from database.models.mirror_job import MirrorJob
+from database.models.stored_media import StoredMedia
+from database.queries.audit_queries import AuditQueries
+from database.queries.file_queries import FileQueries
+from database.queries.link_queries import LinkQueries
+from database.queries.mirror_queries import MirrorQueries
+from database.queries.search_queries import SearchQueries
+from database.queries.user_queries import UserQueries
+from services.analytics_service import AnalyticsService
+from config import config
+
+MIGRATIONS_DIR = '/app/telegram-bot/database/migrations'
+SCRATCH_DB = f"{config.DB_NAME}_plan_audit"
+
+# Commands that read or write through a query filter
+QUERY_COMMANDS = {'find', 'aggregate', 'count', 'update', 'delete', 'findAndModify'}
+
+# Soft-delete flags: equality on these becomes a partial index filter
+PARTIAL_FIELDS = {'is_deleted': False}
+
+RANGE_OPERATORS = {'$lt', '$lte', '$gt', '$gte'}
+EQUALITY_OPERATORS = {'$eq', '$in'}
+
+# Whole-collection statistics that are cached and expected to scan
+ACCEPTED_SCANS = {
+    'UserQueries.get_user_count',
+    'AnalyticsService.calculate_global_stats',
+    'MirrorQueries.get_backlog',
+}
+
+class CommandRecorder(monitoring.CommandListener):
+    """Record query commands sent to the scratch database"""
+    
+    def __init__(self):
+        self.label = None
+        self.commands = []
+    
+    def started(self, event):
+        if event.database_name == SCRATCH_DB and event.command_name in QUERY_COMMANDS:
+            self.commands.append((self.label, event.command_name, copy.deepcopy(dict(event.command))))
+    
+    def succeeded(self, event):
+        pass
+    
+    def failed(self, event):
+        pass
+
+async def seed(db, rng: random.Random) -> dict:
+    """Insert realistic documents and return sample values for the calls"""
+    now = datetime.utcnow()
+    users, files, links, media, access_logs, audit_logs, jobs = [], [], [], [], [], [], []
+    
+    for user_id in range(1, 1001):
+        users.append({
+            'user_id': user_id,
+            'role': 'user',
+            'is_banned': False,
+            'created_at': now - timedelta(days=rng.randint(0, 365)),
+            'last_active': now - timedelta(days=rng.randint(0, 90)),
+            'stats': {'total_files': 0, 'total_size': 0, 'total_downloads': 0},
+        })
+    
+    for i in range(10000):
+        user_id = rng.randint(1, 1000)
+        file_id = f"f{i:06d}"
+        files.append({
+            'file_id': file_id,
+            'user_id': user_id,
+            'file_unique_id': f"u{i:06d}",
+            'telegram_file_id': f"t{i:06d}",
+            'telegram_message_id': i + 1,
+            'storage_channel_id': config.STORAGE_CHANNEL_ID,
+            'file_name': f"document_{i}.pdf",
+            'file_size': rng.randint(1000, 50000000),
+            'file_type': rng.choice(['document', 'video', 'audio', 'photo']),
+            'download_count': rng.randint(0, 500),
+            'is_deleted': rng.random() < 0.1,
+            'created_at': now - timedelta(minutes=rng.randint(0, 500000)),
+        })
+        media.append({
+            'file_unique_id': f"u{i:06d}",
+            'telegram_file_id': f"t{i:06d}",
+            'telegram_message_id': i + 1,
+            'storage_channel_id': config.STORAGE_CHANNEL_ID,
+            'ref_count': 1,
+        })
+        links.append({
+            'link_id': f"l{i:06d}",
+            'file_id': file_id,
+            'user_id': user_id,
+            'status': rng.choice(['active'] * 8 + ['expired', 'revoked']),
+            'access_count': 0,
+            'max_access': None,
+            'self_destruct': rng.random() < 0.05,
+            'self_destruct_after': None,
+            'first_accessed_at': None,
+            'expires_at': now + timedelta(days=rng.randint(-30, 30)),
+            'created_at': now - timedelta(minutes=rng.randint(0, 500000)),
+        })
+    
+    for i in range(20000):
+        access_logs.append({
+            'link_id': f"l{rng.randint(0, 9999):06d}",
+            'file_id': f"f{rng.randint(0, 9999):06d}",
+            'user_id': rng.randint(1, 1000),
+            'success': rng.random() < 0.95,
+            'accessed_at': now - timedelta(minutes=rng.randint(0, 500000)),
+        })
+    
+    for i in range(5000):
+        audit_logs.append({
+            'user_id': rng.randint(1, 1000),
+            'action': rng.choice(['upload', 'delete', 'revoke', 'login']),
+            'resource_id': f"f{rng.randint(0, 9999):06d}",
+            'timestamp': now - timedelta(minutes=rng.randint(0, 50000)),
+        })
+    
+    for i in range(500):
+        jobs.append(MirrorJob(
+            source_channel_id=config.STORAGE_CHANNEL_ID,
+            message_id=i + 1,
+            mirror_channel_id=-100 - i % 2,
+            enqueued_at=now - timedelta(seconds=rng.randint(0, 3600))
+        ).to_dict())
+    
+    for collection, docs in (('users', users), ('files', files), ('links', links),
+                             ('stored_media', media), ('access_logs', access_logs),
+                             ('audit_logs', audit_logs), ('mirror_queue', jobs)):
+        await db[collection].insert_many(docs)
+    
+    sample = files[0]
+    return {
+        'user_id': sample['user_id'],
+        'file_id': sample['file_id'],
+        'link_id': links[0]['link_id'],
+        'resource_id': sample['file_id'],
+        'channel_id': config.STORAGE_CHANNEL_ID,
+    }
+
+def query_calls(db, s: dict):
+    """Every query method with sample arguments, labelled by source"""
+    files = FileQueries(db)
+    links = LinkQueries(db)
+    users = UserQueries(db)
+    audit = AuditQueries(db)
+    mirrors = MirrorQueries(db)
+    search = SearchQueries(db)
+    analytics = AnalyticsService(db)
+    now = datetime.utcnow()
+    
+    async def next_page(fetch, *args, **kwargs):
+        # Continuation pages both ways, to audit the keyset ranges as well
+        _, cursor, _ = await fetch(*args, limit=5, **kwargs)
+        _, _, cursor = await fetch(*args, cursor=cursor, limit=5, **kwargs)
+        return await fetch(*args, cursor=cursor, limit=5, **kwargs)
+    
+    return [
+        ('FileQueries.get_file', lambda: files.get_file(s['file_id'])),
+        ('FileQueries.get_user_files', lambda: files.get_user_files(s['user_id'])),
+        ('FileQueries.get_user_files(cursor)', lambda: next_page(files.get_user_files, s['user_id'])),
+        ('FileQueries.search_files', lambda: files.search_files(s['user_id'], 'doc')),
+        ('FileQueries.get_files', lambda: files.get_files([s['file_id']])),
+        ('FileQueries.count_in_range', lambda: files.count_in_range(
+            {'user_id': s['user_id'], 'is_deleted': False, 'file_type': 'video'},
+            [('user_id', 1), ('file_type', 1), ('created_at', -1)], 5001)),
+        ('FileQueries.find_with_index', lambda: files.find_with_index(
+            {'user_id': s['user_id'], 'is_deleted': False, 'file_size': {'$gt': 1000000}},
+            [('user_id', 1), ('file_size', -1)], [('file_size', -1), ('created_at', -1)])),
+        ('FileQueries.update_file', lambda: files.update_file('missing', {'file_name': 'x'})),
+        ('FileQueries.delete_user_file', lambda: files.delete_user_file('missing', s['user_id'])),
+        ('FileQueries.increment_download_count', lambda: files.increment_download_count('missing')),
+        ('FileQueries.get_user_file_count', lambda: files.get_user_file_count(s['user_id'])),
+        ('FileQueries.get_user_total_size', lambda: files.get_user_total_size(s['user_id'])),
+        ('FileQueries.acquire_stored_media', lambda: files.acquire_stored_media('missing')),
+        ('FileQueries.register_stored_media', lambda: files.register_stored_media(StoredMedia(
+            file_unique_id='audit', telegram_file_id='audit', telegram_message_id=0,
+            storage_channel_id=s['channel_id']))),
+        ('FileQueries.release_stored_media', lambda: files.release_stored_media('missing')),
+        ('FileQueries.set_mirror_ids', lambda: files.set_mirror_ids(s['channel_id'], -100, {1: 1})),
+        ('FileQueries.remove_files', lambda: files.remove_files(['missing'])),
+        ('LinkQueries.get_link', lambda: links.get_link(s['link_id'])),
+        ('LinkQueries.get_user_links', lambda: links.get_user_links(s['user_id'])),
+        ('LinkQueries.get_user_links(active_only)', lambda: links.get_user_links(s['user_id'], active_only=True)),
+        ('LinkQueries.get_user_links(cursor)', lambda: next_page(links.get_user_links, s['user_id'])),
+        ('LinkQueries.get_user_links_with_files', lambda: links.get_user_links_with_files(
+            s['user_id'], active_only=True)),
+        ('LinkQueries.get_file_links', lambda: links.get_file_links(s['file_id'])),
+        ('LinkQueries.update_link', lambda: links.update_link('missing', {'status': 'active'})),
+        ('LinkQueries.increment_access', lambda: links.increment_access('missing')),
+        ('LinkQueries.redeem_link', lambda: links.redeem_link('missing')),
+        ('LinkQueries.set_first_access', lambda: links.set_first_access('missing')),
+        ('LinkQueries.expire_if_active', lambda: links.expire_if_active('missing')),
+        ('LinkQueries.get_due_links', lambda: links.get_due_links(now)),
+        ('LinkQueries.cleanup_expired_links', lambda: links.cleanup_expired_links()),
+        ('LinkQueries.get_active_link_count', lambda: links.get_active_link_count()),
+        ('LinkQueries.get_active_link_count(user)', lambda: links.get_active_link_count(s['user_id'])),
+        ('LinkQueries.remove_links', lambda: links.remove_links(['missing'])),
+        ('UserQueries.get_user', lambda: users.get_user(s['user_id'])),
+        ('UserQueries.update_user', lambda: users.update_user(s['user_id'], {'role': 'user'})),
+        ('UserQueries.increment_stats', lambda: users.increment_stats(s['user_id'], 'total_files', 0)),
+        ('UserQueries.increment_stats_many', lambda: users.increment_stats_many(s['user_id'], {'total_files': 0})),
+        ('UserQueries.get_all_users', lambda: users.get_all_users()),
+        ('UserQueries.get_all_users(cursor)', lambda: next_page(users.get_all_users)),
+        ('UserQueries.get_user_count', lambda: users.get_user_count()),
+        ('UserQueries.get_active_users', lambda: users.get_active_users()),
+        ('AuditQueries.get_user_logs', lambda: audit.get_user_logs(s['user_id'])),
+        ('AuditQueries.get_resource_logs', lambda: audit.get_resource_logs(s['resource_id'])),
+        ('AuditQueries.get_action_logs', lambda: audit.get_action_logs('upload')),
+        ('MirrorQueries.claim_due', lambda: mirrors.claim_due('plan-audit', limit=10)),
+        ('MirrorQueries.complete', lambda: mirrors.complete(-100, s['channel_id'], [0])),
+        ('MirrorQueries.reschedule', lambda: mirrors.reschedule([MirrorJob(
+            source_channel_id=s['channel_id'], message_id=0, mirror_channel_id=-100)])),
+        ('MirrorQueries.get_backlog', lambda: mirrors.get_backlog()),
+        ('SearchQueries.add_postings', lambda: search.add_postings(s['user_id'], [('audit', now, {'aud'})])),
+        ('SearchQueries.get_frequencies', lambda: search.get_frequencies(s['user_id'], ['doc', 'pdf'])),
+        ('SearchQueries.get_recent_postings', lambda: search.get_recent_postings(s['user_id'], 'doc', 100)),
+        ('SearchQueries.count_overlap', lambda: search.count_overlap(s['user_id'], [s['file_id']], ['doc', 'pdf'])),
+        ('SearchQueries.remove_postings', lambda: search.remove_postings(s['user_id'], 'audit')),
+        ('AnalyticsService.get_user_stats', lambda: analytics.get_user_stats(s['user_id'])),
+        ('AnalyticsService.calculate_global_stats', lambda: analytics.calculate_global_stats()),
+        ('AnalyticsService.get_file_analytics', lambda: analytics.get_file_analytics(s['file_id'])),
+        ('AnalyticsService.get_popular_files', lambda: analytics.get_popular_files()),
+    ]
+
+def query_shape(command_name: str, command: dict):
+    """Collection, filter and sort of a recorded command"""
+    collection = command[command_name]
+    if command_name == 'find':
+        return collection, command.get('filter', {}), command.get('sort', {})
+    if command_name == 'findAndModify':
+        return collection, command.get('query', {}), command.get('sort', {})
+    if command_name == 'count':
+        return collection, command.get('query', {}), {}
+    if command_name == 'update':
+        return collection, command['updates'][0].get('q', {}), {}
+    if command_name == 'delete':
+        return collection, command['deletes'][0].get('q', {}), {}
+    
+    # aggregate: the leading $match and a $sort right after it
+    pipeline = command.get('pipeline', [])
+    match = pipeline[0].get('$match', {}) if pipeline else {}
+    sort = {}
+    for stage in pipeline[1:2]:
+        sort = stage.get('$sort', {})
+    return collection, match, sort
+
+def explain_command(command_name: str, command: dict) -> dict:
+    """The explainable part of a recorded command"""
+    keep = {
+        'find': ('filter', 'sort', 'projection', 'skip', 'limit', 'hint'),
+        'findAndModify': ('query', 'sort', 'update', 'upsert', 'new', 'fields'),
+        'count': ('query', 'limit', 'skip'),
+        'aggregate': ('pipeline',),
+        'update': (),
+        'delete': (),
+    }[command_name]
+    explained = {command_name: command[command_name]}
+    explained.update({key: command[key] for key in keep if key in command})
+    if command_name == 'aggregate':
+        explained['cursor'] = {}
+    elif command_name == 'update':
+        explained['updates'] = command['updates'][:1]
+    elif command_name == 'delete':
+        explained['deletes'] = command['deletes'][:1]
+    return explained
+
+def plan_stages(explain: dict) -> list:
+    """Stage dicts of every winning plan in an explain result"""
+    stages = []
+    
+    def collect(node):
+        if isinstance(node, dict):
+            if 'stage' in node:
+                stages.append(node)
+            for value in node.values():
+                collect(value)
+        elif isinstance(node, list):
+            for value in node:
+                collect(value)
+    
+    def find_plans(node):
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if key == 'winningPlan':
+                    collect(value)
+                else:
+                    find_plans(value)
+        elif isinstance(node, list):
+            for value in node:
+                find_plans(value)
+    
+    find_plans(explain)
+    return stages
+
+def classify(filter_: dict):
+    """Split a filter into partial, equality and range fields"""
+    partial, equality, ranges = {}, [], []
+    for field, value in filter_.items():
+        if field.startswith('$'):
+            continue  # $or / $and / $expr branches need their own indexes
+        if field in PARTIAL_FIELDS and value == PARTIAL_FIELDS[field]:
+            partial[field] = value
+        elif not isinstance(value, dict):
+            equality.append(field)
+        elif set(value) & EQUALITY_OPERATORS:
+            equality.append(field)
+        elif set(value) & RANGE_OPERATORS:
+            ranges.append(field)
+    return partial, equality, ranges
+
+def audit_shape(filter_: dict, sort: dict, stages: list) -> list:
+    """Flags for one winning plan"""
+    flags = []
+    names = {stage['stage'] for stage in stages}
+    if 'COLLSCAN' in names:
+        flags.append('COLLSCAN')
+    if 'SORT' in names:
+        flags.append('in-memory SORT')
+    
+    partial, equality, ranges = classify(filter_)
+    for stage in stages:
+        if stage['stage'] not in ('IXSCAN', 'COUNT_SCAN') or stage.get('isUnique'):
+            continue
+        indexed = set(stage.get('keyPattern', {}))
+        if stage.get('isPartial'):
+            indexed |= set(partial)
+        missing = [field for field in [*partial, *equality, *ranges] if field not in indexed]
+        if missing:
+            flags.append(f"filters {', '.join(missing)} outside index {stage.get('indexName')}")
+    return flags
+
+def recommend(filter_: dict, sort: dict):
+    """Equality, sort, range index for a query, with soft-delete flags as a partial filter"""
+    partial, equality, ranges = classify(filter_)
+    # Equality order does not matter to the planner; a fixed one lets shapes share an index
+    keys = [(field, 1) for field in sorted(equality)]
+    keys += [(field, direction) for field, direction in sort.items() if field not in equality]
+    keys += [(field, 1) for field in ranges if field not in sort]
+    if not keys:
+        return None
+    return tuple(keys), tuple(sorted(partial.items()))
+
+def covers(index, wanted) -> bool:
+    """Whether an index serves everything another one would"""
+    keys, partial = index
+    wanted_keys, wanted_partial = wanted
+    return partial == wanted_partial and keys[:len(wanted_keys)] == wanted_keys
+
+async def existing_indexes(db, collection: str) -> dict:
+    """name -> (keys, partial, unique) for a collection"""
+    indexes = {}
+    for name, info in (await db[collection].index_information()).items():
+        partial = tuple(sorted(info.get('partialFilterExpression', {}).items()))
+        indexes[name] = (tuple((field, int(direction)) for field, direction in info['key']), partial,
+                         info.get('unique', False))
+    return indexes
+
+async def run_audit(db, recorder: CommandRecorder, sample: dict) -> list:
+    """Run every query and explain what it sent"""
+    recorder.commands = []
+    for label, call in query_calls(db, sample):
+        recorder.label = label
+        try:
+            await call()
+        except Exception as e:
+            print(f"⚠️  {label} raised {e}")
+    recorder.label = None
+    
+    results, seen = [], set()
+    for label, command_name, command in recorder.commands:
+        collection, filter_, sort = query_shape(command_name, command)
+        key = (label, command_name, collection, repr(sorted(filter_)), repr(list(sort.items())))
+        if key in seen:
+            continue
+        seen.add(key)
+        
+        explain = await db.command({'explain': explain_command(command_name, command), 'verbosity': 'queryPlanner'})
+        stages = plan_stages(explain)
+        flags = [] if label in ACCEPTED_SCANS else audit_shape(filter_, sort, stages)
+        results.append({
+            'label': label,
+            'command': command_name,
+            'collection': collection,
+            'filter': filter_,
+            'sort': sort,
+            'plan': ' <- '.join(stage['stage'] for stage in stages),
+            'indexes': sorted({stage['indexName'] for stage in stages if 'indexName' in stage}),
+            'flags': flags,
+        })
+    return results
+
+def print_report(results: list):
+    """Print each query shape and its plan"""
+    flagged = [result for result in results if result['flags']]
+    for result in results:
+        mark = '❌' if result['flags'] else '✅'
+        print(f"{mark} {result['label']} [{result['collection']}.{result['command']}] {result['plan']}")
+        for flag in result['flags']:
+            print(f"     ↳ {flag}")
+    print(f"\n{len(results)} query shapes, {len(flagged)} flagged")
+
+async def plan_indexes(db, results: list):
+    """Indexes to create and redundant single-field ones to drop, per collection"""
+    create, drop = {}, {}
+    for result in results:
+        if not result['flags']:
+            continue
+        wanted = recommend(result['filter'], result['sort'])
+        if wanted:
+            create.setdefault(result['collection'], set()).add(wanted)
+    
+    for collection in set(create) | {result['collection'] for result in results}:
+        existing = await existing_indexes(db, collection)
+        current = [value[:2] for value in existing.values()]
+        wanted = create.get(collection, set())
+        # Skip what an existing index or a longer recommendation already covers
+        wanted = {
+            index for index in wanted
+            if not any(covers(other, index) for other in current)
+            and not any(other != index and covers(other, index) for other in wanted)
+        }
+        if wanted:
+            create[collection] = wanted
+        else:
+            create.pop(collection, None)
+        
+        # A single-field index is redundant when a compound one leads with the same
+        # field and every query filtering on that field can use the compound one
+        shapes = [classify(result['filter']) for result in results if result['collection'] == collection]
+        compounds = [index for index in current if len(index[0]) > 1] + list(wanted)
+        for name, (keys, partial, unique) in existing.items():
+            if name == '_id_' or unique or partial or len(keys) != 1:
+                continue
+            field = keys[0][0]
+            for compound_keys, compound_partial in compounds:
+                if compound_keys[0][0] != field:
+                    continue
+                users = [shape for shape in shapes if field in shape[1]]
+                if all(set(dict(compound_partial).items()) <= set(shape[0].items()) for shape in users):
+                    drop.setdefault(collection, []).append(name)
+                    break
+    return create, drop
+
+def next_migration_path() -> tuple:
+    """Number and path of the next migration file"""
+    numbers = [int(name[:3]) for name in os.listdir(MIGRATIONS_DIR) if name[:3].isdigit()]
+    number = max(numbers, default=0) + 1
+    return number, os.path.join(MIGRATIONS_DIR, f"{number:03d}_query_plan_indexes.py")
+
+def render_migration(number: int, create: dict, drop: dict) -> str:
+    """Source of a migration creating and dropping the planned indexes"""
+    lines = [f'"""Migration {number:03d}: Compound and partial indexes from the query plan audit"""', '']
+    lines.append('INDEXES = {')
+    for collection in sorted(create):
+        lines.append(f"    '{collection}': [")
+        for keys, partial in sorted(create[collection]):
+            options = f"{{'partialFilterExpression': {dict(partial)!r}}}" if partial else '{}'
+            lines.append(f"        ({list(keys)!r}, {options}),")
+        lines.append('    ],')
+    lines.append('}')
+    lines.append('')
+    lines.append('# Single-field indexes the compound ones above make redundant')
+    lines.append('REDUNDANT = {')
+    for collection in sorted(drop):
+        lines.append(f"    '{collection}': {sorted(drop[collection])!r},")
+    lines.append('}')
+    lines.append(MIGRATION_BODY.replace('NNN', f"{number:03d}"))
+    return '\n'.join(lines)
+
+MIGRATION_BODY = '''
+def index_name(keys) -> str:
+    """Default MongoDB name for an index key list"""
+    return '_'.join(f"{field}_{direction}" for field, direction in keys)
+
+def up(db):
+    """Apply migration"""
+    for collection, indexes in INDEXES.items():
+        for keys, options in indexes:
+            db[collection].create_index(keys, **options)
+    
+    for collection, names in REDUNDANT.items():
+        existing = db[collection].index_information()
+        for name in names:
+            if name in existing:
+                db[collection].drop_index(name)
+    
+    print("✅ Migration NNN: Query plan indexes created")
+
+def down(db):
+    """Rollback migration"""
+    for collection, names in REDUNDANT.items():
+        for name in names:
+            field, direction = name.rsplit('_', 1)
+            db[collection].create_index([(field, int(direction))])
+    
+    for collection, indexes in INDEXES.items():
+        existing = db[collection].index_information()
+        for keys, options in indexes:
+            if index_name(keys) in existing:
+                db[collection].drop_index(index_name(keys))
+    
+    print("↩️ Migration NNN: Query plan indexes dropped")'''
+
+def apply_migrations(skip: tuple = ()):
+    """Run every migration's up() against the scratch database"""
+    client = MongoClient(config.MONGO_URL)
+    db = client[SCRATCH_DB]
+    for name in sorted(name[:-3] for name in os.listdir(MIGRATIONS_DIR)
+                       if name.endswith('.py') and name[0].isdigit()):
+        if name in skip:
+            continue
+        module = importlib.import_module(f'database.migrations.{name}')
+        if hasattr(module, 'up'):
+            module.up(db)
+    client.close()
+
+async def main(mode: str):
+    """Seed, audit and optionally emit and verify a migration"""
+    print(f"🔎 Auditing query plans in scratch database {SCRATCH_DB}...\n")
+    
+    recorder = CommandRecorder()
+    client = AsyncIOMotorClient(config.MONGO_URL, event_listeners=[recorder])
+    await client.drop_database(SCRATCH_DB)
+    db = client[SCRATCH_DB]
+    
+    try:
+        sample = await seed(db, random.Random(42))
+        apply_migrations()
+        
+        # Same indexes the bot creates at startup
+        db_conn = DatabaseConnection()
+        db_conn.client = client
+        db_conn.db = db
+        await db_conn.create_indexes()
+        
+        results = await run_audit(db, recorder, sample)
+        print_report(results)
+        
+        create, drop = await plan_indexes(db, results)
+        if not create and not drop:
+            print("\n✅ No index changes needed")
+            return
+        
+        print("\n📋 Proposed indexes:")
+        for collection, indexes in sorted(create.items()):
+            for keys, partial in sorted(indexes):
+                suffix = f" where {dict(partial)}" if partial else ''
+                print(f"   + {collection} {list(keys)}{suffix}")
+        for collection, names in sorted(drop.items()):
+            for name in names:
+                print(f"   - {collection} {name}")
+        
+        if mode not in ('emit', 'verify'):
+            return
+        
+        number, path = next_migration_path()
+        with open(path, 'w') as f:
+            f.write(render_migration(number, create, drop))
+        print(f"\n📝 Wrote {path}")
+        
+        if mode == 'verify':
+            apply_migrations()
+            print("\n🔁 Re-auditing with the new migration applied...\n")
+            print_report(await run_audit(db, recorder, sample))
+    finally:
+        await client.drop_database(SCRATCH_DB)
+        client.close()
+
+if __name__ == '__main__':
+    asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else 'report'))
\ No newline at end of file
@@ -0,0 +1,180 @@
+"""Buffered writer for download access logs"""
+import asyncio
+import os
+import time
+from typing import List, Optional
+from database.models.access_log import AccessLog
+from config import config
+
+OVERFLOW_BLOCK = 'block'
+OVERFLOW_DROP = 'drop'
+OVERFLOW_SPILL = 'spill'
+
+class AccessLogService:
+    """Queue access logs in process and write them with batched insert_many"""
+    
+    def __init__(self,
+                 queue_size: int = config.ACCESS_LOG_QUEUE_SIZE,
+                 batch_size: int = config.ACCESS_LOG_BATCH_SIZE,
+                 flush_interval: float = config.ACCESS_LOG_FLUSH_INTERVAL,
+                 overflow: str = config.ACCESS_LOG_OVERFLOW,
+                 spill_path: str = config.ACCESS_LOG_SPILL_PATH):
+        self.queue: Optional[asyncio.Queue] = None
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.spill_path = spill_path
+        self.task: Optional[asyncio.Task] = None
+        self.running = False
+        self.stats = {
+            'enqueued': 0,
+            'written': 0,
+            'batches': 0,
+            'dropped': 0,
+            'spilled': 0,
+            'failed': 0,
+            'last_batch_size': 0,
+            'max_batch_size': 0,
+            'last_flush_ms': 0.0,
+            'total_flush_ms': 0.0,
+        }
+    
+    async def start(self):
+        """Start the background flusher"""
+        if self.running:
+            return
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self.running = True
+        await self._replay_spill()
+        self.task = asyncio.create_task(self._run())
+        print("✅ Access log writer started")
+    
+    async def stop(self):
+        """Drain pending logs and stop the flusher"""
+        if not self.running:
+            return
+        self.running = False
+        if self.task:
+            await self.task
+            self.task = None
+        print(f"🛑 Access log writer stopped ({self.stats['written']} logs written)")
+    
+    async def log(self, access_log: AccessLog) -> bool:
+        """Queue an access log for writing"""
+        if not self.running:
+            # Writer not started (e.g. scripts): write through
+            return await self._write([access_log])
+        
+        if self.overflow == OVERFLOW_BLOCK:
+            await self.queue.put(access_log)
+        else:
+            try:
+                self.queue.put_nowait(access_log)
+            except asyncio.QueueFull:
+                if self.overflow == OVERFLOW_SPILL:
+                    self._spill([access_log])
+                else:
+                    self.stats['dropped'] += 1
+                return False
+        
+        self.stats['enqueued'] += 1
+        return True
+    
+    def get_stats(self) -> dict:
+        """Get writer counters"""
+        stats = dict(self.stats)
+        stats['queue_depth'] = self.queue.qsize() if self.queue else 0
+        return stats
+    
+    async def _run(self):
+        """Flush on batch size or interval until stopped, then drain"""
+        while self.running or not self.queue.empty():
+            batch = await self._collect_batch()
+            if batch:
+                await self._write(batch)
+    
+    async def _collect_batch(self) -> List[AccessLog]:
+        """Collect up to batch_size logs, waiting at most flush_interval"""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            
+            timeout = deadline - time.monotonic()
+            if timeout <= 0 or not self.running:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        
+        return batch
+    
+    async def _write(self, batch: List[AccessLog]) -> bool:
+        """Write a batch with one unordered insert_many"""
+        from database.connection import get_database
+        
+        started = time.perf_counter()
+        try:
+            db = await get_database()
+            await db.access_logs.insert_many(
+                [entry.to_dict() for entry in batch],
+                ordered=False
+            )
+        except Exception as e:
+            print(f"Error writing access logs: {e}")
+            self.stats['failed'] += len(batch)
+            if self.overflow == OVERFLOW_SPILL:
+                self._spill(batch)
+            return False
+        
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.stats['written'] += len(batch)
+        self.stats['batches'] += 1
+        self.stats['last_batch_size'] = len(batch)
+        self.stats['max_batch_size'] = max(self.stats['max_batch_size'], len(batch))
+        self.stats['last_flush_ms'] = elapsed_ms
+        self.stats['total_flush_ms'] += elapsed_ms
+        return True
+    
+    def _spill(self, batch: List[AccessLog]):
+        """Append logs to the spill file for replay on next start"""
+        try:
+            with open(self.spill_path, 'a') as f:
+                for entry in batch:
+                    f.write(entry.model_dump_json() + '\n')
+            self.stats['spilled'] += len(batch)
+        except Exception as e:
+            print(f"Error spilling access logs: {e}")
+            self.stats['dropped'] += len(batch)
+    
+    async def _replay_spill(self):
+        """Write back logs spilled by a previous run"""
+        if not os.path.exists(self.spill_path):
+            return
+        
+        replay_path = f"{self.spill_path}.replay"
+        os.replace(self.spill_path, replay_path)
+        
+        batch = []
+        with open(replay_path) as f:
+            for line in f:
+                if line.strip():
+                    batch.append(AccessLog.model_validate_json(line))
+                if len(batch) >= self.batch_size:
+                    await self._write(batch)
+                    batch = []
+        if batch:
+            await self._write(batch)
+        
+        os.remove(replay_path)
+        print("♻️ Replayed spilled access logs")
+
+# Global access log writer
+access_log_service = AccessLogService()
\ No newline at end of file
@@ -2,6 +2,7 @@ from datetime import datetime, timedelta
 from typing import Dict, Any, Optional
 from cache.redis_client import redis_client
 from cache.keys import stats_key, global_stats_key
+from services.counter_service import counter_service
 from utils.constants import CACHE_TTL_USER
 
 class AnalyticsService:
@@ -38,9 +39,11 @@ class AnalyticsService:
             'success': True
         })
         
+        pending = await counter_service.get_pending('users', 'total_size', [user_id])
+        
         stats = {
             'total_files': file_count,
-            'total_size': user_doc.get('total_size', 0),
+            'total_size': user_doc.get('total_size', 0) + pending[str(user_id)],
             'active_links': active_links,
             'total_downloads': total_downloads,
             'member_since': user_doc.get('created_at'),
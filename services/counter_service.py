@@ -0,0 +1,190 @@
+"""Write-behind counters for hot $inc fields"""
+import secrets
+from collections import defaultdict
+from typing import Dict, List, Tuple
+from pymongo import UpdateOne
+from cache.redis_client import redis_client
+from cache.keys import counter_key
+
+# collection -> document id field
+COUNTER_TARGETS = {
+    'files': 'file_id',
+    'links': 'link_id',
+    'users': 'user_id',
+}
+
+# (collection, field) pairs that may be counted write-behind
+COUNTER_FIELDS = [
+    ('files', 'download_count'),
+    ('links', 'access_count'),
+    ('users', 'total_files'),
+    ('users', 'total_size'),
+]
+
+class CounterService:
+    """Accumulate counter deltas in Redis (or in process) and flush them in bulk.
+    
+    Each flush renames the live hashes to keys only it owns, so concurrent
+    flushes on several instances never write the same deltas twice. A
+    claimed hash is deleted only once its bulk write succeeded; after a
+    failure the same instance reads it again on its next flush.
+    """
+    
+    def __init__(self):
+        self.redis = redis_client
+        self.owner = secrets.token_hex(8)
+        self.claims = 0
+        # Claimed hashes whose bulk write failed, by collection
+        self.unwritten: Dict[str, List[str]] = defaultdict(list)
+        self.local: Dict[Tuple[str, str], Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        # Deltas of this instance's flush that are not written yet
+        self.in_flight: Dict[str, Dict[str, Dict[str, int]]] = {}
+        self.stats = {
+            'increments': 0,
+            'flushes': 0,
+            'documents_updated': 0,
+            'redis_fallbacks': 0,
+        }
+    
+    async def increment(self, collection: str, field: str, doc_id, amount: int = 1):
+        """Record a pending delta for a document field"""
+        if (collection, field) not in COUNTER_FIELDS:
+            raise ValueError(f"Unknown counter: {collection}.{field}")
+        
+        self.stats['increments'] += 1
+        if self.redis.connected:
+            if await self.redis.hincrby(counter_key(collection, field), str(doc_id), amount) is not None:
+                return
+            # Redis failed mid-call; keep the delta in process
+            self.stats['redis_fallbacks'] += 1
+        self.local[(collection, field)][str(doc_id)] += amount
+    
+    async def get_pending(self, collection: str, field: str, doc_ids: List) -> Dict[str, int]:
+        """Get unflushed deltas for the given documents.
+        
+        Deltas another instance is writing at this moment are briefly not
+        counted; they are never counted twice.
+        """
+        ids = [str(doc_id) for doc_id in doc_ids]
+        in_flight = self.in_flight.get(collection, {})
+        pending = {
+            doc_id: self.local[(collection, field)].get(doc_id, 0)
+            + in_flight.get(doc_id, {}).get(field, 0)
+            for doc_id in ids
+        }
+        
+        if self.redis.connected and ids:
+            key = counter_key(collection, field)
+            unwritten = [claim for claim in self.unwritten.get(collection, []) if claim.startswith(f"{key}:")]
+            for redis_key in (key, *unwritten):
+                values = await self.redis.hmget(redis_key, ids)
+                for doc_id, value in zip(ids, values):
+                    if value:
+                        pending[doc_id] += int(value)
+        
+        return pending
+    
+    async def apply_pending(self, collection: str, field: str, items: list) -> list:
+        """Add unflushed deltas to model instances so displayed counts are exact"""
+        if not items:
+            return items
+        
+        id_field = COUNTER_TARGETS[collection]
+        pending = await self.get_pending(
+            collection, field, [getattr(item, id_field) for item in items]
+        )
+        for item in items:
+            delta = pending.get(str(getattr(item, id_field)), 0)
+            if delta:
+                setattr(item, field, getattr(item, field) + delta)
+        return items
+    
+    async def _claim(self, collection: str, field: str) -> List[str]:
+        """Rename the live hash (and a hash left by an older release) to keys owned by this flush"""
+        key = counter_key(collection, field)
+        claimed = []
+        for source in (f"{key}:flushing", key):
+            self.claims += 1
+            claim = f"{key}:flushing:{self.owner}:{self.claims}"
+            # RENAME is atomic: of several flushes only one gets the hash
+            if await self.redis.rename(source, claim):
+                claimed.append(claim)
+        return claimed
+    
+    async def flush(self) -> int:
+        """Flush all pending deltas to MongoDB with one bulk_write per collection"""
+        from database.connection import get_database
+        
+        db = await get_database()
+        deltas: Dict[str, Dict[str, Dict[str, int]]] = defaultdict(lambda: defaultdict(dict))
+        claimed: Dict[str, List[str]] = defaultdict(list)
+        
+        if self.redis.connected:
+            claimed, self.unwritten = self.unwritten, defaultdict(list)
+            for collection, field in COUNTER_FIELDS:
+                claimed[collection] += await self._claim(collection, field)
+            for collection, claims in claimed.items():
+                for claim in claims:
+                    field = claim.split(':')[2]
+                    for doc_id, value in (await self.redis.hgetall(claim)).items():
+                        current = deltas[collection][doc_id].get(field, 0)
+                        deltas[collection][doc_id][field] = current + int(value)
+        
+        # Snapshot in-process deltas
+        local, self.local = self.local, defaultdict(lambda: defaultdict(int))
+        for (collection, field), values in local.items():
+            for doc_id, value in values.items():
+                current = deltas[collection][doc_id].get(field, 0)
+                deltas[collection][doc_id][field] = current + value
+        self.in_flight = deltas
+        
+        updated = 0
+        for collection, docs in list(deltas.items()):
+            id_field = COUNTER_TARGETS[collection]
+            operations = []
+            for doc_id, inc in docs.items():
+                inc = {field: value for field, value in inc.items() if value}
+                if not inc:
+                    continue
+                key = int(doc_id) if collection == 'users' else doc_id
+                update = {'$inc': inc}
+                if collection == 'links':
+                    update['$currentDate'] = {'last_accessed_at': True}
+                operations.append(UpdateOne({id_field: key}, update))
+            
+            try:
+                if operations:
+                    result = await db[collection].bulk_write(operations, ordered=False)
+                    updated += result.modified_count
+            except Exception as e:
+                print(f"Error flushing {collection} counters: {e}")
+                # Keep the in-process share and the claimed hashes for the next flush
+                for (c, field), values in local.items():
+                    if c == collection:
+                        for doc_id, value in values.items():
+                            self.local[(c, field)][doc_id] += value
+                self.unwritten[collection] += claimed.pop(collection, [])
+                continue
+            finally:
+                self.in_flight.pop(collection, None)
+            
+            for claim in claimed.pop(collection, []):
+                await self.redis.delete(claim)
+        
+        # Claimed hashes that turned out empty
+        for claims in claimed.values():
+            for claim in claims:
+                await self.redis.delete(claim)
+        
+        self.stats['flushes'] += 1
+        self.stats['documents_updated'] += updated
+        return updated
+    
+    def get_stats(self) -> dict:
+        """Get counter subsystem stats"""
+        stats = dict(self.stats)
+        stats['local_pending'] = sum(len(values) for values in self.local.values())
+        return stats
+
+# Global counter service
+counter_service = CounterService()
\ No newline at end of file
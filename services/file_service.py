@@ -1,8 +1,16 @@
-from typing import Optional, BinaryIO
+from typing import Optional, BinaryIO, Dict, List, Tuple
 from datetime import datetime
+from database.connection import db_connection
 from database.models.file import File
+from database.models.link import Link
+from database.models.stored_media import StoredMedia
 from database.queries.file_queries import FileQueries
 from database.queries.user_queries import UserQueries
+from database.queries.link_queries import LinkQueries
+from services.counter_service import counter_service
+from services.link_service import LinkService
+from services.search_service import SearchService
+from storage.cache_manager import cache_manager
 from utils.hash import generate_file_id, generate_file_hash
 from utils.validators import sanitize_filename
 from config import config
@@ -13,6 +21,10 @@ class FileService:
     def __init__(self, db):
         self.file_queries = FileQueries(db)
         self.user_queries = UserQueries(db)
+        self.link_queries = LinkQueries(db)
+        self.link_service = LinkService(db)
+        self.search_service = SearchService(db)
+        self.db = db
     
     async def create_file_record(self, 
                                   user_id: int,
@@ -22,7 +34,9 @@ class FileService:
                                   file_size: int,
                                   file_type: str,
                                   mime_type: Optional[str] = None,
-                                  is_encrypted: bool = False) -> Optional[File]:
+                                  is_encrypted: bool = False,
+                                  file_unique_id: Optional[str] = None,
+                                  storage_channel_id: Optional[int] = None) -> Optional[File]:
         """Create a new file record"""
         try:
             file_id = generate_file_id()
@@ -33,6 +47,8 @@ class FileService:
                 user_id=user_id,
                 telegram_file_id=telegram_file_id,
                 telegram_message_id=telegram_message_id,
+                storage_channel_id=storage_channel_id,
+                file_unique_id=file_unique_id,
                 file_name=sanitized_name,
                 file_size=file_size,
                 file_type=file_type,
@@ -42,9 +58,12 @@ class FileService:
             
             success = await self.file_queries.create_file(file)
             if success:
+                await self.search_service.index_files([file])
+                await cache_manager.bump_list_version(user_id)
+                
                 # Update user stats
-                await self.user_queries.increment_stats(user_id, 'total_files')
-                await self.user_queries.increment_stats(user_id, 'total_size', file_size)
+                await counter_service.increment('users', 'total_files', user_id)
+                await counter_service.increment('users', 'total_size', user_id, file_size)
                 return file
             
             return None
@@ -52,35 +71,238 @@ class FileService:
             print(f"Error creating file record: {e}")
             return None
     
+    async def create_upload(self,
+                            user_id: int,
+                            telegram_file_id: str,
+                            telegram_message_id: int,
+                            file_name: str,
+                            file_size: int,
+                            file_type: str,
+                            mime_type: Optional[str] = None,
+                            is_encrypted: bool = False,
+                            file_unique_id: Optional[str] = None,
+                            storage_channel_id: Optional[int] = None,
+                            mirrors: Optional[Dict[str, int]] = None,
+                            expiry_days: Optional[int] = None) -> tuple[Optional[File], Optional[Link]]:
+        """Create a file record and its download link together, then count it in the user stats"""
+        uploads = await self.create_uploads(user_id, [{
+            'telegram_file_id': telegram_file_id,
+            'telegram_message_id': telegram_message_id,
+            'file_name': file_name,
+            'file_size': file_size,
+            'file_type': file_type,
+            'mime_type': mime_type,
+            'is_encrypted': is_encrypted,
+            'file_unique_id': file_unique_id,
+            'storage_channel_id': storage_channel_id,
+            'mirrors': mirrors or {}
+        }], expiry_days)
+        return uploads[0] if uploads else (None, None)
+    
+    async def create_uploads(self,
+                             user_id: int,
+                             items: List[dict],
+                             expiry_days: Optional[int] = None) -> List[Tuple[File, Link]]:
+        """Create file records and links for several uploads as one operation.
+        
+        Each item holds the create_upload keyword arguments (minus user_id and
+        expiry_days). Uses a multi-document transaction when the deployment
+        supports it, otherwise ordered writes with compensation; either way
+        all records are created or none are.
+        """
+        try:
+            files = [
+                File(
+                    file_id=generate_file_id(),
+                    user_id=user_id,
+                    telegram_file_id=item['telegram_file_id'],
+                    telegram_message_id=item['telegram_message_id'],
+                    storage_channel_id=item.get('storage_channel_id'),
+                    mirrors=item.get('mirrors', {}),
+                    file_unique_id=item.get('file_unique_id'),
+                    file_name=sanitize_filename(item['file_name']),
+                    file_size=item['file_size'],
+                    file_type=item['file_type'],
+                    mime_type=item.get('mime_type'),
+                    is_encrypted=item.get('is_encrypted', False)
+                )
+                for item in items
+            ]
+            links = [
+                self.link_service.build_link(file.file_id, user_id, expiry_days)
+                for file in files
+            ]
+            if not files:
+                return []
+            
+            if db_connection.supports_transactions:
+                success = await self._write_uploads_transaction(files, links)
+            else:
+                success = await self._write_uploads(files, links)
+            if not success:
+                return []
+            
+            # Update user stats
+            for field, amount in self._stats_delta(files).items():
+                await counter_service.increment('users', field, user_id, amount)
+            await self.search_service.index_files(files)
+            await cache_manager.bump_list_version(user_id)
+            for link in links:
+                await self.link_service.register_link(link)
+            return list(zip(files, links))
+        except Exception as e:
+            print(f"Error creating uploads: {e}")
+            return []
+    
+    async def _write_uploads_transaction(self, files: List[File], links: List[Link]) -> bool:
+        """Insert files and links in one transaction.
+        
+        with_transaction retries transient errors and write conflicts.
+        """
+        async def write(session):
+            await self.file_queries.create_files(files, session)
+            await self.link_queries.create_links(links, session)
+        
+        try:
+            async with await self.db.client.start_session() as session:
+                await session.with_transaction(write)
+            return True
+        except Exception as e:
+            print(f"Error writing uploads: {e}")
+            return False
+    
+    async def _write_uploads(self, files: List[File], links: List[Link]) -> bool:
+        """Insert files then links, undoing the files if the links fail"""
+        if len(files) == 1:
+            # Single uploads share round trips with concurrent ones
+            success = await self.file_queries.create_file(files[0])
+        else:
+            success = await self.file_queries.create_files(files)
+        if not success:
+            await self.file_queries.remove_files([file.file_id for file in files])
+            return False
+        
+        if len(links) == 1:
+            success = await self.link_queries.create_link(links[0])
+        else:
+            success = await self.link_queries.create_links(links)
+        if not success:
+            await self.link_queries.remove_links([link.link_id for link in links])
+            await self.file_queries.remove_files([file.file_id for file in files])
+            return False
+        return True
+    
+    @staticmethod
+    def _stats_delta(files: List[File], sign: int = 1) -> Dict[str, int]:
+        """User stats change for adding (or removing) files"""
+        return {
+            'total_files': sign * len(files),
+            'total_size': sign * sum(file.file_size for file in files)
+        }
+    
+    async def acquire_stored_media(self, file_unique_id: str) -> Optional[StoredMedia]:
+        """Reuse content already in the storage channel (takes a reference)"""
+        return await self.file_queries.acquire_stored_media(file_unique_id)
+    
+    async def register_stored_media(self,
+                                    file_unique_id: str,
+                                    telegram_message_id: int,
+                                    telegram_file_id: str,
+                                    storage_channel_id: Optional[int] = None) -> Optional[StoredMedia]:
+        """Record content just forwarded to the storage channel (takes a reference).
+        
+        The returned record may point at another message if the same content
+        was registered concurrently; the caller's copy is then redundant.
+        """
+        return await self.file_queries.register_stored_media(StoredMedia(
+            file_unique_id=file_unique_id,
+            telegram_message_id=telegram_message_id,
+            telegram_file_id=telegram_file_id,
+            storage_channel_id=storage_channel_id
+        ))
+    
+    async def release_stored_media(self, file_unique_id: str) -> int:
+        """Drop a reference on shared content, deleting its storage messages with the last one"""
+        remaining = await self.file_queries.release_stored_media(file_unique_id)
+        if remaining == 0:
+            # Only removed if no upload took a reference meanwhile
+            media = await self.file_queries.purge_stored_media(file_unique_id)
+            if media:
+                await self._delete_stored_messages(media)
+        return remaining
+    
+    async def _delete_stored_messages(self, media: StoredMedia):
+        """Delete an unreferenced storage message and its mirror copies"""
+        from core.client import bot_client
+        from storage.channel_manager import ChannelManager
+        from storage.mirror_manager import mirror_manager
+        
+        if not bot_client.app:
+            return
+        await ChannelManager(bot_client.app).delete_file(media.telegram_message_id, media.storage_channel_id)
+        if media.mirrors:
+            await mirror_manager.delete_from_mirrors(media.mirrors)
+    
     async def get_file(self, file_id: str) -> Optional[File]:
         """Get file by ID"""
         return await self.file_queries.get_file(file_id)
     
-    async def get_user_files(self, user_id: int, skip: int = 0, limit: int = 50):
-        """Get user's files"""
-        return await self.file_queries.get_user_files(user_id, skip, limit)
+    async def get_user_files(self, user_id: int, cursor: Optional[str] = None, limit: int = 50):
+        """Get a page of user's files with the next and previous page cursors"""
+        files, next_cursor, prev_cursor = await self.file_queries.get_user_files(user_id, cursor, limit)
+        return await counter_service.apply_pending('files', 'download_count', files), next_cursor, prev_cursor
     
-    async def search_files(self, user_id: int, query: str):
+    async def search_files(self, user_id: int, query: str, limit: int = 20):
         """Search user's files"""
-        return await self.file_queries.search_files(user_id, query)
+        files = await self.search_service.search(user_id, query, limit)
+        return await counter_service.apply_pending('files', 'download_count', files)
     
     async def delete_file(self, file_id: str, user_id: int) -> bool:
         """Delete file"""
-        file = await self.get_file(file_id)
-        if not file or file.user_id != user_id:
-            return False
-        
-        success = await self.file_queries.delete_file(file_id)
+        file = await self.file_queries.delete_user_file(file_id, user_id)
+        success = file is not None
         if success:
             # Update user stats
-            await self.user_queries.increment_stats(user_id, 'total_files', -1)
-            await self.user_queries.increment_stats(user_id, 'total_size', -file.file_size)
+            for field, amount in self._stats_delta([file], -1).items():
+                await counter_service.increment('users', field, user_id, amount)
+            
+            # The storage message is shared with other uploads of the same content
+            if file.file_unique_id:
+                await self.release_stored_media(file.file_unique_id)
+            await self.search_service.remove_file(file)
+            await cache_manager.bump_list_version(user_id)
+            
+            # Drop cached download descriptors pointing at this file
+            await cache_manager.invalidate_file(file_id)
+            for link in await self.link_queries.get_file_links(file_id):
+                await cache_manager.invalidate_link(link.link_id)
         
         return success
     
+    async def refresh_telegram_file_id(self, file_id: str, telegram_file_id: str,
+                                       file_unique_id: Optional[str] = None) -> bool:
+        """Replace a stale Telegram file_id after a fallback delivery.
+        
+        Every file with the same content and its stored media record get the
+        fresh file_id, not just the one that was delivered.
+        """
+        if file_unique_id:
+            file_ids = await self.file_queries.replace_telegram_file_id(file_unique_id, telegram_file_id)
+        elif await self.file_queries.update_file(file_id, {'telegram_file_id': telegram_file_id}):
+            file_ids = [file_id]
+        else:
+            file_ids = []
+        
+        for updated_id in file_ids:
+            await cache_manager.invalidate_file(updated_id)
+            for link in await self.link_queries.get_file_links(updated_id):
+                await cache_manager.invalidate_link(link.link_id)
+        return bool(file_ids)
+    
     async def increment_download(self, file_id: str) -> bool:
-        """Increment file download count"""
-        return await self.file_queries.increment_download_count(file_id)
+        """Increment file download count (flushed write-behind)"""
+        await counter_service.increment('files', 'download_count', file_id)
+        return True
     
     async def get_user_storage_stats(self, user_id: int) -> dict:
         """Get user storage statistics"""
@@ -0,0 +1,114 @@
+"""Bloom filter pre-check for issued link IDs"""
+from typing import Optional
+from cache.redis_client import redis_client
+from cache.keys import link_filter_key
+from utils.bloom import BloomFilter
+from config import config
+
+class LinkFilterService:
+    """Reject link IDs that were never issued without querying MongoDB.
+    
+    By default the filter is shared through a Redis bitmap, so links issued
+    on other instances are found. A purely local filter only knows links
+    created on this instance or before its last rebuild.
+    """
+    
+    def __init__(self):
+        self.redis = redis_client
+        self.filter: Optional[BloomFilter] = None
+        self.ready = False
+        self.rebuilding = False
+        self.pending = []
+        self.stats = {
+            'checks': 0,
+            'rejected': 0,
+        }
+    
+    async def rebuild(self, db) -> bool:
+        """Rebuild the filter from a streamed projection of links.link_id"""
+        self.rebuilding = True
+        self.pending = []
+        try:
+            # A shared filter must have the same size on every instance,
+            # a local one can grow with the collection
+            capacity = config.LINK_FILTER_CAPACITY
+            if not config.LINK_FILTER_SHARED:
+                capacity = max(capacity, 2 * await db.links.estimated_document_count())
+            
+            bloom = BloomFilter(capacity, config.LINK_FILTER_FP_RATE)
+            cursor = db.links.find({}, {'link_id': 1, '_id': 0}).batch_size(10000)
+            async for doc in cursor:
+                bloom.add(doc['link_id'])
+            
+            # Links issued while the scan was running
+            for link_id in self.pending:
+                bloom.add(link_id)
+            
+            if config.LINK_FILTER_SHARED and self.redis.connected:
+                if not await self.redis.exists(link_filter_key()):
+                    await self._publish(bloom)
+            
+            self.filter = bloom
+            self.ready = True
+            report = bloom.memory_report()
+            print(f"✅ Link filter built: {report['items']} links, "
+                  f"{report['memory_bytes'] // 1024} KB")
+            return True
+        except Exception as e:
+            print(f"⚠️  Link filter rebuild failed: {e}")
+            self.ready = False
+            return False
+        finally:
+            self.rebuilding = False
+            self.pending = []
+    
+    async def _publish(self, bloom: BloomFilter):
+        """Copy local bits into the shared Redis bitmap"""
+        offsets = [
+            byte * 8 + bit
+            for byte, value in enumerate(bloom.bits) if value
+            for bit in range(8) if value & (1 << bit)
+        ]
+        for start in range(0, len(offsets), 10000):
+            await self.redis.setbits(link_filter_key(), offsets[start:start + 10000])
+    
+    async def add(self, link_id: str):
+        """Record a newly issued link ID"""
+        if self.rebuilding:
+            self.pending.append(link_id)
+        if self.filter is None:
+            return
+        self.filter.add(link_id)
+        if config.LINK_FILTER_SHARED:
+            await self.redis.setbits(link_filter_key(), self.filter.offsets(link_id))
+    
+    async def might_exist(self, link_id: str) -> bool:
+        """False only if the link ID was definitely never issued"""
+        if not self.ready:
+            return True
+        
+        self.stats['checks'] += 1
+        if link_id in self.filter:
+            return True
+        
+        if config.LINK_FILTER_SHARED:
+            # Another instance may have issued it since our rebuild
+            bits = await self.redis.getbits(link_filter_key(), self.filter.offsets(link_id))
+            if bits is None or all(bits):
+                return True
+            # A bitmap lost from Redis reads as all zeros
+            if not await self.redis.exists(link_filter_key()):
+                return True
+        
+        self.stats['rejected'] += 1
+        return False
+    
+    def get_stats(self) -> dict:
+        """Get check counters and filter memory report"""
+        stats = dict(self.stats)
+        if self.filter:
+            stats.update(self.filter.memory_report())
+        return stats
+
+# Global link filter
+link_filter_service = LinkFilterService()
\ No newline at end of file
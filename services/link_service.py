@@ -1,11 +1,25 @@
 from typing import Optional
 from datetime import datetime, timedelta
 from database.models.link import Link
+from database.models.file import File
 from database.models.access_log import AccessLog
 from database.queries.link_queries import LinkQueries
+from database.queries.file_queries import FileQueries
 from database.queries.user_queries import UserQueries
-from utils.hash import generate_link_id
+from services.access_log_service import access_log_service
+from services.counter_service import counter_service
+from services.link_filter_service import link_filter_service
+from services.link_token_service import link_token_service
+from core.timers import timer_engine, TIMER_EXPIRE, TIMER_SELF_DESTRUCT
+from storage.cache_manager import cache_manager
+from utils.hash import generate_link_id, generate_signed_link_id, is_signed_link_id
 from utils.validators import calculate_expiry
+from utils.formatter import format_file_size
+from utils.constants import (
+    LINK_ACCESS_OK, LINK_ACCESS_NOT_FOUND, LINK_ACCESS_EXPIRED,
+    LINK_ACCESS_REVOKED, LINK_ACCESS_UNAVAILABLE, LINK_ACCESS_MESSAGES,
+    CACHE_TTL_LINK, CACHE_TTL_FILE
+)
 from config import config
 
 class LinkService:
@@ -13,6 +27,7 @@ class LinkService:
     
     def __init__(self, db):
         self.link_queries = LinkQueries(db)
+        self.file_queries = FileQueries(db)
         self.user_queries = UserQueries(db)
         self.db = db
     
@@ -26,85 +41,280 @@ class LinkService:
                           password: Optional[str] = None) -> Optional[Link]:
         """Create a new download link"""
         try:
-            link_id = generate_link_id()
-            
-            # Calculate expiry
-            expires_at = None
-            if expiry_days:
-                expires_at = calculate_expiry(expiry_days)
-            elif config.LINK_EXPIRY_DAYS > 0:
-                expires_at = calculate_expiry(config.LINK_EXPIRY_DAYS)
-            
-            link = Link(
-                link_id=link_id,
-                file_id=file_id,
-                user_id=user_id,
-                expires_at=expires_at,
-                max_access=max_access,
-                self_destruct=self_destruct,
-                self_destruct_after=self_destruct_after,
-                password=password
-            )
+            link = self.build_link(file_id, user_id, expiry_days, max_access,
+                                  self_destruct, self_destruct_after, password)
             
             success = await self.link_queries.create_link(link)
-            return link if success else None
+            if not success:
+                return None
+            
+            await self.register_link(link)
+            await cache_manager.bump_list_version(user_id)
+            return link
         except Exception as e:
             print(f"Error creating link: {e}")
             return None
     
+    @staticmethod
+    def build_link(file_id: str,
+                  user_id: int,
+                  expiry_days: Optional[int] = None,
+                  max_access: Optional[int] = None,
+                  self_destruct: bool = False,
+                  self_destruct_after: Optional[int] = None,
+                  password: Optional[str] = None) -> Link:
+        """Build a link model with its expiry and ID"""
+        # Calculate expiry
+        expires_at = None
+        if expiry_days:
+            expires_at = calculate_expiry(expiry_days)
+        elif config.LINK_EXPIRY_DAYS > 0:
+            expires_at = calculate_expiry(config.LINK_EXPIRY_DAYS)
+        
+        # Links with no access caps can be verified from the ID alone
+        link_id = None
+        signed = False
+        if config.ENABLE_SIGNED_LINKS and not (max_access or self_destruct or password):
+            try:
+                link_id = generate_signed_link_id(
+                    file_id, expires_at, config.LINK_TOKEN_EPOCH, config.JWT_SECRET
+                )
+                signed = True
+            except ValueError:
+                pass
+        if not link_id:
+            link_id = generate_link_id()
+        
+        return Link(
+            link_id=link_id,
+            file_id=file_id,
+            user_id=user_id,
+            expires_at=expires_at,
+            max_access=max_access,
+            self_destruct=self_destruct,
+            self_destruct_after=self_destruct_after,
+            password=password,
+            signed=signed
+        )
+    
+    async def register_link(self, link: Link):
+        """Register a newly stored link with the ID filter and expiry timers"""
+        await link_filter_service.add(link.link_id)
+        if link.expires_at:
+            await timer_engine.schedule(TIMER_EXPIRE, link.link_id, link.expires_at)
+    
     async def get_link(self, link_id: str) -> Optional[Link]:
         """Get link by ID"""
         return await self.link_queries.get_link(link_id)
     
     async def validate_link_access(self, link: Link) -> tuple[bool, Optional[str]]:
         """Validate if link can be accessed"""
-        if not link.is_accessible():
-            if link.status == 'revoked':
-                return False, "❌ This link has been revoked."
-            elif link.status == 'expired':
-                return False, "❌ This link has expired."
-            elif link.expires_at and datetime.utcnow() > link.expires_at:
-                # Mark as expired
-                await self.link_queries.update_link(link.link_id, {'status': 'expired'})
-                return False, "❌ This link has expired."
-            elif link.max_access and link.access_count >= link.max_access:
-                return False, "❌ This link has reached its maximum access limit."
-            elif link.self_destruct and link.first_accessed_at and link.self_destruct_after:
-                elapsed = (datetime.utcnow() - link.first_accessed_at).total_seconds()
-                if elapsed > link.self_destruct_after:
-                    return False, "❌ This link has self-destructed."
-            else:
-                return False, "❌ This link is not accessible."
+        reason = link.denial_reason()
+        if reason is None:
+            return True, None
         
-        return True, None
+        await self._record_denial(link, reason)
+        return False, LINK_ACCESS_MESSAGES[reason]
     
-    async def access_link(self, link_id: str, user_id: Optional[int] = None) -> tuple[bool, Optional[str]]:
-        """Record link access"""
-        link = await self.get_link(link_id)
+    async def redeem_link(self, link_id: str, user_id: Optional[int] = None) -> tuple[Optional[Link], str]:
+        """Validate and record a link access in one conditional update.
+        
+        Returns the post-update link and LINK_ACCESS_OK on success, or None and
+        a reason code (see utils.constants.LINK_ACCESS_MESSAGES) on refusal.
+        """
+        link = await self.link_queries.redeem_link(link_id)
         if not link:
-            return False, "❌ Link not found."
+            return None, await self._denial_reason(link_id)
         
-        # Validate access
-        valid, error = await self.validate_link_access(link)
-        if not valid:
-            return False, error
+        await self._on_redeemed(link)
+        await self._log_access(link_id, link.file_id, user_id)
+        return link, LINK_ACCESS_OK
+    
+    async def _on_redeemed(self, link: Link):
+        """Start the self-destruct countdown on a link's first access"""
+        if link.max_access and link.access_count >= link.max_access:
+            # The last allowed access changes how the owner's list shows it
+            await cache_manager.bump_list_version(link.user_id)
+        if (link.self_destruct and link.self_destruct_after
+                and link.first_accessed_at == link.last_accessed_at):
+            await timer_engine.schedule(
+                TIMER_SELF_DESTRUCT,
+                link.link_id,
+                link.first_accessed_at + timedelta(seconds=link.self_destruct_after)
+            )
+    
+    async def _denial_reason(self, link_id: str) -> str:
+        """Work out why a redemption was refused (slow path only)"""
+        link = await self.link_queries.get_link(link_id)
+        if not link:
+            await cache_manager.cache_dead_link(link_id, LINK_ACCESS_NOT_FOUND)
+            return LINK_ACCESS_NOT_FOUND
+        
+        reason = link.denial_reason()
+        if reason is None:
+            # Lost a race with a concurrent update; don't cache anything
+            await cache_manager.invalidate_link(link_id)
+            return LINK_ACCESS_UNAVAILABLE
+        
+        await self._record_denial(link, reason)
+        return reason
+    
+    async def _record_denial(self, link: Link, reason: str):
+        """Persist an expiry transition and cache the negative outcome"""
+        if reason == LINK_ACCESS_EXPIRED and link.status == 'active':
+            # Mark as expired
+            if await self.link_queries.update_link(link.link_id, {'status': 'expired'}):
+                await cache_manager.bump_list_version(link.user_id)
+        await cache_manager.cache_dead_link(link.link_id, reason)
+    
+    async def get_download_descriptor(self, link_id: str) -> dict:
+        """Get everything needed to serve a link, from cache when possible.
         
-        # Set first access time if needed
-        if not link.first_accessed_at:
-            await self.link_queries.set_first_access(link_id)
+        Dead links resolve to a cached {'dead_reason', 'message'} entry so
+        repeat hits cost a single Redis GET.
+        """
+        descriptor = await cache_manager.get_cached_link(link_id)
+        if descriptor:
+            return descriptor
         
-        # Increment access count
-        await self.link_queries.increment_access(link_id)
+        link = await self.link_queries.get_link(link_id)
+        file = await self.file_queries.get_file(link.file_id) if link else None
+        if not link or not file:
+            await cache_manager.cache_dead_link(link_id, LINK_ACCESS_NOT_FOUND)
+            return {'dead_reason': LINK_ACCESS_NOT_FOUND}
         
-        # Log access
+        reason = link.denial_reason()
+        if reason:
+            await self._record_denial(link, reason)
+            return {'dead_reason': reason}
+        
+        descriptor = self._build_descriptor(link, file)
+        ttl = CACHE_TTL_LINK
+        if link.expires_at:
+            ttl = min(ttl, int((link.expires_at - datetime.utcnow()).total_seconds()))
+        if ttl > 0:
+            await cache_manager.cache_link(link_id, descriptor, ttl)
+        return descriptor
+    
+    async def get_file_descriptor(self, file_id: str) -> Optional[dict]:
+        """Get the cached delivery fields of a file"""
+        descriptor = await cache_manager.get_cached_file(file_id)
+        if descriptor:
+            return descriptor
+        
+        file = await self.file_queries.get_file(file_id)
+        if not file:
+            return None
+        
+        descriptor = self._build_file_descriptor(file)
+        await cache_manager.cache_file(file_id, descriptor, CACHE_TTL_FILE)
+        return descriptor
+    
+    @staticmethod
+    def _build_file_descriptor(file: File) -> dict:
+        """Flatten the file location into a cacheable dict"""
+        return {
+            'file_id': file.file_id,
+            'telegram_message_id': file.telegram_message_id,
+            'storage_channel_id': file.storage_channel_id,
+            'mirrors': file.mirrors,
+            'telegram_file_id': file.telegram_file_id,
+            'file_unique_id': file.file_unique_id,
+            'file_name': file.file_name,
+            'file_size': file.file_size,
+            'file_type': file.file_type,
+            'caption': f"📁 {file.file_name}\n\n💾 Size: {format_file_size(file.file_size)}"
+        }
+    
+    @classmethod
+    def _build_descriptor(cls, link: Link, file: File) -> dict:
+        """Flatten the link policy and file location into a cacheable dict"""
+        return {
+            **cls._build_file_descriptor(file),
+            'link_id': link.link_id,
+            'user_id': link.user_id,
+            'status': link.status,
+            'max_access': link.max_access,
+            'self_destruct': link.self_destruct,
+            'self_destruct_after': link.self_destruct_after,
+            'has_password': bool(link.password),
+            'expires_at': link.expires_at.isoformat() if link.expires_at else None
+        }
+    
+    @staticmethod
+    def _is_uncapped(descriptor: dict) -> bool:
+        """Links whose only dynamic checks are status and expiry"""
+        return not (descriptor['max_access'] or descriptor['self_destruct']
+                    or descriptor['has_password'])
+    
+    async def resolve_download(self, link_id: str, user_id: Optional[int] = None) -> tuple[Optional[dict], str]:
+        """Validate a link and record the access, returning its download descriptor.
+        
+        Uncapped links are checked against the cached descriptor and their
+        access count is recorded write-behind; capped or self-destructing
+        links still go through the atomic redeem_link update.
+        """
+        # Signed links are verified from the ID itself, no links lookup
+        if is_signed_link_id(link_id):
+            return await self._resolve_signed_download(link_id, user_id)
+        
+        # Reject link IDs that were never issued without touching MongoDB
+        if not await link_filter_service.might_exist(link_id):
+            return None, LINK_ACCESS_NOT_FOUND
+        
+        descriptor = await self.get_download_descriptor(link_id)
+        if descriptor.get('dead_reason'):
+            return None, descriptor['dead_reason']
+        
+        if self._is_uncapped(descriptor):
+            expires_at = descriptor['expires_at']
+            if expires_at and datetime.utcnow() > datetime.fromisoformat(expires_at):
+                try:
+                    if await self.link_queries.expire_if_active(link_id):
+                        await cache_manager.bump_list_version(descriptor['user_id'])
+                except Exception as e:
+                    print(f"Error expiring link: {e}")
+                await cache_manager.cache_dead_link(link_id, LINK_ACCESS_EXPIRED)
+                return None, LINK_ACCESS_EXPIRED
+            await counter_service.increment('links', 'access_count', link_id)
+        else:
+            link = await self.link_queries.redeem_link(link_id)
+            if not link:
+                return None, await self._denial_reason(link_id)
+            await self._on_redeemed(link)
+        
+        await self._log_access(link_id, descriptor['file_id'], user_id)
+        return descriptor, LINK_ACCESS_OK
+    
+    async def _resolve_signed_download(self, link_id: str, user_id: Optional[int]) -> tuple[Optional[dict], str]:
+        """Resolve a signed link from its claims and the cached file descriptor"""
+        claims, reason = link_token_service.verify(link_id)
+        if not claims:
+            return None, reason
+        
+        descriptor = await self.get_file_descriptor(claims['file_id'])
+        if not descriptor:
+            return None, LINK_ACCESS_NOT_FOUND
+        
+        await counter_service.increment('links', 'access_count', link_id)
+        await self._log_access(link_id, descriptor['file_id'], user_id)
+        return {**descriptor, 'link_id': link_id}, LINK_ACCESS_OK
+    
+    async def _log_access(self, link_id: str, file_id: str, user_id: Optional[int]):
+        """Queue a successful access for the buffered log writer"""
         access_log = AccessLog(
             link_id=link_id,
-            file_id=link.file_id,
+            file_id=file_id,
             user_id=user_id,
             success=True
         )
-        await self.db.access_logs.insert_one(access_log.to_dict())
-        
+        await access_log_service.log(access_log)
+    
+    async def access_link(self, link_id: str, user_id: Optional[int] = None) -> tuple[bool, Optional[str]]:
+        """Record link access"""
+        link, reason = await self.redeem_link(link_id, user_id)
+        if not link:
+            return False, LINK_ACCESS_MESSAGES[reason]
         return True, None
     
     async def revoke_link(self, link_id: str, user_id: int) -> bool:
@@ -113,11 +323,28 @@ class LinkService:
         if not link or link.user_id != user_id:
             return False
         
-        return await self.link_queries.revoke_link(link_id)
+        success = await self.link_queries.revoke_link(link_id)
+        if success:
+            await cache_manager.cache_dead_link(link_id, LINK_ACCESS_REVOKED)
+            await cache_manager.bump_list_version(user_id)
+            if link.signed:
+                link_token_service.revoke(link_id)
+        return success
+    
+    async def get_user_links(self, user_id: int, active_only: bool = False,
+                             cursor: Optional[str] = None, limit: int = 50):
+        """Get a page of user's links with the next and previous page cursors"""
+        links, next_cursor, prev_cursor = await self.link_queries.get_user_links(user_id, active_only, cursor, limit)
+        return await counter_service.apply_pending('links', 'access_count', links), next_cursor, prev_cursor
     
-    async def get_user_links(self, user_id: int, active_only: bool = False):
-        """Get user's links"""
-        return await self.link_queries.get_user_links(user_id, active_only)
+    async def get_user_links_with_files(self, user_id: int, active_only: bool = False,
+                                        cursor: Optional[str] = None, limit: int = 50):
+        """Get a page of user's links, each with its file, and the page cursors"""
+        pairs, next_cursor, prev_cursor = await self.link_queries.get_user_links_with_files(
+            user_id, active_only, cursor, limit
+        )
+        await counter_service.apply_pending('links', 'access_count', [link for link, _ in pairs])
+        return pairs, next_cursor, prev_cursor
     
     async def get_file_links(self, file_id: str):
         """Get all links for a file"""
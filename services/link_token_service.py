@@ -0,0 +1,58 @@
+"""Verification of signed (stateless) link IDs"""
+from datetime import datetime
+from typing import Optional, Set
+from utils.hash import verify_signed_link_id
+from utils.constants import LINK_ACCESS_EXPIRED, LINK_ACCESS_NOT_FOUND, LINK_ACCESS_REVOKED
+from config import config
+
+class LinkTokenService:
+    """Check signed link IDs against their claims and a revocation set"""
+    
+    def __init__(self):
+        self.revoked: Set[str] = set()
+        self.recent: Set[str] = set()
+    
+    async def refresh(self, db) -> bool:
+        """Reload revoked, still-unexpired signed links"""
+        self.recent = set()
+        try:
+            cursor = db.links.find(
+                {
+                    'signed': True,
+                    'status': 'revoked',
+                    '$or': [
+                        {'expires_at': None},
+                        {'expires_at': {'$gt': datetime.utcnow()}}
+                    ]
+                },
+                {'link_id': 1, '_id': 0}
+            )
+            revoked = {doc['link_id'] async for doc in cursor}
+            # Keep revocations made while the query was running
+            self.revoked = revoked | self.recent
+            return True
+        except Exception as e:
+            print(f"Error refreshing link revocations: {e}")
+            return False
+    
+    def revoke(self, link_id: str):
+        """Add a link to the local revocation set"""
+        self.revoked.add(link_id)
+        self.recent.add(link_id)
+    
+    def verify(self, link_id: str) -> tuple[Optional[dict], Optional[str]]:
+        """Verify a signed link ID.
+        
+        Returns its claims, or None and a link access reason code.
+        """
+        claims = verify_signed_link_id(link_id, config.JWT_SECRET)
+        if not claims:
+            return None, LINK_ACCESS_NOT_FOUND
+        if claims['epoch'] < config.LINK_TOKEN_EPOCH or link_id in self.revoked:
+            return None, LINK_ACCESS_REVOKED
+        if claims['expires_at'] and datetime.utcnow() > claims['expires_at']:
+            return None, LINK_ACCESS_EXPIRED
+        return claims, None
+
+# Global signed link verifier
+link_token_service = LinkTokenService()
\ No newline at end of file
@@ -0,0 +1,160 @@
+"""Paginated /myfiles, /links and /search views"""
+import hashlib
+from typing import List, Optional
+from database.models.file import File
+from services.file_service import FileService
+from services.link_service import LinkService
+from storage.cache_manager import cache_manager
+from utils.formatter import format_file_size, format_datetime, format_link, format_time_remaining
+from config import config
+
+class PageService:
+    """Render list pages with Prev/Next buttons and cache them.
+    
+    A page is {'text': ..., 'buttons': [[label, callback data], ...]}.
+    Pages are cached per user under a list version that uploads, deletes,
+    revokes, expiries and exhausted access caps bump, so one change
+    orphans every cached page of that user. A page turn is a cache hit or a single indexed query: a keyset
+    page for files and links, a lookup by ID of ranked results for search.
+    """
+    
+    def __init__(self, db):
+        self.file_service = FileService(db)
+        self.link_service = LinkService(db)
+        self.page_size = config.LIST_PAGE_SIZE
+    
+    async def get_page(self, user_id: int, view: str, number: int, token: str,
+                       bot_username: Optional[str] = None) -> Optional[dict]:
+        """A page of files, links or search results (None if there is nothing to show)"""
+        version = await cache_manager.get_list_version(user_id)
+        cache_token = f"{number}:{token}"
+        page = await cache_manager.get_cached_page(user_id, version, view, cache_token)
+        if page:
+            return page
+        
+        if view == 'files':
+            page = await self._files_page(user_id, number, token or None)
+        elif view == 'links':
+            page = await self._links_page(user_id, number, token or None, bot_username)
+        elif view == 'search':
+            page = await self._search_page(user_id, version, number, token)
+        if page:
+            await cache_manager.cache_page(user_id, version, view, cache_token, page)
+        return page
+    
+    async def start_search(self, user_id: int, query: str) -> Optional[dict]:
+        """Run a search and return its first page.
+        
+        Raises ValueError for malformed or too broad queries.
+        """
+        query_hash = hashlib.sha1(query.encode()).hexdigest()[:12]
+        page = await self.get_page(user_id, 'search', 1, query_hash)
+        if page:
+            return page
+        
+        files = await self.file_service.search_files(user_id, query, limit=config.SEARCH_RESULT_LIMIT)
+        if not files:
+            return None
+        
+        version = await cache_manager.get_list_version(user_id)
+        pageable = await cache_manager.cache_search_results(user_id, version, query_hash, {
+            'query': query,
+            'file_ids': [file.file_id for file in files],
+        })
+        # Without a results cache later pages could not be found again
+        page = self._render_search(
+            query, query_hash, files[:self.page_size], 1, len(files) if pageable else self.page_size
+        )
+        if pageable:
+            await cache_manager.cache_page(user_id, version, 'search', f"1:{query_hash}", page)
+        return page
+    
+    async def _files_page(self, user_id: int, number: int, cursor: Optional[str]) -> Optional[dict]:
+        files, next_cursor, prev_cursor = await self.file_service.get_user_files(user_id, cursor, self.page_size)
+        if not files:
+            return None
+        
+        response = f"📁 Your Files (page {number}):\n\n"
+        for idx, file in enumerate(files, (number - 1) * self.page_size + 1):
+            response += f"{idx}. {file.file_name}\n"
+            response += f"   💾 {format_file_size(file.file_size)}\n"
+            response += f"   📥 Downloads: {file.download_count}\n"
+            response += f"   📅 {format_datetime(file.created_at)}\n"
+            response += f"   🆔 `{file.file_id}`\n\n"
+        
+        response += "\nℹ️ Use /download <file_id> to download\n"
+        response += "ℹ️ Use /search <query> to search files"
+        return {'text': response, 'buttons': self._buttons('files', number, prev_cursor, next_cursor)}
+    
+    async def _links_page(self, user_id: int, number: int, cursor: Optional[str],
+                          bot_username: Optional[str]) -> Optional[dict]:
+        pairs, next_cursor, prev_cursor = await self.link_service.get_user_links_with_files(
+            user_id, active_only=True, cursor=cursor, limit=self.page_size
+        )
+        if not pairs:
+            return None
+        
+        response = f"🔗 Your Active Download Links (page {number}):\n\n"
+        for idx, (link, file) in enumerate(pairs, (number - 1) * self.page_size + 1):
+            download_link = format_link(link.link_id, bot_username)
+            time_remaining = format_time_remaining(link.expires_at) if link.expires_at else "Never"
+            
+            response += f"{idx}. {file.file_name}\n"
+            response += f"   💾 {format_file_size(file.file_size)}\n"
+            response += f"   🔗 {download_link}\n"
+            response += f"   📄 Accesses: {link.access_count}"
+            if link.max_access:
+                response += f"/{link.max_access}"
+            response += f"\n   ⏰ Expires: {time_remaining}\n"
+            response += f"   🆔 ID: `{link.link_id}`\n\n"
+        
+        response += "\nℹ️ Use /revoke <link_id> to revoke a link"
+        return {'text': response, 'buttons': self._buttons('links', number, prev_cursor, next_cursor)}
+    
+    async def _search_page(self, user_id: int, version: int, number: int, query_hash: str) -> Optional[dict]:
+        results = await cache_manager.get_cached_search_results(user_id, version, query_hash)
+        if not results:
+            return None
+        
+        start = (number - 1) * self.page_size
+        file_ids = results['file_ids'][start:start + self.page_size]
+        files = await self.file_service.file_queries.get_files(file_ids)
+        if not files:
+            return None
+        
+        # Keep the search ranking
+        order = {file_id: position for position, file_id in enumerate(file_ids)}
+        files.sort(key=lambda file: order[file.file_id])
+        return self._render_search(results['query'], query_hash, files, number, len(results['file_ids']))
+    
+    def _render_search(self, query: str, query_hash: str, files: List[File], number: int, total: int) -> dict:
+        response = f"🔍 Search Results for: {query}\n\n"
+        for idx, file in enumerate(files, (number - 1) * self.page_size + 1):
+            response += f"{idx}. {file.file_name}\n"
+            response += f"   💾 {format_file_size(file.file_size)}\n"
+            response += f"   📅 {format_datetime(file.created_at)}\n"
+            response += f"   🆔 `{file.file_id}`\n\n"
+        
+        response += "\nℹ️ Use /download <file_id> to download a file"
+        has_next = number * self.page_size < total
+        return {
+            'text': response,
+            'buttons': self._buttons(
+                'search', number,
+                query_hash if number > 1 else None,
+                query_hash if has_next else None
+            )
+        }
+    
+    def _buttons(self, view: str, number: int, prev_token: Optional[str], next_token: Optional[str]) -> list:
+        """Prev/Next row as [label, callback data] pairs"""
+        buttons = []
+        if prev_token:
+            buttons.append(["⬅️ Prev", page_callback(view, number - 1, prev_token)])
+        if next_token:
+            buttons.append(["Next ➡️", page_callback(view, number + 1, next_token)])
+        return buttons
+
+def page_callback(view: str, number: int, token: str) -> str:
+    """Callback data of a page button (Telegram allows 64 bytes)"""
+    return f"pg:{view}:{number}:{token}"
\ No newline at end of file
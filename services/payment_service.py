@@ -1,5 +1,6 @@
 """Payment service (for future payment integration)"""
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
+from database.pagination import fetch_page
 
 class PaymentService:
     """Service for payment processing (placeholder for future use)"""
@@ -26,14 +27,12 @@ class PaymentService:
         print(f"Refunding payment: {payment_id}")
         return False
     
-    async def get_payment_history(self, user_id: int, limit: int = 50) -> list:
-        """Get user's payment history"""
-        cursor = self.collection.find(
-            {'user_id': user_id}
-        ).sort('created_at', -1).limit(limit)
-        
-        payments = []
-        async for doc in cursor:
+    async def get_payment_history(self, user_id: int, cursor: Optional[str] = None,
+                                  limit: int = 50) -> Tuple[List[Dict[str, Any]], Optional[str], Optional[str]]:
+        """Get a page of user's payment history with the next and previous page cursors"""
+        payments, next_cursor, prev_cursor = await fetch_page(
+            self.collection, {'user_id': user_id}, [('created_at', -1), ('_id', -1)], limit, cursor
+        )
+        for doc in payments:
             doc.pop('_id', None)
-            payments.append(doc)
-        return payments
\ No newline at end of file
+        return payments, next_cursor, prev_cursor
\ No newline at end of file
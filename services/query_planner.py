@@ -0,0 +1,157 @@
+"""Index selection for structured /search queries"""
+from typing import Any, Dict, List, Optional
+from database.models.file import File
+from database.queries.file_queries import FileQueries
+from database.queries.search_queries import SearchQueries
+from utils.search_syntax import SearchQuery
+from utils.trigrams import literal_pattern, trigrams
+from config import config
+
+# Partial (is_deleted: False) compound indexes on files a plan may use
+FILTER_INDEXES = [
+    [('user_id', 1), ('created_at', -1), ('_id', -1)],
+    [('user_id', 1), ('file_type', 1), ('created_at', -1)],
+    [('user_id', 1), ('tags', 1), ('created_at', -1)],
+    [('user_id', 1), ('file_size', -1)],
+    [('user_id', 1), ('download_count', -1)],
+]
+
+# Files found through the trigram postings are fetched by ID
+NAME_INDEX = [('file_id', 1)]
+
+RANGE_OPERATORS = {'$gt', '$gte', '$lt', '$lte'}
+
+class SearchPlan:
+    """One way of answering a query and what it would cost"""
+    
+    def __init__(self, index: List[tuple], bounded: List[str], residual: List[str],
+                 estimate: int, provides_sort: bool, trigram: Optional[str] = None):
+        self.index = index
+        self.bounded = bounded  # fields the index range covers
+        self.residual = residual  # conditions checked on each fetched file
+        self.estimate = estimate  # index entries in range (capped at the scan limit)
+        self.provides_sort = provides_sort
+        self.trigram = trigram  # name plans: posting list to read
+    
+    @property
+    def name(self) -> str:
+        if self.trigram is not None:
+            return 'trigram'
+        return '_'.join(f"{field}_{direction}" for field, direction in self.index)
+    
+    def scanned(self, limit: int) -> int:
+        """Files the plan reads to return limit results"""
+        if self.provides_sort and not self.residual:
+            return min(self.estimate, limit)
+        return self.estimate
+
+class QueryPlanner:
+    """Pick the cheapest index for a structured search and run it.
+    
+    Each candidate index is probed with a count capped at SEARCH_MAX_SCAN
+    over the conditions it can bound. Free text is served from the
+    trigram postings when its rarest trigram is rare enough and matched
+    as a literal name fragment otherwise. A plan that would read more
+    than SEARCH_MAX_SCAN files is refused.
+    """
+    
+    def __init__(self, db):
+        self.file_queries = FileQueries(db)
+        self.search_queries = SearchQueries(db)
+        self.max_scan = config.SEARCH_MAX_SCAN
+        self.candidates = config.SEARCH_CANDIDATES
+        self.stats = {
+            'plans': {},
+            'refused': 0,
+        }
+    
+    async def plan(self, user_id: int, query: SearchQuery, limit: int = 20) -> Optional[SearchPlan]:
+        """Cheapest plan, or None when the text cannot match anything.
+        
+        Raises ValueError when every plan would scan too many files.
+        """
+        predicates = query.predicates()
+        plans = []
+        
+        grams = trigrams(query.text)
+        if grams:
+            frequencies = await self.search_queries.get_frequencies(user_id, grams)
+            rarest = min(grams, key=frequencies.get)
+            if not frequencies[rarest]:
+                return None
+            if frequencies[rarest] <= self.candidates:
+                plans.append(SearchPlan(
+                    NAME_INDEX, [], [*predicates, 'file_name'], frequencies[rarest], False, trigram=rarest
+                ))
+        
+        for index in FILTER_INDEXES:
+            plan = await self._probe(user_id, index, predicates, query)
+            if plan:
+                plans.append(plan)
+        
+        # Every sort key leads one of the indexes, so there is always a plan
+        best = min(plans, key=lambda plan: (plan.scanned(limit), not plan.provides_sort, len(plan.residual)))
+        if best.scanned(limit) > self.max_scan:
+            self.stats['refused'] += 1
+            raise ValueError(
+                f"This search would scan more than {self.max_scan} files. "
+                f"Narrow it with type:, tag:, size or after:/before: filters."
+            )
+        self.stats['plans'][best.name] = self.stats['plans'].get(best.name, 0) + 1
+        return best
+    
+    async def execute(self, user_id: int, query: SearchQuery, plan: SearchPlan, limit: int = 20) -> List[File]:
+        """Run a plan"""
+        filter_ = {'user_id': user_id, 'is_deleted': False, **query.predicates()}
+        if query.text:
+            filter_['file_name'] = {'$regex': literal_pattern(query.text), '$options': 'i'}
+        
+        if plan.trigram is not None:
+            postings = await self.search_queries.get_recent_postings(user_id, plan.trigram, self.candidates)
+            file_ids = [file_id for file_id, _ in postings]
+            overlap = await self.search_queries.count_overlap(user_id, file_ids, trigrams(query.text))
+            needed = len(trigrams(query.text))
+            filter_['file_id'] = {'$in': [file_id for file_id in file_ids if overlap.get(file_id) == needed]}
+        
+        field, direction = query.sort
+        sort = [(field, direction)]
+        if field != 'created_at':
+            sort.append(('created_at', -1))
+        return await self.file_queries.find_with_index(filter_, plan.index, sort, limit)
+    
+    async def _probe(self, user_id: int, index: List[tuple], predicates: Dict[str, Any],
+                     query: SearchQuery) -> Optional[SearchPlan]:
+        """Cost of answering the query through one index (None if it neither bounds nor sorts)"""
+        bounded, provides_sort = [], False
+        sort_field = query.sort[0]
+        for field, _ in index[1:]:
+            condition = predicates.get(field)
+            if condition is None:
+                provides_sort = field == sort_field
+                break
+            if isinstance(condition, dict) and set(condition) & RANGE_OPERATORS:
+                # A range ends the bounds; it still orders by its own field
+                bounded.append(field)
+                provides_sort = field == sort_field
+                break
+            bounded.append(field)
+        
+        if not bounded and not provides_sort:
+            return None
+        
+        probe = {'user_id': user_id, 'is_deleted': False}
+        for field in bounded:
+            condition = predicates[field]
+            # Only the first of several tags bounds a multikey index
+            if field == 'tags' and isinstance(condition, dict):
+                condition = condition['$all'][0]
+            probe[field] = condition
+        
+        residual = [field for field in predicates if field not in bounded]
+        if 'tags' in bounded and isinstance(predicates['tags'], dict):
+            residual.append('tags')
+        if query.text:
+            residual.append('file_name')
+        
+        estimate = await self.file_queries.count_in_range(probe, index, self.max_scan + 1)
+        return SearchPlan(index, bounded, residual, estimate, provides_sort)
\ No newline at end of file
@@ -0,0 +1,94 @@
+"""Substring search over file names"""
+import math
+from typing import Dict, List
+from database.models.file import File
+from database.queries.file_queries import FileQueries
+from database.queries.search_queries import SearchQueries
+from services.query_planner import QueryPlanner
+from utils.search_syntax import parse_search
+from utils.trigrams import normalize, trigrams
+from config import config
+
+class SearchService:
+    """Answer /search from per-user trigram postings.
+    
+    Each file name is indexed as the trigrams of its normalized form. A
+    query reads the newest postings of its two rarest trigrams (at most
+    SEARCH_CANDIDATES each), scores those files by how many of the query
+    trigrams they contain and confirms literal matches on the names, so
+    the work per query stays bounded however many files a user has.
+    """
+    
+    def __init__(self, db):
+        self.search_queries = SearchQueries(db)
+        self.file_queries = FileQueries(db)
+        self.planner = QueryPlanner(db)
+        self.candidates = config.SEARCH_CANDIDATES
+        self.min_overlap = config.SEARCH_MIN_OVERLAP
+    
+    async def index_files(self, files: List[File]) -> bool:
+        """Add new files to their owners' indexes"""
+        entries: Dict[int, list] = {}
+        for file in files:
+            entries.setdefault(file.user_id, []).append(
+                (file.file_id, file.created_at, trigrams(file.file_name))
+            )
+        results = [
+            await self.search_queries.add_postings(user_id, user_entries)
+            for user_id, user_entries in entries.items()
+        ]
+        return all(results)
+    
+    async def remove_file(self, file: File) -> bool:
+        """Drop a deleted file from its owner's index"""
+        return await self.search_queries.remove_postings(file.user_id, file.file_id)
+    
+    async def search(self, user_id: int, query: str, limit: int = 20) -> List[File]:
+        """Files matching a /search query.
+        
+        Filters such as type:video or size>100MB go through the query
+        planner. Plain text is matched literally: exact substring matches
+        rank first, then names sharing most of its trigrams, newest first
+        within each. Raises ValueError for malformed or too broad queries.
+        """
+        parsed = parse_search(query)
+        if parsed.has_filters():
+            parsed.text = parsed.text[:config.SEARCH_MAX_QUERY_LENGTH]
+            plan = await self.planner.plan(user_id, parsed, limit)
+            if not plan:
+                return []
+            return await self.planner.execute(user_id, parsed, plan, limit)
+        
+        text = normalize(parsed.text)[:config.SEARCH_MAX_QUERY_LENGTH]
+        if not text:
+            return []
+        grams = trigrams(text)
+        if not grams:
+            # Too short for trigrams
+            return await self.file_queries.search_files(user_id, text, scan_limit=self.candidates)
+        
+        frequencies = await self.search_queries.get_frequencies(user_id, grams)
+        present = sorted((trigram for trigram in grams if frequencies[trigram]), key=frequencies.get)
+        if not present:
+            return []
+        
+        candidates = {}
+        for trigram in present[:2]:
+            for file_id, created_at in await self.search_queries.get_recent_postings(
+                    user_id, trigram, self.candidates):
+                candidates[file_id] = created_at
+        
+        overlap = await self.search_queries.count_overlap(user_id, list(candidates), grams)
+        needed = max(1, math.ceil(len(grams) * self.min_overlap))
+        ranked = sorted(
+            (file_id for file_id, count in overlap.items() if count >= needed),
+            key=lambda file_id: (overlap[file_id], candidates[file_id]),
+            reverse=True
+        )[:limit * 2]
+        
+        files = await self.file_queries.get_files(ranked)
+        files.sort(
+            key=lambda file: (text in normalize(file.file_name), overlap[file.file_id], file.created_at),
+            reverse=True
+        )
+        return files[:limit]
\ No newline at end of file
@@ -32,6 +32,6 @@ class SecurityService:
     def validate_channel_access(self, channel_id: int) -> bool:
         """Validate bot has access to channel"""
         from config import config
-        return channel_id == config.STORAGE_CHANNEL_ID
+        return channel_id == config.STORAGE_CHANNEL_ID or channel_id in config.STORAGE_CHANNEL_IDS
 
 security_service = SecurityService()
\ No newline at end of file
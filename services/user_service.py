@@ -2,6 +2,7 @@ from datetime import datetime
 from typing import Optional
 from database.models.user import User
 from database.queries.user_queries import UserQueries
+from services.counter_service import counter_service
 from config import config
 
 class UserService:
@@ -76,9 +77,11 @@ class UserService:
             'last_active': datetime.utcnow()
         })
     
-    async def get_all_users(self, skip: int = 0, limit: int = 100):
-        """Get all users"""
-        return await self.user_queries.get_all_users(skip, limit)
+    async def get_all_users(self, cursor: Optional[str] = None, limit: int = 100):
+        """Get a page of users with the next and previous page cursors"""
+        users, next_cursor, prev_cursor = await self.user_queries.get_all_users(cursor, limit)
+        await counter_service.apply_pending('users', 'total_files', users)
+        return await counter_service.apply_pending('users', 'total_size', users), next_cursor, prev_cursor
     
     async def get_user_stats(self, user_id: int) -> dict:
         """Get user statistics"""
@@ -86,6 +89,8 @@ class UserService:
         if not user:
             return {}
         
+        await counter_service.apply_pending('users', 'total_files', [user])
+        await counter_service.apply_pending('users', 'total_size', [user])
         return {
             'total_files': user.total_files,
             'total_size': user.total_size,
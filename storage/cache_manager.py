@@ -1,8 +1,13 @@
 """Cache manager for frequently accessed data"""
 from typing import Optional, Any
 from cache.redis_client import redis_client
-from cache.keys import file_key, link_key, user_key
-from utils.constants import CACHE_TTL_FILE, CACHE_TTL_LINK, CACHE_TTL_USER
+from cache.keys import (
+    file_key, link_key, user_key, list_version_key, page_key, search_results_key
+)
+from utils.constants import (
+    CACHE_TTL_FILE, CACHE_TTL_LINK, CACHE_TTL_USER, CACHE_TTL_DEAD_LINK,
+    CACHE_TTL_MISSING_LINK, CACHE_TTL_PAGE, LINK_ACCESS_NOT_FOUND, LINK_ACCESS_MESSAGES
+)
 import json
 
 class CacheManager:
@@ -21,6 +26,11 @@ class CacheManager:
         key = file_key(file_id)
         return await self.redis.get(key)
     
+    async def invalidate_file(self, file_id: str) -> bool:
+        """Invalidate file cache"""
+        key = file_key(file_id)
+        return await self.redis.delete(key)
+    
     async def cache_link(self, link_id: str, link_data: dict, ttl: int = CACHE_TTL_LINK) -> bool:
         """Cache link data"""
         key = link_key(link_id)
@@ -31,6 +41,16 @@ class CacheManager:
         key = link_key(link_id)
         return await self.redis.get(key)
     
+    async def cache_dead_link(self, link_id: str, reason: str, ttl: Optional[int] = None) -> bool:
+        """Cache a negative link outcome in place of its data"""
+        if ttl is None:
+            ttl = CACHE_TTL_MISSING_LINK if reason == LINK_ACCESS_NOT_FOUND else CACHE_TTL_DEAD_LINK
+        key = link_key(link_id)
+        return await self.redis.set(key, {
+            'dead_reason': reason,
+            'message': LINK_ACCESS_MESSAGES[reason]
+        }, ttl)
+    
     async def invalidate_link(self, link_id: str) -> bool:
         """Invalidate link cache"""
         key = link_key(link_id)
@@ -51,6 +71,32 @@ class CacheManager:
         key = user_key(user_id)
         return await self.redis.delete(key)
     
+    async def get_list_version(self, user_id: int) -> int:
+        """Current version of a user's lists (0 without Redis)"""
+        return await self.redis.get(list_version_key(user_id)) or 0
+    
+    async def bump_list_version(self, user_id: int) -> int:
+        """Orphan every cached page of a user's lists"""
+        return await self.redis.increment(list_version_key(user_id))
+    
+    async def cache_page(self, user_id: int, version: int, view: str, token: str,
+                         page: dict, ttl: int = CACHE_TTL_PAGE) -> bool:
+        """Cache a rendered list page"""
+        return await self.redis.set(page_key(user_id, version, view, token), page, ttl)
+    
+    async def get_cached_page(self, user_id: int, version: int, view: str, token: str) -> Optional[dict]:
+        """Get a rendered list page"""
+        return await self.redis.get(page_key(user_id, version, view, token))
+    
+    async def cache_search_results(self, user_id: int, version: int, query_hash: str,
+                                   results: dict, ttl: int = CACHE_TTL_PAGE) -> bool:
+        """Cache a search query and its ranked file IDs"""
+        return await self.redis.set(search_results_key(user_id, version, query_hash), results, ttl)
+    
+    async def get_cached_search_results(self, user_id: int, version: int, query_hash: str) -> Optional[dict]:
+        """Get a search query and its ranked file IDs"""
+        return await self.redis.get(search_results_key(user_id, version, query_hash))
+    
     async def clear_all(self) -> bool:
         """Clear all cache (use with caution)"""
         if self.redis.connected:
@@ -1,73 +1,278 @@
 from pyrogram import Client
 from pyrogram.types import Message
-from typing import Optional
+from typing import Dict, List, Optional, Set, Tuple
 from config import config
+from core.client_pool import client_pool
+from core.rate_scheduler import on_dispatch
+from storage.replicas import replica_selector
+from storage.storage_channels import is_channel_error, storage_channels
 import asyncio
 
+# Losing hedged attempts that were already sent and must be cleaned up
+_discarded: Set[asyncio.Task] = set()
+
 class ChannelManager:
-    """Manage file storage in Telegram channel"""
+    """Manage file storage in Telegram channels"""
     
     def __init__(self, client: Client):
         self.client = client
         self.channel_id = config.STORAGE_CHANNEL_ID
     
-    async def upload_file(self, file_path: str, caption: Optional[str] = None) -> Optional[Message]:
+    async def upload_file(self,
+                          file_path: str,
+                          caption: Optional[str] = None,
+                          channel_id: Optional[int] = None) -> Optional[Message]:
         """Upload file to storage channel"""
+        channel_id = storage_channels.resolve(channel_id)
         try:
             message = await self.client.send_document(
-                chat_id=self.channel_id,
+                chat_id=channel_id,
                 document=file_path,
                 caption=caption
             )
+            storage_channels.record_write(channel_id, True, get_media_file_size(message))
             return message
         except Exception as e:
+            storage_channels.record_write(channel_id, False, error=str(e))
             print(f"Error uploading to channel: {e}")
             return None
     
-    async def get_file(self, message_id: int) -> Optional[Message]:
+    async def store_messages(self,
+                             from_chat_id: int,
+                             message_ids: List[int],
+                             channel_id: Optional[int] = None) -> List[Message]:
+        """Forward user messages into a storage channel with one call"""
+        channel_id = storage_channels.resolve(channel_id)
+        try:
+            messages = await self.client.forward_messages(
+                chat_id=channel_id,
+                from_chat_id=from_chat_id,
+                message_ids=message_ids
+            )
+            if not isinstance(messages, list):
+                messages = [messages] if messages else []
+            storage_channels.record_write(
+                channel_id, True, sum(get_media_file_size(message) for message in messages)
+            )
+            return messages
+        except Exception as e:
+            storage_channels.record_write(channel_id, False, error=str(e))
+            print(f"Error storing messages: {e}")
+            return []
+    
+    async def get_file(self, message_id: int, channel_id: Optional[int] = None) -> Optional[Message]:
         """Get file message from channel"""
+        channel_id = storage_channels.resolve(channel_id)
         try:
             message = await self.client.get_messages(
-                chat_id=self.channel_id,
+                chat_id=channel_id,
                 message_ids=message_id
             )
+            storage_channels.record_read(channel_id, True)
             return message
         except Exception as e:
+            storage_channels.record_read(channel_id, False, str(e))
             print(f"Error getting file from channel: {e}")
             return None
     
-    async def forward_file(self, message_id: int, to_chat_id: int) -> Optional[Message]:
+    async def forward_file(self,
+                           message_id: int,
+                           to_chat_id: int,
+                           channel_id: Optional[int] = None) -> Optional[Message]:
         """Forward file from channel to user"""
+        channel_id = storage_channels.resolve(channel_id)
         try:
             message = await self.client.forward_messages(
                 chat_id=to_chat_id,
-                from_chat_id=self.channel_id,
+                from_chat_id=channel_id,
                 message_ids=message_id
             )
+            storage_channels.record_read(channel_id, True)
             return message[0] if isinstance(message, list) else message
         except Exception as e:
+            if is_channel_error(e):
+                storage_channels.record_read(channel_id, False, str(e))
             print(f"Error forwarding file: {e}")
             return None
     
-    async def copy_file(self, message_id: int, to_chat_id: int, caption: Optional[str] = None) -> Optional[Message]:
+    async def copy_file(self,
+                        message_id: int,
+                        to_chat_id: int,
+                        caption: Optional[str] = None,
+                        channel_id: Optional[int] = None) -> Optional[Message]:
         """Copy file from channel to user"""
+        channel_id = storage_channels.resolve(channel_id)
         try:
             message = await self.client.copy_message(
                 chat_id=to_chat_id,
-                from_chat_id=self.channel_id,
+                from_chat_id=channel_id,
                 message_id=message_id,
                 caption=caption
             )
+            storage_channels.record_read(channel_id, True)
             return message
         except Exception as e:
+            if is_channel_error(e):
+                storage_channels.record_read(channel_id, False, str(e))
             print(f"Error copying file: {e}")
             return None
     
-    async def delete_file(self, message_id: int) -> bool:
+    async def send_cached_file(self,
+                               telegram_file_id: str,
+                               message_id: int,
+                               to_chat_id: int,
+                               caption: Optional[str] = None,
+                               channel_id: Optional[int] = None,
+                               file_unique_id: Optional[str] = None) -> Tuple[Optional[Message], Optional[str]]:
+        """Send file by its stored Telegram file_id, falling back to copying from channel.
+        
+        Returns the sent message and, when sending the stored file_id failed
+        and the fallback copy carries the same content (file_unique_id), the
+        fresh file_id to persist. When a helper bot is less loaded it copies
+        the message instead (file_ids are only valid for the bot that
+        received them).
+        """
+        channel_id = storage_channels.resolve(channel_id)
+        message = await client_pool.copy_from_storage(message_id, to_chat_id, caption, channel_id)
+        if message:
+            return message, None
+        
+        cached_failed = False
+        if config.DELIVERY_MODE == 'cached' and telegram_file_id:
+            try:
+                message = await self.client.send_cached_media(
+                    chat_id=to_chat_id,
+                    file_id=telegram_file_id,
+                    caption=caption
+                )
+                return message, None
+            except Exception as e:
+                print(f"Cached file_id send failed, copying from channel: {e}")
+                cached_failed = True
+        
+        message = await self.copy_file(message_id, to_chat_id, caption, channel_id)
+        if not message or not cached_failed:
+            return message, None
+        
+        # A new file_id differs on every send; only a changed content ID means another file
+        media = get_media(message)
+        if not media or (file_unique_id and media.file_unique_id != file_unique_id):
+            return message, None
+        return message, media.file_id
+    
+    async def deliver_file(self,
+                           telegram_file_id: str,
+                           message_id: int,
+                           to_chat_id: int,
+                           caption: Optional[str] = None,
+                           channel_id: Optional[int] = None,
+                           mirrors: Optional[Dict[str, int]] = None,
+                           file_unique_id: Optional[str] = None) -> Tuple[Optional[Message], Optional[str]]:
+        """Send a stored file, hedging against another copy when the first is slow.
+        
+        The best-ranked copy is tried first through send_cached_file. If it
+        has not finished after the hedge delay, or fails, the next copy is
+        copied to the chat as well; the first success wins. A loser that has
+        not reached Telegram yet is cancelled; one already sent is left to
+        finish and its duplicate message is deleted.
+        """
+        copies = replica_selector.locations(channel_id, message_id, mirrors)
+        replica_selector.stats['deliveries'] += 1
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        attempts: Dict[asyncio.Task, Tuple[int, asyncio.Event, float]] = {}
+        attempts_made: List[asyncio.Task] = []
+        
+        async def attempt(index: int, copy_channel_id: int, copy_message_id: int, dispatched: asyncio.Event):
+            try:
+                with on_dispatch(dispatched.set):
+                    if index == 0:
+                        return await self.send_cached_file(
+                            telegram_file_id, copy_message_id, to_chat_id, caption, copy_channel_id,
+                            file_unique_id
+                        )
+                    return await self.copy_file(copy_message_id, to_chat_id, caption, copy_channel_id), None
+            except Exception as e:
+                print(f"Delivery from {copy_channel_id} failed: {e}")
+                return None, None
+        
+        def launch():
+            index = len(attempts_made)
+            copy_channel_id, copy_message_id = copies[index]
+            dispatched = asyncio.Event()
+            task = asyncio.create_task(attempt(index, copy_channel_id, copy_message_id, dispatched))
+            attempts[task] = (copy_channel_id, dispatched, loop.time())
+            attempts_made.append(task)
+        
+        launch()
+        winner = None
+        hedged = False
+        while attempts and not winner:
+            timeout = None
+            if len(attempts_made) == 1 and len(copies) > 1 and config.HEDGE_ENABLED:
+                timeout = max(0.0, started + replica_selector.hedge_delay() - loop.time())
+            done, _ = await asyncio.wait(attempts, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                replica_selector.stats['hedges'] += 1
+                hedged = True
+                launch()
+                continue
+            
+            for task in done:
+                copy_channel_id, _, launched = attempts.pop(task)
+                message, fresh_file_id = task.result()
+                elapsed = loop.time() - launched
+                if task is attempts_made[0]:
+                    replica_selector.record_first_attempt(elapsed)
+                if message and not winner:
+                    winner = (message, fresh_file_id)
+                    replica_selector.record_win(copy_channel_id, elapsed)
+                    if hedged and task is not attempts_made[0]:
+                        replica_selector.stats['hedge_wins'] += 1
+                elif message:
+                    # Both finished together: keep one
+                    replica_selector.record_loss(copy_channel_id, elapsed)
+                    await self._discard_duplicate(message)
+                else:
+                    replica_selector.record_loss(copy_channel_id)
+            
+            # A failed copy falls over to the next one right away
+            if not winner and not attempts and len(attempts_made) < len(copies):
+                replica_selector.stats['failovers'] += 1
+                launch()
+        
+        for task, (copy_channel_id, dispatched, launched) in attempts.items():
+            replica_selector.record_loss(copy_channel_id, loop.time() - launched)
+            if task is attempts_made[0]:
+                replica_selector.record_first_attempt(loop.time() - launched)
+            if dispatched.is_set():
+                cleanup = asyncio.create_task(self._discard_late(task))
+                _discarded.add(cleanup)
+                cleanup.add_done_callback(_discarded.discard)
+            else:
+                task.cancel()
+        
+        return winner or (None, None)
+    
+    async def _discard_late(self, task: asyncio.Task):
+        """Wait for a losing attempt that was already sent and remove its message"""
+        message, _ = await task
+        if message:
+            await self._discard_duplicate(message)
+    
+    async def _discard_duplicate(self, message: Message):
+        """Delete a duplicate delivery with the bot that sent it"""
+        try:
+            await message.delete()
+            replica_selector.stats['duplicates_removed'] += 1
+        except Exception as e:
+            print(f"Error removing duplicate delivery: {e}")
+    
+    async def delete_file(self, message_id: int, channel_id: Optional[int] = None) -> bool:
         """Delete file from channel"""
         try:
             await self.client.delete_messages(
-                chat_id=self.channel_id,
+                chat_id=storage_channels.resolve(channel_id),
                 message_ids=message_id
             )
             return True
@@ -76,10 +281,23 @@ class ChannelManager:
             return False
     
     async def verify_channel_access(self) -> bool:
-        """Verify bot has access to storage channel"""
-        try:
-            chat = await self.client.get_chat(self.channel_id)
-            return True
-        except Exception as e:
-            print(f"❌ Cannot access storage channel: {e}")
-            return False
\ No newline at end of file
+        """Verify bot has access to every storage channel"""
+        results = await storage_channels.verify_all(self.client)
+        return all(results.values())
+
+def get_media_file_id(message: Message) -> Optional[str]:
+    """Get the file_id of the media attached to a message"""
+    media = get_media(message)
+    return media.file_id if media else None
+
+def get_media_file_size(message: Message) -> int:
+    """Get the size of the media attached to a message"""
+    return getattr(get_media(message), 'file_size', None) or 0
+
+def get_media(message: Message):
+    """Get the media object attached to a message"""
+    for attr in ('document', 'video', 'audio', 'photo', 'voice', 'video_note', 'animation'):
+        media = getattr(message, attr, None)
+        if media:
+            return media
+    return None
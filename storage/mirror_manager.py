@@ -1,12 +1,53 @@
-"""Mirror manager for file redundancy (future feature)"""
-from typing import List, Optional
+"""Mirror manager for file redundancy"""
+import asyncio
+import secrets
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from core.rate_scheduler import background
+from database.models.mirror_job import MirrorJob
+from config import config
 
 class MirrorManager:
-    """Manage file mirroring across multiple channels (placeholder)"""
+    """Replicate storage messages to mirror channels.
     
-    def __init__(self, client):
+    New storage messages are queued per mirror in the mirror_queue
+    collection. A background loop leases due jobs, forwards them in
+    batches of up to MIRROR_BATCH_SIZE messages per mirror with at most
+    MIRROR_CONCURRENCY forwards in flight, records each mirror's message
+    id on the File and StoredMedia documents, and retries failures with
+    exponential backoff.
+    """
+    
+    def __init__(self, client=None):
+        self.client = client
+        self.mirror_channels: List[int] = list(config.MIRROR_CHANNEL_IDS)
+        self.concurrency = config.MIRROR_CONCURRENCY
+        self.batch_size = min(config.MIRROR_BATCH_SIZE, 100)  # forward_messages limit
+        self.interval = config.MIRROR_FLUSH_INTERVAL
+        self.max_attempts = config.MIRROR_MAX_ATTEMPTS
+        self.owner = secrets.token_hex(8)
+        self.task: Optional[asyncio.Task] = None
+        self.running = False
+        self.wakeup: Optional[asyncio.Event] = None
+        self.stats: Dict[int, dict] = {}
+    
+    async def start(self, client):
+        """Start the replication loop"""
         self.client = client
-        self.mirror_channels: List[int] = []
+        if self.running or not self.mirror_channels:
+            return
+        self.running = True
+        self.wakeup = asyncio.Event()
+        self.task = asyncio.create_task(self._run())
+        print(f"✅ Mirror replication started ({len(self.mirror_channels)} mirrors)")
+    
+    async def stop(self):
+        """Stop the replication loop (queued jobs stay in the database)"""
+        self.running = False
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
     
     async def add_mirror_channel(self, channel_id: int) -> bool:
         """Add a mirror channel"""
@@ -22,36 +63,192 @@ class MirrorManager:
             return True
         return False
     
-    async def mirror_file(self, message_id: int, from_channel_id: int) -> List[int]:
-        """Mirror file to all mirror channels"""
-        mirrored_ids = []
+    async def enqueue(self, source_channel_id: int, message_ids: List[int]) -> bool:
+        """Queue new storage messages for replication to every mirror"""
+        if not self.mirror_channels or not message_ids:
+            return True
+        
+        from database.connection import get_database
+        from database.queries.mirror_queries import MirrorQueries
+        
+        mirror_queries = MirrorQueries(await get_database())
+        success = await mirror_queries.enqueue([
+            MirrorJob(
+                source_channel_id=source_channel_id,
+                message_id=message_id,
+                mirror_channel_id=mirror_channel_id
+            )
+            for mirror_channel_id in self.mirror_channels
+            for message_id in message_ids
+        ])
+        if success and self.wakeup and len(message_ids) >= self.batch_size:
+            self.wakeup.set()
+        return success
+    
+    async def mirror_file(self, message_id: int, from_channel_id: int) -> Dict[int, int]:
+        """Mirror one message to all mirror channels now.
+        
+        Returns mirror channel id -> mirror message id for the copies made.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
         
-        for channel_id in self.mirror_channels:
+        async def forward(channel_id: int) -> Optional[int]:
+            async with semaphore:
+                copies = await self._forward(channel_id, from_channel_id, [message_id])
+                return copies[0] if copies else None
+        
+        with background():
+            results = await asyncio.gather(*(forward(channel_id) for channel_id in self.mirror_channels))
+        return {
+            channel_id: mirrored_id
+            for channel_id, mirrored_id in zip(self.mirror_channels, results)
+            if mirrored_id
+        }
+    
+    async def delete_from_mirrors(self, mirrors: Dict[str, int]) -> bool:
+        """Delete a file's copies, each with its own mirror message id"""
+        async def delete(channel_id: int, message_id: int) -> bool:
             try:
-                message = await self.client.forward_messages(
-                    chat_id=channel_id,
-                    from_chat_id=from_channel_id,
-                    message_ids=message_id
-                )
-                if message:
-                    mirrored_ids.append(message.id)
+                await self.client.delete_messages(chat_id=channel_id, message_ids=message_id)
+                return True
             except Exception as e:
-                print(f"Error mirroring to {channel_id}: {e}")
+                print(f"Error deleting from mirror {channel_id}: {e}")
+                return False
         
-        return mirrored_ids
+        with background():
+            results = await asyncio.gather(*(
+                delete(int(channel_id), message_id) for channel_id, message_id in mirrors.items()
+            ))
+        return all(results)
+    
+    def get_stats(self) -> Dict[int, dict]:
+        """Replication counters and lag per mirror"""
+        return {channel_id: dict(stats) for channel_id, stats in self.stats.items()}
     
-    async def delete_from_mirrors(self, message_ids: List[int]) -> bool:
-        """Delete file from all mirror channels"""
-        success = True
+    async def get_lag(self) -> Dict[int, dict]:
+        """Queue backlog and age of the oldest unreplicated message per mirror"""
+        from database.connection import get_database
+        from database.queries.mirror_queries import MirrorQueries
         
-        for channel_id in self.mirror_channels:
+        backlog = await MirrorQueries(await get_database()).get_backlog()
+        now = datetime.utcnow()
+        lag = {}
+        for channel_id in set(self.mirror_channels) | set(backlog):
+            entry = backlog.get(channel_id, {'pending': 0, 'failed': 0, 'oldest_pending': None})
+            oldest = entry.pop('oldest_pending')
+            entry['lag_seconds'] = (now - oldest).total_seconds() if oldest else 0.0
+            entry.update(self.stats.get(channel_id, {}))
+            lag[channel_id] = entry
+        return lag
+    
+    async def _run(self):
+        """Replicate due jobs until stopped"""
+        while self.running:
             try:
-                await self.client.delete_messages(
-                    chat_id=channel_id,
-                    message_ids=message_ids
-                )
+                await self._replicate_due()
             except Exception as e:
-                print(f"Error deleting from mirror {channel_id}: {e}")
-                success = False
+                print(f"Mirror replication error: {e}")
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+    
+    async def _replicate_due(self):
+        """Lease due jobs and replicate them in concurrent batches"""
+        from database.connection import get_database
+        from database.queries.file_queries import FileQueries
+        from database.queries.mirror_queries import MirrorQueries
+        
+        db = await get_database()
+        mirror_queries = MirrorQueries(db)
+        file_queries = FileQueries(db)
+        
+        jobs = await mirror_queries.claim_due(self.owner, limit=self.batch_size * self.concurrency * 4)
+        if not jobs:
+            return
+        
+        groups: Dict[tuple, List[MirrorJob]] = {}
+        for job in jobs:
+            groups.setdefault((job.mirror_channel_id, job.source_channel_id), []).append(job)
+        batches = [
+            (mirror_channel_id, source_channel_id, group[start:start + self.batch_size])
+            for (mirror_channel_id, source_channel_id), group in groups.items()
+            for start in range(0, len(group), self.batch_size)
+        ]
+        
+        semaphore = asyncio.Semaphore(self.concurrency)
         
-        return success
\ No newline at end of file
+        async def run(batch):
+            async with semaphore:
+                await self._replicate_batch(mirror_queries, file_queries, *batch)
+        
+        with background():
+            await asyncio.gather(*(run(batch) for batch in batches))
+    
+    async def _replicate_batch(self, mirror_queries, file_queries,
+                               mirror_channel_id: int, source_channel_id: int,
+                               jobs: List[MirrorJob]):
+        """Forward one batch to a mirror and record the outcome"""
+        stats = self.stats.setdefault(mirror_channel_id, {
+            'replicated': 0,
+            'failed': 0,
+            'batches': 0,
+            'last_replicated_at': None,
+            'last_lag_seconds': 0.0,
+            'max_lag_seconds': 0.0,
+        })
+        message_ids = [job.message_id for job in jobs]
+        copies = await self._forward(mirror_channel_id, source_channel_id, message_ids)
+        
+        if copies and len(copies) != len(message_ids):
+            # Missing source messages shift the result list, so go one by one
+            copies = []
+            for message_id in message_ids:
+                single = await self._forward(mirror_channel_id, source_channel_id, [message_id])
+                copies.append(single[0] if single else None)
+        
+        mapping = {
+            message_id: copy_id for message_id, copy_id in zip(message_ids, copies) if copy_id
+        }
+        if mapping:
+            await file_queries.set_mirror_ids(source_channel_id, mirror_channel_id, mapping)
+            await mirror_queries.complete(mirror_channel_id, source_channel_id, list(mapping))
+            
+            now = datetime.utcnow()
+            lag = max((now - job.enqueued_at).total_seconds() for job in jobs if job.message_id in mapping)
+            stats['replicated'] += len(mapping)
+            stats['batches'] += 1
+            stats['last_replicated_at'] = now.isoformat()
+            stats['last_lag_seconds'] = lag
+            stats['max_lag_seconds'] = max(stats['max_lag_seconds'], lag)
+        
+        failed = [job for job in jobs if job.message_id not in mapping]
+        if failed:
+            stats['failed'] += len(failed)
+            now = datetime.utcnow()
+            for job in failed:
+                job.attempts += 1
+                job.last_error = f"forward to {mirror_channel_id} failed"
+                job.next_attempt_at = now + timedelta(seconds=min(30 * 2 ** (job.attempts - 1), 3600))
+                if job.attempts >= self.max_attempts:
+                    job.status = 'failed'
+            await mirror_queries.reschedule(failed)
+    
+    async def _forward(self, channel_id: int, from_channel_id: int, message_ids: List[int]) -> List[int]:
+        """Forward messages to a mirror, returning the new message ids in order"""
+        try:
+            messages = await self.client.forward_messages(
+                chat_id=channel_id,
+                from_chat_id=from_channel_id,
+                message_ids=message_ids
+            )
+            if not isinstance(messages, list):
+                messages = [messages] if messages else []
+            return [message.id for message in messages]
+        except Exception as e:
+            print(f"Error mirroring to {channel_id}: {e}")
+            return []
+
+# Global mirror manager
+mirror_manager = MirrorManager()
\ No newline at end of file
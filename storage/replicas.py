@@ -0,0 +1,131 @@
+"""Replica ranking and hedge timing for deliveries"""
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+from storage.storage_channels import storage_channels
+from config import config
+
+class ReplicaStats:
+    """Latency and race record of one storage or mirror channel"""
+    
+    def __init__(self, channel_id: int):
+        self.channel_id = channel_id
+        self.samples: Deque[float] = deque(maxlen=200)
+        self.ewma: Optional[float] = None
+        self.wins = 0
+        self.losses = 0
+        self.loss_streak = 0
+        self.demoted_until = 0.0
+    
+    def is_demoted(self) -> bool:
+        return time.monotonic() < self.demoted_until
+    
+    def record_latency(self, seconds: float):
+        self.samples.append(seconds)
+        self.ewma = seconds if self.ewma is None else 0.8 * self.ewma + 0.2 * seconds
+    
+    def to_dict(self) -> dict:
+        return {
+            'wins': self.wins,
+            'losses': self.losses,
+            'demoted': self.is_demoted(),
+            'ewma_ms': round(self.ewma * 1000, 1) if self.ewma is not None else None,
+            'p50_ms': round(percentile(self.samples, 50) * 1000, 1) if self.samples else None,
+            'p95_ms': round(percentile(self.samples, 95) * 1000, 1) if self.samples else None,
+        }
+
+class ReplicaSelector:
+    """Order a file's copies by recent latency and time the hedged attempt.
+    
+    The first attempt goes to the best-ranked copy. Once it has been
+    running longer than the configured percentile of recent first-attempt
+    latencies, a second attempt is sent to the next copy. Copies that
+    keep losing races are demoted to the back of the order for a while.
+    """
+    
+    def __init__(self,
+                 hedge_percentile: float = config.HEDGE_PERCENTILE,
+                 min_delay: float = config.HEDGE_MIN_DELAY_MS / 1000,
+                 max_delay: float = config.HEDGE_MAX_DELAY_MS / 1000,
+                 demote_after: int = config.HEDGE_DEMOTE_AFTER,
+                 demote_for: int = config.HEDGE_DEMOTE_SECONDS):
+        self.hedge_percentile = hedge_percentile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.demote_after = demote_after
+        self.demote_for = demote_for
+        self.replicas: Dict[int, ReplicaStats] = {}
+        self.first_attempts: Deque[float] = deque(maxlen=500)
+        self.stats = {
+            'deliveries': 0,
+            'hedges': 0,
+            'hedge_wins': 0,
+            'failovers': 0,
+            'duplicates_removed': 0,
+        }
+    
+    def locations(self,
+                  channel_id: Optional[int],
+                  message_id: int,
+                  mirrors: Optional[Dict[str, int]] = None) -> List[Tuple[int, int]]:
+        """Every (channel id, message id) holding a copy, best first"""
+        copies = [(storage_channels.resolve(channel_id), message_id)]
+        copies += [(int(mirror_id), mirror_message_id) for mirror_id, mirror_message_id in (mirrors or {}).items()]
+        
+        def key(item):
+            position, (copy_channel_id, _) = item
+            replica = self.replicas.get(copy_channel_id)
+            health = storage_channels.health.get(copy_channel_id)
+            penalized = (replica is not None and replica.is_demoted()) or (health is not None and not health.is_healthy())
+            latency = replica.ewma if replica and replica.ewma is not None else float('inf')
+            return penalized, latency, position
+        
+        return [copy for _, copy in sorted(enumerate(copies), key=key)]
+    
+    def hedge_delay(self) -> float:
+        """Seconds to wait on the first attempt before hedging"""
+        if len(self.first_attempts) < 20:
+            return self.max_delay
+        delay = percentile(self.first_attempts, self.hedge_percentile)
+        return min(self.max_delay, max(self.min_delay, delay))
+    
+    def record_first_attempt(self, seconds: float):
+        """Latency of a first attempt (a lower bound when it was cut short)"""
+        self.first_attempts.append(seconds)
+    
+    def record_win(self, channel_id: int, seconds: float):
+        replica = self._replica(channel_id)
+        replica.wins += 1
+        replica.loss_streak = 0
+        replica.record_latency(seconds)
+    
+    def record_loss(self, channel_id: int, seconds: Optional[float] = None):
+        replica = self._replica(channel_id)
+        replica.losses += 1
+        replica.loss_streak += 1
+        if seconds is not None:
+            replica.record_latency(seconds)
+        if replica.loss_streak >= self.demote_after:
+            replica.demoted_until = time.monotonic() + self.demote_for
+            replica.loss_streak = 0
+    
+    def get_stats(self) -> dict:
+        """Hedging counters and per-copy latency"""
+        return {
+            **self.stats,
+            'hedge_delay_ms': round(self.hedge_delay() * 1000, 1),
+            'replicas': {channel_id: replica.to_dict() for channel_id, replica in self.replicas.items()},
+        }
+    
+    def _replica(self, channel_id: int) -> ReplicaStats:
+        if channel_id not in self.replicas:
+            self.replicas[channel_id] = ReplicaStats(channel_id)
+        return self.replicas[channel_id]
+
+def percentile(samples, pct: float) -> float:
+    """Nearest-rank percentile of a sample window"""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+# Global replica selector
+replica_selector = ReplicaSelector()
\ No newline at end of file
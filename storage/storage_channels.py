@@ -0,0 +1,142 @@
+"""Sharded storage channel set"""
+import asyncio
+import time
+from typing import Dict, List, Optional
+from pyrogram import Client
+from pyrogram.errors import ChannelInvalid, ChannelPrivate, MessageIdInvalid
+from utils.hash_ring import HashRing
+from config import config
+
+PLACEMENT_USER = 'user_id'
+PLACEMENT_CONTENT = 'content'
+
+# Delivery errors caused by the storage channel or the path to it. Errors
+# about the recipient (blocked bot, unknown or deleted user) say nothing
+# about the channel and do not count against its health.
+CHANNEL_ERRORS = (ChannelInvalid, ChannelPrivate, MessageIdInvalid, asyncio.TimeoutError, TimeoutError)
+
+def is_channel_error(error: Exception) -> bool:
+    """Whether a failed delivery should count against the storage channel"""
+    return isinstance(error, CHANNEL_ERRORS)
+
+class ChannelHealth:
+    """Health and throughput counters for one storage channel"""
+
+    def __init__(self, channel_id: int):
+        self.channel_id = channel_id
+        self.accessible = True
+        self.consecutive_failures = 0
+        self.down_until = 0.0
+        self.stats = {
+            'writes': 0,
+            'reads': 0,
+            'failures': 0,
+            'bytes_written': 0,
+            'last_error': None,
+        }
+        self.started = time.monotonic()
+
+    def is_healthy(self) -> bool:
+        return self.accessible and time.monotonic() >= self.down_until
+
+    def to_dict(self) -> dict:
+        elapsed = max(time.monotonic() - self.started, 1)
+        return {
+            **self.stats,
+            'healthy': self.is_healthy(),
+            'consecutive_failures': self.consecutive_failures,
+            'writes_per_min': self.stats['writes'] * 60 / elapsed,
+            'reads_per_min': self.stats['reads'] * 60 / elapsed,
+        }
+
+class StorageChannels:
+    """Place new files on storage channels by consistent hashing.
+
+    Each File records the channel it was stored in, so adding a channel
+    only changes where new uploads go. Channels that keep failing are
+    skipped for a cooldown and their keys fall through to the next
+    channel on the ring.
+    """
+
+    def __init__(self,
+                 channel_ids: List[int] = config.STORAGE_CHANNEL_IDS,
+                 placement: str = config.STORAGE_PLACEMENT,
+                 failure_threshold: int = 3,
+                 cooldown: int = 60):
+        self.placement = placement
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.ring: HashRing[int] = HashRing(channel_ids)
+        self.health: Dict[int, ChannelHealth] = {
+            channel_id: ChannelHealth(channel_id) for channel_id in channel_ids
+        }
+
+    @property
+    def channel_ids(self) -> List[int]:
+        return list(self.ring.nodes)
+
+    def resolve(self, channel_id: Optional[int]) -> int:
+        """Channel of a stored record (records from before sharding have none)"""
+        return channel_id or config.STORAGE_CHANNEL_ID
+
+    def place(self, user_id: int, file_unique_id: Optional[str] = None) -> int:
+        """Pick the storage channel for a new upload"""
+        if self.placement == PLACEMENT_CONTENT and file_unique_id:
+            key = file_unique_id
+        else:
+            key = str(user_id)
+        return self.ring.get(key, accept=lambda channel_id: self.health[channel_id].is_healthy())
+
+    def record_write(self, channel_id: int, success: bool, size: int = 0, error: Optional[str] = None):
+        """Update a channel's health after a write"""
+        health = self._health(channel_id)
+        if success:
+            health.stats['writes'] += 1
+            health.stats['bytes_written'] += size
+        self._record(health, success, error)
+
+    def record_read(self, channel_id: int, success: bool, error: Optional[str] = None):
+        """Update a channel's health after a read or delivery"""
+        health = self._health(channel_id)
+        if success:
+            health.stats['reads'] += 1
+        self._record(health, success, error)
+
+    async def verify_all(self, client: Client) -> Dict[int, bool]:
+        """Check access to every storage channel concurrently"""
+        async def check(channel_id: int) -> bool:
+            try:
+                await client.get_chat(channel_id)
+                return True
+            except Exception as e:
+                print(f"❌ Cannot access storage channel {channel_id}: {e}")
+                return False
+
+        channel_ids = self.channel_ids
+        results = await asyncio.gather(*(check(channel_id) for channel_id in channel_ids))
+        for channel_id, accessible in zip(channel_ids, results):
+            self._health(channel_id).accessible = accessible
+        return dict(zip(channel_ids, results))
+
+    def get_stats(self) -> dict:
+        """Per-channel health and throughput"""
+        return {channel_id: health.to_dict() for channel_id, health in self.health.items()}
+
+    def _health(self, channel_id: int) -> ChannelHealth:
+        if channel_id not in self.health:
+            # Legacy channel no longer in the placement set
+            self.health[channel_id] = ChannelHealth(channel_id)
+        return self.health[channel_id]
+
+    def _record(self, health: ChannelHealth, success: bool, error: Optional[str]):
+        if success:
+            health.consecutive_failures = 0
+            return
+        health.stats['failures'] += 1
+        health.stats['last_error'] = error
+        health.consecutive_failures += 1
+        if health.consecutive_failures >= self.failure_threshold:
+            health.down_until = time.monotonic() + self.cooldown
+
+# Global storage channel set
+storage_channels = StorageChannels()
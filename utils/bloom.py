@@ -0,0 +1,59 @@
+import hashlib
+import math
+from typing import List
+
+class BloomFilter:
+    """Fixed-size Bloom filter over string keys"""
+    
+    def __init__(self, capacity: int, fp_rate: float = 0.001):
+        self.capacity = max(capacity, 1)
+        self.fp_rate = fp_rate
+        self.size = self.optimal_size(self.capacity, fp_rate)
+        self.hash_count = self.optimal_hash_count(self.size, self.capacity)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+    
+    @staticmethod
+    def optimal_size(capacity: int, fp_rate: float) -> int:
+        """Number of bits for capacity items at the target false positive rate"""
+        return max(8, int(-capacity * math.log(fp_rate) / (math.log(2) ** 2)))
+    
+    @staticmethod
+    def optimal_hash_count(size: int, capacity: int) -> int:
+        """Number of hash functions minimising false positives"""
+        return max(1, round(size / capacity * math.log(2)))
+    
+    def offsets(self, key: str) -> List[int]:
+        """Bit offsets for a key (double hashing over one blake2b digest)"""
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'big')
+        h2 = int.from_bytes(digest[8:], 'big') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+    
+    def add(self, key: str):
+        """Add a key"""
+        for offset in self.offsets(key):
+            self.bits[offset >> 3] |= 1 << (offset & 7)
+        self.count += 1
+    
+    def __contains__(self, key: str) -> bool:
+        return all(
+            self.bits[offset >> 3] & (1 << (offset & 7))
+            for offset in self.offsets(key)
+        )
+    
+    def estimated_fp_rate(self) -> float:
+        """False positive rate at the current fill"""
+        return (1 - math.exp(-self.hash_count * self.count / self.size)) ** self.hash_count
+    
+    def memory_report(self) -> dict:
+        """Size and fill statistics"""
+        return {
+            'capacity': self.capacity,
+            'items': self.count,
+            'bits': self.size,
+            'hash_count': self.hash_count,
+            'memory_bytes': len(self.bits),
+            'target_fp_rate': self.fp_rate,
+            'estimated_fp_rate': self.estimated_fp_rate(),
+        }
\ No newline at end of file
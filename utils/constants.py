@@ -55,6 +55,24 @@ LINK_STATUS_EXPIRED = 'expired'
 LINK_STATUS_REVOKED = 'revoked'
 LINK_STATUS_USED = 'used'
 
+# Link Access Reasons
+LINK_ACCESS_OK = 'ok'
+LINK_ACCESS_NOT_FOUND = 'not_found'
+LINK_ACCESS_REVOKED = 'revoked'
+LINK_ACCESS_EXPIRED = 'expired'
+LINK_ACCESS_EXHAUSTED = 'exhausted'
+LINK_ACCESS_SELF_DESTRUCTED = 'self_destructed'
+LINK_ACCESS_UNAVAILABLE = 'unavailable'
+
+LINK_ACCESS_MESSAGES = {
+    LINK_ACCESS_NOT_FOUND: "❌ Invalid download link.",
+    LINK_ACCESS_REVOKED: "❌ This link has been revoked.",
+    LINK_ACCESS_EXPIRED: "❌ This link has expired.",
+    LINK_ACCESS_EXHAUSTED: "❌ This link has reached its maximum access limit.",
+    LINK_ACCESS_SELF_DESTRUCTED: "❌ This link has self-destructed.",
+    LINK_ACCESS_UNAVAILABLE: "❌ This link is not accessible.",
+}
+
 # User Roles
 ROLE_USER = 'user'
 ROLE_ADMIN = 'admin'
@@ -64,6 +82,9 @@ ROLE_BANNED = 'banned'
 CACHE_TTL_USER = 3600  # 1 hour
 CACHE_TTL_FILE = 1800  # 30 minutes
 CACHE_TTL_LINK = 3600  # 1 hour
+CACHE_TTL_DEAD_LINK = 600  # 10 minutes (revoked, expired, exhausted)
+CACHE_TTL_MISSING_LINK = 60  # 1 minute (not found)
+CACHE_TTL_PAGE = 300  # 5 minutes (rendered list pages)
 
 # Rate Limiting
 RATE_LIMIT_MESSAGES = 20  # messages per minute
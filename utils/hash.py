@@ -1,6 +1,10 @@
+import base64
 import hashlib
+import hmac
 import secrets
 import string
+import struct
+from datetime import datetime, timezone
 from typing import Optional
 
 def generate_file_hash(file_data: bytes) -> str:
@@ -30,4 +34,66 @@ def generate_link_id() -> str:
 
 def generate_file_id() -> str:
     """Generate unique file ID"""
-    return generate_secure_token(16)
\ No newline at end of file
+    return generate_secure_token(16)
+
+# Signed link layout: file_id (16 bytes) | expiry (uint32, 0 = never) |
+# revocation epoch (uint16) | random nonce (8 bytes) | truncated
+# HMAC-SHA256 (10 bytes). The nonce keeps links to the same file with the
+# same expiry distinct; IDs from before it (no nonce) still verify.
+SIGNED_LINK_PREFIX = 's'
+_SIGNED_LINK_FORMAT = '>16sIH8s'
+_LEGACY_SIGNED_LINK_FORMAT = '>16sIH'
+_SIGNED_LINK_MAC_SIZE = 10
+# Link ID length (prefix included) -> payload format
+_SIGNED_LINK_FORMATS = {55: _SIGNED_LINK_FORMAT, 44: _LEGACY_SIGNED_LINK_FORMAT}
+
+def _link_mac(payload: bytes, secret: str) -> bytes:
+    """Truncated HMAC over a signed link payload"""
+    return hmac.new(secret.encode(), b'link:' + payload, hashlib.sha256).digest()[:_SIGNED_LINK_MAC_SIZE]
+
+def generate_signed_link_id(file_id: str, expires_at: Optional[datetime], epoch: int, secret: str) -> str:
+    """Generate a self-validating link ID for a file.
+    
+    Fits in a Telegram start parameter (64 chars of [A-Za-z0-9_-]), which
+    rules out a full JWT. Raises ValueError if file_id is not a 16-byte
+    urlsafe token.
+    """
+    raw_file_id = base64.urlsafe_b64decode(file_id + '==')
+    if len(raw_file_id) != 16:
+        raise ValueError("file_id is not a 16-byte token")
+    
+    expiry = int(expires_at.replace(tzinfo=timezone.utc).timestamp()) if expires_at else 0
+    payload = struct.pack(_SIGNED_LINK_FORMAT, raw_file_id, expiry, epoch, secrets.token_bytes(8))
+    token = base64.urlsafe_b64encode(payload + _link_mac(payload, secret)).rstrip(b'=')
+    return SIGNED_LINK_PREFIX + token.decode()
+
+def is_signed_link_id(link_id: str) -> bool:
+    """Check if a link ID uses the signed format"""
+    return link_id.startswith(SIGNED_LINK_PREFIX) and len(link_id) in _SIGNED_LINK_FORMATS
+
+def verify_signed_link_id(link_id: str, secret: str) -> Optional[dict]:
+    """Verify a signed link ID and return its claims, or None if forged"""
+    if not is_signed_link_id(link_id):
+        return None
+    try:
+        data = base64.urlsafe_b64decode(link_id[1:] + '=' * (-len(link_id[1:]) % 4))
+    except Exception:
+        return None
+    
+    # Reject non-canonical encodings so one link has exactly one ID
+    if base64.urlsafe_b64encode(data).rstrip(b'=').decode() != link_id[1:]:
+        return None
+    
+    payload_format = _SIGNED_LINK_FORMATS[len(link_id)]
+    payload, mac = data[:-_SIGNED_LINK_MAC_SIZE], data[-_SIGNED_LINK_MAC_SIZE:]
+    if len(payload) != struct.calcsize(payload_format):
+        return None
+    if not hmac.compare_digest(mac, _link_mac(payload, secret)):
+        return None
+    
+    raw_file_id, expiry, epoch = struct.unpack(payload_format, payload)[:3]
+    return {
+        'file_id': base64.urlsafe_b64encode(raw_file_id).rstrip(b'=').decode(),
+        'expires_at': datetime.utcfromtimestamp(expiry) if expiry else None,
+        'epoch': epoch
+    }
\ No newline at end of file
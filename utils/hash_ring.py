@@ -0,0 +1,65 @@
+import bisect
+import hashlib
+from typing import Callable, Generic, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+T = TypeVar('T')
+
+class HashRing(Generic[T]):
+    """Consistent hash ring with virtual nodes.
+
+    Adding or removing a node only moves the keys that hash next to its
+    virtual points; every other key keeps its node.
+    """
+
+    def __init__(self, nodes: Iterable[T] = (), replicas: int = 100):
+        self.replicas = replicas
+        self.points: List[Tuple[int, T]] = []
+        self.nodes: List[T] = []
+        for node in nodes:
+            self.add(node)
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), 'big')
+
+    def add(self, node: T):
+        """Add a node"""
+        if node in self.nodes:
+            return
+        self.nodes.append(node)
+        for i in range(self.replicas):
+            bisect.insort(self.points, (self._hash(f"{node}#{i}"), node))
+
+    def remove(self, node: T):
+        """Remove a node"""
+        if node not in self.nodes:
+            return
+        self.nodes.remove(node)
+        self.points = [point for point in self.points if point[1] != node]
+
+    def walk(self, key: str) -> Iterator[T]:
+        """Distinct nodes in ring order starting at the key's position"""
+        if not self.points:
+            return
+        start = bisect.bisect(self.points, (self._hash(key),))
+        seen = set()
+        for i in range(len(self.points)):
+            node = self.points[(start + i) % len(self.points)][1]
+            if node not in seen:
+                seen.add(node)
+                yield node
+                if len(seen) == len(self.nodes):
+                    return
+
+    def get(self, key: str, accept: Optional[Callable[[T], bool]] = None) -> Optional[T]:
+        """Node owning a key, skipping nodes that accept() rejects"""
+        fallback = None
+        for node in self.walk(key):
+            if accept is None or accept(node):
+                return node
+            if fallback is None:
+                fallback = node
+        return fallback
+
+    def __len__(self) -> int:
+        return len(self.nodes)
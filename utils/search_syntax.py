@@ -0,0 +1,117 @@
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+FILE_TYPES = {'document', 'video', 'audio', 'photo'}
+
+SIZE_UNITS = {'': 1, 'b': 1, 'kb': 1024, 'mb': 1024 ** 2, 'gb': 1024 ** 3, 'tb': 1024 ** 4}
+
+# sort: keyword -> (field, direction)
+SORTS = {
+    'newest': ('created_at', -1),
+    'oldest': ('created_at', 1),
+    'downloads': ('download_count', -1),
+    'largest': ('file_size', -1),
+    'smallest': ('file_size', 1),
+}
+SORTS['size'] = SORTS['largest']
+
+SIZE_OPERATORS = {'>': '$gt', '>=': '$gte', '<': '$lt', '<=': '$lte', ':': '$eq', '=': '$eq'}
+
+_SIZE = re.compile(r'^size(>=|<=|>|<|:|=)(\d+(?:\.\d+)?)([a-z]*)$')
+_FIELD = re.compile(r'^(type|tag|after|before|sort):(.+)$')
+
+class SearchQuery:
+    """A parsed /search query: free text plus metadata filters"""
+    
+    def __init__(self):
+        self.text = ''
+        self.file_types: List[str] = []
+        self.size: Dict[str, int] = {}
+        self.after: Optional[datetime] = None
+        self.before: Optional[datetime] = None
+        self.tags: List[str] = []
+        self.sort = SORTS['newest']
+    
+    def has_filters(self) -> bool:
+        """Whether anything beyond free text was given"""
+        return bool(self.file_types or self.size or self.after or self.before or self.tags
+                    or self.sort != SORTS['newest'])
+    
+    def predicates(self) -> Dict[str, Any]:
+        """Mongo conditions per field"""
+        predicates: Dict[str, Any] = {}
+        if self.file_types:
+            predicates['file_type'] = (
+                self.file_types[0] if len(self.file_types) == 1 else {'$in': self.file_types}
+            )
+        if self.size:
+            predicates['file_size'] = dict(self.size)
+        created = {}
+        if self.after:
+            created['$gte'] = self.after
+        if self.before:
+            created['$lt'] = self.before
+        if created:
+            predicates['created_at'] = created
+        if self.tags:
+            predicates['tags'] = self.tags[0] if len(self.tags) == 1 else {'$all': self.tags}
+        return predicates
+
+def parse_size(value: str, unit: str) -> int:
+    """Bytes for a number with an optional B/KB/MB/GB/TB unit"""
+    if unit not in SIZE_UNITS:
+        raise ValueError(f"Unknown size unit: {unit}")
+    return int(float(value) * SIZE_UNITS[unit])
+
+def parse_date(value: str) -> datetime:
+    """Midnight UTC of a YYYY-MM-DD date"""
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise ValueError(f"Invalid date: {value} (use YYYY-MM-DD)")
+
+def parse_search(query: str) -> SearchQuery:
+    """Split a /search query into filters and free text.
+    
+    Raises ValueError with a user-facing message on a malformed filter.
+    """
+    parsed = SearchQuery()
+    words = []
+    for token in query.split():
+        lowered = token.lower()
+        
+        size = _SIZE.match(lowered)
+        if size:
+            operator, value, unit = size.groups()
+            parsed.size[SIZE_OPERATORS[operator]] = parse_size(value, unit)
+            continue
+        
+        field = _FIELD.match(lowered)
+        if not field:
+            words.append(token)
+            continue
+        
+        name, value = field.groups()
+        if name == 'type':
+            for file_type in value.split(','):
+                if file_type not in FILE_TYPES:
+                    raise ValueError(f"Unknown type: {file_type} (use {', '.join(sorted(FILE_TYPES))})")
+                if file_type not in parsed.file_types:
+                    parsed.file_types.append(file_type)
+        elif name == 'tag':
+            if value not in parsed.tags:
+                parsed.tags.append(value)
+        elif name == 'after':
+            parsed.after = parse_date(value)
+        elif name == 'before':
+            parsed.before = parse_date(value)
+        elif name == 'sort':
+            if value not in SORTS:
+                raise ValueError(f"Unknown sort: {value} (use {', '.join(sorted(SORTS))})")
+            parsed.sort = SORTS[value]
+    
+    if '$eq' in parsed.size:
+        parsed.size = {'$eq': parsed.size['$eq']}
+    parsed.text = ' '.join(words)
+    return parsed
\ No newline at end of file
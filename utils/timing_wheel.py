@@ -0,0 +1,93 @@
+import math
+from typing import Dict, List, Set, Tuple
+
+class TimingWheel:
+    """Hierarchical timing wheel.
+    
+    Level 0 has one slot per tick, each higher level's slot spans a full
+    turn of the level below. Timers cascade down a level as their slot
+    comes up, so add, cancel and per-tick expiry are O(1) per timer.
+    """
+    
+    def __init__(self, tick: float = 1.0, wheel_size: int = 60, levels: int = 3, now: float = 0.0):
+        self.tick = tick
+        self.wheel_size = wheel_size
+        self.levels = levels
+        self.wheels: List[List[Set[str]]] = [
+            [set() for _ in range(wheel_size)] for _ in range(levels)
+        ]
+        self.current = int(now // tick)
+        self.timers: Dict[str, Tuple[int, int, int]] = {}  # key -> (due tick, level, slot)
+        self.overdue: Set[str] = set()
+    
+    @property
+    def span(self) -> float:
+        """Furthest a timer can be scheduled ahead, in seconds"""
+        return self.wheel_size ** self.levels * self.tick
+    
+    def __len__(self) -> int:
+        return len(self.timers) + len(self.overdue)
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self.timers or key in self.overdue
+    
+    def add(self, key: str, due: float) -> bool:
+        """Schedule key at timestamp due (False if beyond the wheel's span)"""
+        self.cancel(key)
+        due_tick = math.ceil(due / self.tick)
+        if due_tick <= self.current:
+            self.overdue.add(key)
+            return True
+        return self._place(key, due_tick)
+    
+    def cancel(self, key: str) -> bool:
+        """Remove a scheduled key"""
+        if key in self.overdue:
+            self.overdue.discard(key)
+            return True
+        entry = self.timers.pop(key, None)
+        if entry is None:
+            return False
+        _, level, slot = entry
+        self.wheels[level][slot].discard(key)
+        return True
+    
+    def advance(self, now: float) -> List[str]:
+        """Move the wheel to now and return the keys that came due"""
+        fired = list(self.overdue)
+        self.overdue.clear()
+        
+        target = int(now // self.tick)
+        while self.current < target:
+            self.current += 1
+            # Cascade higher levels whose slot boundary we just crossed
+            for level in range(self.levels - 1, 0, -1):
+                if self.current % (self.wheel_size ** level) == 0:
+                    slot = (self.current // self.wheel_size ** level) % self.wheel_size
+                    keys, self.wheels[level][slot] = self.wheels[level][slot], set()
+                    for key in keys:
+                        due_tick, _, _ = self.timers.pop(key)
+                        self._place(key, due_tick)
+            
+            slot = self.current % self.wheel_size
+            keys, self.wheels[0][slot] = self.wheels[0][slot], set()
+            for key in keys:
+                self.timers.pop(key, None)
+                fired.append(key)
+        
+        return fired
+    
+    def _place(self, key: str, due_tick: int) -> bool:
+        """Put a timer in the lowest level that can hold it"""
+        delta = due_tick - self.current
+        if delta <= 0:
+            # Cascaded onto the current tick: its level 0 slot is drained next
+            delta = 0
+            due_tick = self.current
+        for level in range(self.levels):
+            if delta < self.wheel_size ** (level + 1):
+                slot = (due_tick // self.wheel_size ** level) % self.wheel_size
+                self.wheels[level][slot].add(key)
+                self.timers[key] = (due_tick, level, slot)
+                return True
+        return False
\ No newline at end of file
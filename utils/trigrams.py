@@ -0,0 +1,20 @@
+import re
+import unicodedata
+from typing import Set
+
+_SEPARATORS = re.compile(r'[\W_]+')
+
+def normalize(text: str) -> str:
+    """Case-fold text and collapse every run of separators to one space"""
+    text = unicodedata.normalize('NFKC', text).casefold()
+    return _SEPARATORS.sub(' ', text).strip()
+
+def trigrams(text: str) -> Set[str]:
+    """Distinct trigrams of the normalized text (empty below three characters)"""
+    text = normalize(text)
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def literal_pattern(text: str) -> str:
+    """Escaped regex matching the normalized text inside a raw name"""
+    # Separators in the text match any run of separators in the name
+    return r'[\W_]+'.join(re.escape(token) for token in normalize(text).split())